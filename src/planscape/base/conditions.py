@@ -1,7 +1,8 @@
 """Functions for computing conditions."""
 
 import numpy as np
-from typing import Optional, cast
+from collections import Counter
+from typing import Iterable, Optional, cast
 
 from base.condition_types import ConditionMatrix, ConditionScoreType
 
@@ -36,45 +37,52 @@ def weighted_average_condition(
       For example, if the condition values at a pixel are 0.5, nan, and 0.25, and the weights are 1, 2, 3,
       then the weighted average will be (0.5 * 1 + 0.25 * 3)/(1 + 3), not divided by (1 + 2 + 3).
 
+      The sums are accumulated in a float32 buffer and the weights in a float64
+      buffer, input by input, with no other full-size temporaries than a float32
+      copy of the input and its NoData mask. The result is the float64 weight
+      buffer.
+
     Raises:
       ValueError if the conditions do not have the same shape.
     """
-    for condition, weight in conditions_with_weights:
-        if np.any(np.isnan(condition)) and not np.isnan(no_data_value):
-            raise KeyError(
-                "Raster has NaN values, but NaN is not defined as NoData value."
-            )
+    if not conditions_with_weights:
+        return None
 
-    sum = None
-    total_weight = None
-    for condition, weight in conditions_with_weights:
+    shape = np.shape(conditions_with_weights[0][0])
+    sum = np.empty(shape, dtype="float32")
+    total_weight = np.zeros(shape, dtype="float64")
+    condition = np.empty(shape, dtype="float32")
+    mask = np.empty(shape, dtype=bool)
+    limit = np.finfo("float32").max
+    for i, (raw_condition, weight) in enumerate(conditions_with_weights):
         # Convert all conditions to float. This allows us to output NoData values as NaN.
-        condition = condition.astype("float32")
+        np.copyto(condition, raw_condition, casting="unsafe")
+
+        # Find the NoData values.
+        np.isnan(condition, out=mask)
+        if not np.isnan(no_data_value):
+            if mask.any():
+                raise KeyError(
+                    "Raster has NaN values, but NaN is not defined as NoData value."
+                )
+            np.equal(condition, no_data_value, out=mask)
+
+        # NoData values count as 0, infinite values as the largest floats.
+        np.copyto(condition, 0, where=mask)
+        np.clip(condition, -limit, limit, out=condition)
+        np.multiply(condition, weight, out=condition)
+        if i == 0:
+            np.copyto(sum, condition)
+        else:
+            # as np.nan_to_num did, an overflowed sum counts as the largest float.
+            np.clip(sum, -limit, limit, out=sum)
+            np.add(sum, condition, out=sum)
 
-        # Convert all NoData values to NaN
-        condition_is_nodata = (
-            np.isnan(condition)
-            if np.isnan(no_data_value)
-            else (condition == no_data_value)
-        )
-        weighted_path = ~condition_is_nodata * weight
-        condition[condition_is_nodata] = np.nan
+        np.logical_not(mask, out=mask)
+        np.add(total_weight, weight, out=total_weight, where=mask)
 
-        if sum is None or total_weight is None:
-            sum = np.nan_to_num(condition, nan=0) * weight
-            total_weight = weighted_path
-        else:
-            # Set NoData values to 0, then add condition*weight to rolling sum.
-            raw = np.nan_to_num(sum, nan=0) + np.nan_to_num(condition, nan=0) * weight
-            # Masked array is True if both sum and condition arrays have NoData value.
-            raw = np.ma.masked_array(raw, np.isnan(sum) & condition_is_nodata)
-            # Set True value to Nan.
-            sum = np.ma.filled(raw, no_data_value)
-            total_weight = total_weight + weighted_path
-    if sum is None or total_weight is None:
-        return None
     with np.errstate(divide="ignore", invalid="ignore"):
-        return cast(ConditionMatrix, sum / total_weight)
+        return cast(ConditionMatrix, np.divide(sum, total_weight, out=total_weight))
 
 
 def average_condition(
@@ -96,6 +104,24 @@ def average_condition(
     )
 
 
+# Management condition types, computed from the current and future conditions.
+MANAGEMENT_TYPES = (
+    ConditionScoreType.ADAPT,
+    ConditionScoreType.MONITOR,
+    ConditionScoreType.PROTECT,
+    ConditionScoreType.TRANSFORM,
+    ConditionScoreType.IMPACT,
+)
+
+# The (current, future) corner from which each type measures the distance.
+_MANAGEMENT_CORNERS = {
+    ConditionScoreType.ADAPT: (-1, 1),
+    ConditionScoreType.MONITOR: (1, 1),
+    ConditionScoreType.PROTECT: (1, -1),
+    ConditionScoreType.TRANSFORM: (-1, -1),
+}
+
+
 def management_condition(
     current: ConditionMatrix, future: ConditionMatrix, type: ConditionScoreType
 ) -> ConditionMatrix:
@@ -114,28 +140,94 @@ def management_condition(
     Raises:
       ValueError if the conditions do not have the same shape.
     """
-
-    def scaled_distance(x: int, y: int) -> ConditionMatrix:
-        root2 = np.sqrt(2)
-        distance = np.sqrt((current - x) * (current - x) + (future - y) * (future - y))
-        return (root2 - distance) / root2
-
     match type:
         case ConditionScoreType.CURRENT:
             return current
         case ConditionScoreType.FUTURE:
             return future
-        case ConditionScoreType.ADAPT:
-            return scaled_distance(-1, 1)
-        case ConditionScoreType.MONITOR:
-            return scaled_distance(1, 1)
-        case ConditionScoreType.PROTECT:
-            return scaled_distance(1, -1)
-        case ConditionScoreType.TRANSFORM:
-            return scaled_distance(-1, -1)
-        case ConditionScoreType.IMPACT:
-            adapt = management_condition(current, future, ConditionScoreType.ADAPT)
-            protect = management_condition(current, future, ConditionScoreType.PROTECT)
-            max = np.maximum(adapt, protect)
-            factor = (2 - np.sqrt(2)) / np.sqrt(2)
-            return (2 * max + factor - 1) / (factor + 1)
+    return management_conditions(current, future, [type])[type]
+
+
+def management_conditions(
+    current: ConditionMatrix,
+    future: ConditionMatrix,
+    types: Iterable[ConditionScoreType] = MANAGEMENT_TYPES,
+) -> dict[ConditionScoreType, ConditionMatrix]:
+    """Computes several management conditions in one pass.
+
+    The squared differences of the current and future conditions to -1 and 1
+    are computed once and shared by the types; IMPACT reuses ADAPT and
+    PROTECT. The results are the same as those of management_condition.
+
+    Args:
+      current: The current Condition.
+      future: The future Condition.
+      types: The management types to compute, among MANAGEMENT_TYPES.
+
+    Returns:
+      The Condition of each type.
+
+    Raises:
+      ValueError if the conditions do not have the same shape, or a type is
+      not a management type.
+    """
+    types = list(types)
+    for type in types:
+        if type not in MANAGEMENT_TYPES:
+            raise ValueError(f"{type!r} is not a management condition type.")
+    if current.shape != future.shape:
+        raise ValueError(
+            f"Conditions have different shapes: {current.shape} and {future.shape}."
+        )
+
+    corners = [type for type in _MANAGEMENT_CORNERS if type in types]
+    if ConditionScoreType.IMPACT in types:
+        corners = list(
+            dict.fromkeys(
+                corners + [ConditionScoreType.ADAPT, ConditionScoreType.PROTECT]
+            )
+        )
+
+    # Each squared difference is kept until its last use.
+    uses = Counter(
+        key for type in corners for key in zip((0, 1), _MANAGEMENT_CORNERS[type])
+    )
+    squares: dict[tuple[int, int], ConditionMatrix] = {}
+
+    def square(key: tuple[int, int]) -> ConditionMatrix:
+        if key not in squares:
+            index, corner = key
+            difference = (future if index else current) - corner
+            squares[key] = np.multiply(difference, difference, out=difference)
+        uses[key] -= 1
+        return squares[key] if uses[key] else squares.pop(key)
+
+    root2 = np.sqrt(2)
+    results: dict[ConditionScoreType, ConditionMatrix] = {}
+    for type in corners:
+        x, y = _MANAGEMENT_CORNERS[type]
+        current_square, future_square = square((0, x)), square((1, y))
+        distance = np.add(
+            current_square,
+            future_square,
+            dtype=np.result_type(current_square, future_square, np.float16),
+        )
+        del current_square, future_square
+        np.sqrt(distance, out=distance)
+        np.subtract(root2, distance, out=distance)
+        results[type] = np.divide(distance, root2, out=distance)
+
+    if ConditionScoreType.IMPACT in types:
+        adapt = results[ConditionScoreType.ADAPT]
+        protect = results[ConditionScoreType.PROTECT]
+        # Reuses the buffer of ADAPT when it is not requested.
+        impact = np.maximum(
+            adapt, protect, out=None if ConditionScoreType.ADAPT in types else adapt
+        )
+        factor = (2 - np.sqrt(2)) / np.sqrt(2)
+        np.multiply(2, impact, out=impact)
+        np.add(impact, factor, out=impact)
+        np.subtract(impact, 1, out=impact)
+        results[ConditionScoreType.IMPACT] = np.divide(impact, factor + 1, out=impact)
+
+    return {type: results[type] for type in types}
@@ -0,0 +1,130 @@
+"""Benchmark of weighted_average_condition on synthetic rasters.
+
+Compares `base.conditions.weighted_average_condition` with the previous
+implementation, kept here as `reference_weighted_average_condition`, on
+float32 rasters of increasing size with NaN NoData pixels, and reports the
+best time and the peak memory (as traced by tracemalloc) of each.
+
+To run it:
+    python -m base.conditions_benchmark [--sizes 512 1024 2048] [--inputs 8]
+"""
+
+import argparse
+import time
+import tracemalloc
+from typing import Callable, Optional, cast
+
+import numpy as np
+
+from base.condition_types import ConditionMatrix
+from base.conditions import weighted_average_condition
+
+
+def reference_weighted_average_condition(
+    no_data_value: float, conditions_with_weights: list[tuple[ConditionMatrix, float]]
+) -> Optional[ConditionMatrix]:
+    """The implementation of weighted_average_condition before it used
+    preallocated buffers.
+    """
+    for condition, weight in conditions_with_weights:
+        if np.any(np.isnan(condition)) and not np.isnan(no_data_value):
+            raise KeyError(
+                "Raster has NaN values, but NaN is not defined as NoData value."
+            )
+
+    sum = None
+    total_weight = None
+    for condition, weight in conditions_with_weights:
+        condition = condition.astype("float32")
+        condition_is_nodata = (
+            np.isnan(condition)
+            if np.isnan(no_data_value)
+            else (condition == no_data_value)
+        )
+        weighted_path = ~condition_is_nodata * weight
+        condition[condition_is_nodata] = np.nan
+
+        if sum is None or total_weight is None:
+            sum = np.nan_to_num(condition, nan=0) * weight
+            total_weight = weighted_path
+        else:
+            raw = np.nan_to_num(sum, nan=0) + np.nan_to_num(condition, nan=0) * weight
+            raw = np.ma.masked_array(raw, np.isnan(sum) & condition_is_nodata)
+            sum = np.ma.filled(raw, no_data_value)
+            total_weight = total_weight + weighted_path
+    if sum is None or total_weight is None:
+        return None
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return cast(ConditionMatrix, sum / total_weight)
+
+
+IMPLEMENTATIONS: dict[str, Callable] = {
+    "reference": reference_weighted_average_condition,
+    "fused": weighted_average_condition,
+}
+
+
+def make_conditions(
+    size: int, inputs: int, nodata_fraction: float = 0.1, seed: int = 0
+) -> list[tuple[ConditionMatrix, float]]:
+    """Returns `inputs` square float32 rasters in [-1, 1] with NaN NoData
+    pixels, and their weights.
+    """
+    rng = np.random.default_rng(seed)
+    conditions = []
+    for i in range(inputs):
+        condition = rng.uniform(-1, 1, (size, size)).astype("float32")
+        condition[rng.random((size, size)) < nodata_fraction] = np.nan
+        conditions.append((condition, float(i + 1)))
+    return conditions
+
+
+def measure(function: Callable, conditions, repeats: int) -> tuple[float, int]:
+    """Returns the best time of `repeats` runs, and the peak memory of one."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function(np.nan, conditions)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    function(np.nan, conditions)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def run(sizes: list[int], inputs: int, repeats: int) -> list[dict]:
+    results = []
+    for size in sizes:
+        conditions = make_conditions(size, inputs)
+        for name, function in IMPLEMENTATIONS.items():
+            seconds, peak = measure(function, conditions, repeats)
+            results.append(
+                {
+                    "size": size,
+                    "inputs": inputs,
+                    "implementation": name,
+                    "seconds": seconds,
+                    "peak_bytes": peak,
+                }
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[512, 1024, 2048])
+    parser.add_argument("--inputs", type=int, default=8)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'size':>6} {'implementation':>14} {'seconds':>9} {'peak MiB':>9}")
+    for result in run(args.sizes, args.inputs, args.repeats):
+        print(
+            f"{result['size']:>6} {result['implementation']:>14} "
+            f"{result['seconds']:>9.4f} {result['peak_bytes'] / 2**20:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -6,10 +6,17 @@ import numpy as np
 from base.condition_types import ConditionScoreType
 from base.conditions import (
     average_condition,
+    MANAGEMENT_TYPES,
     management_condition,
+    management_conditions,
     weighted_average_condition,
     convert_nodata_to_nan,
 )
+from base.conditions_benchmark import (
+    make_conditions,
+    reference_weighted_average_condition,
+    run,
+)
 
 
 class AverageTest(unittest.TestCase):
@@ -131,6 +138,34 @@ class WeightedAverageTest(unittest.TestCase):
             self.assertTrue(np.all(np.nan_to_num(average) == np.nan_to_num(expected)))
 
 
+class WeightedAverageReferenceTest(unittest.TestCase):
+    def assertSameBits(self, expected, actual):
+        self.assertEqual(expected.dtype, actual.dtype)
+        np.testing.assert_array_equal(expected.view("uint64"), actual.view("uint64"))
+
+    def test_matches_reference_with_nan_nodata(self):
+        conditions = make_conditions(64, 5, nodata_fraction=0.3)
+        conditions[2][0][0, :3] = [np.inf, -np.inf, -0.0]
+        self.assertSameBits(
+            reference_weighted_average_condition(np.nan, conditions),
+            weighted_average_condition(np.nan, conditions),
+        )
+
+    def test_matches_reference_with_other_nodata(self):
+        rng = np.random.default_rng(1)
+        conditions = [
+            (rng.integers(-3, 4, (16, 16)), weight) for weight in [0.5, 2, 0.25]
+        ]
+        self.assertSameBits(
+            reference_weighted_average_condition(-3, conditions),
+            weighted_average_condition(-3, conditions),
+        )
+
+    def test_benchmark_runs(self):
+        results = run([8], inputs=2, repeats=1)
+        self.assertEqual([r["implementation"] for r in results], ["reference", "fused"])
+
+
 class ManagementConditionTest(unittest.TestCase):
     def test_current_condition(self):
         current = np.array([[1, 2, 3], [4, 5, 6]])
@@ -201,6 +236,61 @@ class ManagementConditionTest(unittest.TestCase):
         self.assertTrue(np.all(np.isclose(expected, combined)))
 
 
+class ManagementConditionsTest(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.current = rng.uniform(-1, 1, (16, 16)).astype("float32")
+        self.future = rng.uniform(-1, 1, (16, 16)).astype("float32")
+        self.current[rng.random((16, 16)) < 0.1] = np.nan
+
+    def scaled_distance(self, x, y):
+        current, future = self.current, self.future
+        root2 = np.sqrt(2)
+        distance = np.sqrt((current - x) * (current - x) + (future - y) * (future - y))
+        return (root2 - distance) / root2
+
+    def test_matches_scaled_distances(self):
+        adapt = self.scaled_distance(-1, 1)
+        protect = self.scaled_distance(1, -1)
+        factor = (2 - np.sqrt(2)) / np.sqrt(2)
+        expected = {
+            ConditionScoreType.ADAPT: adapt,
+            ConditionScoreType.MONITOR: self.scaled_distance(1, 1),
+            ConditionScoreType.PROTECT: protect,
+            ConditionScoreType.TRANSFORM: self.scaled_distance(-1, -1),
+            ConditionScoreType.IMPACT: (2 * np.maximum(adapt, protect) + factor - 1)
+            / (factor + 1),
+        }
+
+        conditions = management_conditions(self.current, self.future)
+
+        self.assertEqual(list(conditions), list(MANAGEMENT_TYPES))
+        for type, condition in conditions.items():
+            self.assertEqual(condition.dtype, expected[type].dtype)
+            np.testing.assert_array_equal(condition, expected[type])
+
+    def test_impact_alone_matches_management_condition(self):
+        conditions = management_conditions(
+            self.current, self.future, [ConditionScoreType.IMPACT]
+        )
+
+        self.assertEqual(list(conditions), [ConditionScoreType.IMPACT])
+        np.testing.assert_array_equal(
+            conditions[ConditionScoreType.IMPACT],
+            management_condition(self.current, self.future, ConditionScoreType.IMPACT),
+        )
+
+    def test_different_shapes_raise(self):
+        with self.assertRaises(ValueError):
+            management_conditions(self.current, self.future[:8])
+
+    def test_non_management_type_raises(self):
+        with self.assertRaises(ValueError):
+            management_conditions(
+                self.current, self.future, [ConditionScoreType.CURRENT]
+            )
+
+
 class ConvertTest(unittest.TestCase):
     def test_no_conversion(self):
         condition = np.array([[1, 2, 3], [4, 5, 6]])
@@ -7,6 +7,7 @@ from base.conditions import *
 from config.conditions_config import PillarConfig
 from django.conf import settings
 from eval.compute_conditions import *
+from eval.condition_graph import compile_region, evaluate_region
 
 from .models import BaseCondition, Condition
 
@@ -182,22 +183,6 @@ def _load_condition(
     print("Saved Raster: " + filepath)
 
 
-def _save_condition(raster: ConditionMatrix, filepath: str, profile: dict):
-    with rasterio.open(
-        filepath,
-        "w",
-        driver=profile["driver"],
-        height=profile["height"],
-        width=profile["width"],
-        count=profile["count"],
-        dtype=profile["dtype"],
-        crs=profile["crs"],
-        transform=profile["transform"],
-        nodata=np.nan,
-    ) as dst:
-        dst.write(raster, 1)
-
-
 def compute_elements(region_name: str, save: bool, reload: bool):
     """Computes element rasters based on the conditions config and saves them locally. Optionally loads them to our database.
 
@@ -225,18 +210,14 @@ def compute_elements(region_name: str, save: bool, reload: bool):
 
             # TODO: Compute FUTURE metrics when available
             reader = ConditionReader()
-            computed_element = score_element(
-                reader, element, ConditionScoreType.CURRENT, recompute=True
-            )
+            plan = plan_element(element, recompute=True)
             filepath = os.path.join(
                 os.path.dirname(os.path.join(settings.BASE_DIR, "../..")), raster_path
             )
 
-            # Save locally
-            if save and computed_element is not None:
-                _save_condition(
-                    computed_element.raster, filepath, computed_element.profile
-                )
+            # Save locally, block by block
+            if save and plan is not None:
+                write_condition(reader, plan, ConditionScoreType.CURRENT, filepath)
 
             # Load to database
             if not reload:
@@ -274,16 +255,14 @@ def compute_pillars(region_name: str, save: bool, reload: bool):
 
         # TODO: Compute FUTURE condition when available
         reader = ConditionReader()
-        computed_pillar = score_pillar(
-            reader, pillar, ConditionScoreType.CURRENT, recompute=True
-        )
+        plan = plan_pillar(pillar, recompute=True)
         filepath = os.path.join(
             os.path.dirname(os.path.join(settings.BASE_DIR, "../..")), raster_path
         )
 
-        # Save locally
-        if save and computed_pillar is not None:
-            _save_condition(computed_pillar.raster, filepath, computed_pillar.profile)
+        # Save locally, block by block
+        if save and plan is not None:
+            write_condition(reader, plan, ConditionScoreType.CURRENT, filepath)
 
         # Load to database
         if not reload:
@@ -296,3 +275,47 @@ def compute_pillars(region_name: str, save: bool, reload: bool):
             region["region_name"],
             filepath,
         )
+
+
+def compute_region(region_name: str, save: bool, reload: bool, max_workers: int = 1):
+    """Computes the element and pillar rasters of a region in a single pass
+    over the metric rasters, and saves them locally where compute_elements
+    and compute_pillars do. Optionally loads them to our database.
+
+    Args:
+      region: The region to compute
+      reload: True if the rasters should be reloaded
+      max_workers: Processes computing independent pillars in parallel
+    """
+    config_path = os.path.join(settings.BASE_DIR, "config/conditions.json")
+    config = PillarConfig(config_path)
+
+    reader = ConditionReader()
+    output_directory = os.path.dirname(os.path.join(settings.BASE_DIR, "../.."))
+    # TODO: Compute FUTURE conditions when available
+    if save:
+        nodes = evaluate_region(
+            reader,
+            config,
+            region_name,
+            ConditionScoreType.CURRENT,
+            max_workers,
+            output_directory=output_directory,
+        )
+    else:
+        nodes = compile_region(config, region_name)
+
+    if not reload:
+        return
+    for node in nodes:
+        filepath = ConditionReader(output_directory).get_path(
+            node.filepath, ConditionScoreType.CURRENT
+        )
+        _load_condition(
+            node.name,
+            node.level,
+            ConditionScoreType.CURRENT,
+            os.path.basename(filepath),
+            region_name,
+            filepath,
+        )
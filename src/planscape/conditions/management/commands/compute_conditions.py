@@ -0,0 +1,49 @@
+import time
+
+from base.region_name import RegionName
+from conditions.load import compute_region
+from django.core.management.base import BaseCommand, CommandParser
+
+
+class Command(BaseCommand):
+    help = (
+        "Computes the element and pillar rasters of a region in a single pass "
+        "over its metric rasters, and optionally loads them to the database."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--region",
+            type=str,
+            required=True,
+            choices=[region.value for region in RegionName],
+        )
+
+        parser.add_argument(
+            "--no-save",
+            action="store_true",
+            help="Do not compute the rasters, e.g. to only load them again.",
+        )
+
+        parser.add_argument(
+            "--reload",
+            action="store_true",
+            help="Load the rasters to the database.",
+        )
+
+        parser.add_argument(
+            "--max-workers",
+            type=int,
+            default=1,
+            help="Processes computing independent pillars in parallel.",
+        )
+
+    def handle(self, *args, **options):
+        start = time.time()
+        compute_region(
+            options["region"],
+            save=not options["no_save"],
+            reload=options["reload"],
+            max_workers=options["max_workers"],
+        )
+        self.stdout.write(f"[OK] TOTAL RUNTIME {time.time() - start}")
@@ -0,0 +1,42 @@
+import time
+
+from conditions.registry import (
+    get_default_partition_condition_ids,
+    partition_condition_tiles,
+)
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves the condition raster tiles loaded before conditions_conditionraster "
+        "was partitioned (migration conditions 0010) from its default partition "
+        "to the partition of their condition, a condition per transaction. "
+        "`make deploy-backend` runs it after migrating; it can be interrupted "
+        "and run again, and does nothing once every tile was moved."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--condition-ids",
+            nargs="+",
+            type=int,
+            help="Only move the tiles of these conditions.",
+        )
+
+    def handle(self, *args, **options):
+        start = time.time()
+        condition_ids = get_default_partition_condition_ids()
+        if options.get("condition_ids"):
+            condition_ids = [
+                id for id in condition_ids if id in options["condition_ids"]
+            ]
+
+        for condition_id in condition_ids:
+            start_condition = time.time()
+            moved = partition_condition_tiles(condition_id)
+            self.stdout.write(
+                f"[OK] Condition {condition_id}: moved {moved} tiles in "
+                f"{time.time() - start_condition:.1f}s."
+            )
+        self.stdout.write(f"[OK] TOTAL RUNTIME {time.time() - start}")
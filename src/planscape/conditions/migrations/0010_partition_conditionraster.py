@@ -0,0 +1,41 @@
+# Generated by Django 4.1.13 on 2026-10-18 17:10
+
+from django.db import migrations, models
+from utils.file_utils import read_file
+
+# The tiles are moved to the partitions afterwards, by
+# `manage.py partition_condition_rasters` (see `make deploy-backend`), not in
+# this migration.
+UP_MIGRATION_PARTITION_CONDITIONRASTER = read_file(
+    "conditions/sql/partition_conditionraster.sql"
+)
+
+DOWN_MIGRATION_UNPARTITION_CONDITIONRASTER = read_file(
+    "conditions/sql/unpartition_conditionraster.sql"
+)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("conditions", "0009_auto_20231222_0900"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name="conditionraster",
+                    constraint=models.UniqueConstraint(
+                        fields=("rid", "condition"),
+                        name="conditions_conditionraster_rid_condition_key",
+                    ),
+                ),
+            ],
+            database_operations=[
+                migrations.RunSQL(
+                    UP_MIGRATION_PARTITION_CONDITIONRASTER,
+                    DOWN_MIGRATION_UNPARTITION_CONDITIONRASTER,
+                ),
+            ],
+        ),
+    ]
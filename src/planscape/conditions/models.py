@@ -64,7 +64,9 @@ class ConditionRaster(models.Model):
     any changes should be carefully considered.
     """
 
-    # Primary key; predetermined by raster2pgsql
+    # Primary key; predetermined by raster2pgsql. The table is partitioned by
+    # condition, so the database only enforces the uniqueness of (rid,
+    # condition); rids still come from a single sequence.
     rid: models.AutoField = models.AutoField(primary_key=True)
 
     # The name of the raster, which must match the raster_name in the Condition.
@@ -80,3 +82,11 @@ class ConditionRaster(models.Model):
         on_delete=models.CASCADE,
         related_name="raster_tiles",
     )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["rid", "condition"],
+                name="conditions_conditionraster_rid_condition_key",
+            ),
+        ]
@@ -2,7 +2,8 @@ import os
 from pathlib import Path
 import subprocess
 from django.conf import settings
-from conditions.models import Condition, ConditionRaster
+from django.db import connection, transaction
+from conditions.models import Condition
 from base.condition_types import ConditionScoreType
 from utils.cli_utils import psql, psql_pipe, raster2pgpsql
 
@@ -32,6 +33,73 @@ def get_tile_name(condition):
     )
 
 
+# Table the tiles of a condition are loaded into, before it replaces the
+# partition of the condition in conditions_conditionraster.
+CREATE_LOAD_TABLE = """
+DROP TABLE IF EXISTS {table};
+CREATE TABLE {table} (LIKE conditions_conditionraster INCLUDING DEFAULTS);
+ALTER TABLE {table} ALTER COLUMN name SET DEFAULT %s;
+ALTER TABLE {table} ALTER COLUMN condition_id SET DEFAULT %s;
+"""
+
+
+def get_load_table(condition):
+    return f"conditions_conditionraster_load_{int(condition.pk)}"
+
+
+def attach_condition_tiles(condition, load_table, clear=True):
+    """Moves the tiles loaded in `load_table` to the partition of the
+    condition, in a single transaction. With `clear`, they replace the
+    partition, otherwise they are added to it.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        if clear:
+            cursor.execute(
+                "SELECT replace_condition_raster_partition(%s, %s)",
+                [condition.pk, load_table],
+            )
+        else:
+            cursor.execute("SELECT condition_raster_partition(%s)", [condition.pk])
+            cursor.execute(
+                f"INSERT INTO conditions_conditionraster SELECT * FROM {load_table}"
+            )
+            cursor.execute(f"DROP TABLE {load_table}")
+
+
+def get_default_partition_condition_ids() -> list[int]:
+    """Returns the conditions with tiles left in the default partition of
+    conditions_conditionraster, loaded before it was partitioned.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT DISTINCT condition_id
+            FROM conditions_conditionraster_default
+            WHERE condition_id IS NOT NULL
+            ORDER BY 1
+            """
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def partition_condition_tiles(condition_id) -> int:
+    """Moves the tiles of a condition from the default partition to its own
+    partition, in one transaction.
+
+    Returns:
+      the number of tiles moved.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT count(*) FROM conditions_conditionraster_default "
+            "WHERE condition_id = %s",
+            [condition_id],
+        )
+        (moved,) = cursor.fetchone()
+        cursor.execute("SELECT condition_raster_partition(%s)", [condition_id])
+    return moved
+
+
 def get_registry_env():
     environment = os.environ.copy()
     environment = {
@@ -57,13 +125,16 @@ def register_condition_raster(
             False,
             f"raster for condition {condition.pk} does not exist on disk",
         )
+    load_table = get_load_table(condition)
     try:
-        if clear:
-            condition.raster_tiles.all().delete()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                CREATE_LOAD_TABLE.format(table=load_table), [tile_name, condition.pk]
+            )
 
         environment = get_registry_env()
         raster_command = raster2pgpsql(
-            raster_path, "public.conditions_conditionraster", tile_size, srid
+            raster_path, f"public.{load_table}", tile_size, srid, name_column=None
         )
         raster_process = subprocess.Popen(
             raster_command,
@@ -84,12 +155,12 @@ def register_condition_raster(
         )
         raster_process.wait()
         if raster_process.returncode == 0:
-            ConditionRaster.objects.filter(condition_id__isnull=True).update(
-                name=tile_name, condition_id=condition.pk
-            )
-
+            attach_condition_tiles(condition, load_table, clear=clear)
             return (True, "success")
 
         return (False, "failed, unknown cause.")
     except Exception as ex:
         return (False, f"failed {str(ex)}")
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {load_table}")
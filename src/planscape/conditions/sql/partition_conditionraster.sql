@@ -0,0 +1,122 @@
+-- conditions_conditionraster is partitioned by condition, so the tiles of a
+-- condition are replaced by swapping its partition instead of deleting
+-- them. Tiles of conditions without partition are in
+-- conditions_conditionraster_default.
+--
+-- The existing table becomes that DEFAULT partition as is, so no tile is
+-- copied here and every tile stays readable. `manage.py
+-- partition_condition_rasters` (run by `make deploy-backend` after
+-- migrating) then moves the tiles of each condition to its partition, a
+-- condition per transaction.
+ALTER TABLE conditions_conditionraster RENAME TO conditions_conditionraster_default;
+ALTER INDEX IF EXISTS conditions_conditionraster_pkey
+    RENAME TO conditions_conditionraster_default_pkey;
+ALTER INDEX IF EXISTS conditions_conditionraster_raster_id
+    RENAME TO conditions_conditionraster_default_raster_id;
+ALTER INDEX IF EXISTS conditions_conditionraster_raster_convexhull_idx
+    RENAME TO conditions_conditionraster_default_convexhull_idx;
+-- the ids of new tiles come from the sequence of the partitioned table.
+ALTER TABLE conditions_conditionraster_default ALTER COLUMN rid DROP IDENTITY IF EXISTS;
+ALTER TABLE conditions_conditionraster_default ALTER COLUMN rid DROP DEFAULT;
+DROP SEQUENCE IF EXISTS conditions_conditionraster_rid_seq;
+
+-- a unique constraint of a partitioned table must include the partition
+-- key, so rid alone is no longer the primary key.
+CREATE TABLE conditions_conditionraster (
+    LIKE conditions_conditionraster_default,
+    CONSTRAINT conditions_conditionraster_condition_id_fk
+        FOREIGN KEY (condition_id) REFERENCES conditions_condition (id)
+        DEFERRABLE INITIALLY DEFERRED,
+    CONSTRAINT conditions_conditionraster_rid_condition_key
+        UNIQUE (rid, condition_id)
+) PARTITION BY LIST (condition_id);
+
+-- the matching indexes of the default partition are reused when attaching it.
+CREATE INDEX conditions_conditionraster_raster_convexhull_idx
+    ON conditions_conditionraster USING gist(ST_ConvexHull(raster));
+
+ALTER TABLE conditions_conditionraster
+    ATTACH PARTITION conditions_conditionraster_default DEFAULT;
+
+-- identity columns are not supported by partitioned tables
+CREATE SEQUENCE conditions_conditionraster_rid_seq
+    AS INTEGER OWNED BY conditions_conditionraster.rid;
+SELECT setval(
+    'conditions_conditionraster_rid_seq',
+    COALESCE((SELECT max(rid) FROM conditions_conditionraster), 0) + 1,
+    FALSE
+);
+ALTER TABLE conditions_conditionraster
+    ALTER COLUMN rid SET DEFAULT nextval('conditions_conditionraster_rid_seq');
+
+-- Creates the partition of a condition if it does not exist, moving its
+-- tiles from the default partition, and returns its name.
+CREATE OR REPLACE FUNCTION condition_raster_partition(_condition_id BIGINT)
+RETURNS TEXT AS $$
+DECLARE
+    partition TEXT := format('conditions_conditionraster_%s', _condition_id);
+BEGIN
+    IF to_regclass(partition) IS NULL THEN
+        PERFORM pg_advisory_xact_lock(hashtext(partition));
+    END IF;
+    IF to_regclass(partition) IS NULL THEN
+        -- tables with pending deferred foreign key checks can not be altered.
+        SET CONSTRAINTS ALL IMMEDIATE;
+        -- a partition can not be created while the default partition holds
+        -- some of its rows, so they are set aside meanwhile.
+        CREATE TEMPORARY TABLE condition_raster_partition_moved
+            (LIKE conditions_conditionraster);
+        WITH moved AS (
+            DELETE FROM conditions_conditionraster_default
+            WHERE condition_id = _condition_id
+            RETURNING *
+        )
+        INSERT INTO condition_raster_partition_moved SELECT * FROM moved;
+
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF conditions_conditionraster FOR VALUES IN (%s)',
+            partition,
+            _condition_id
+        );
+
+        INSERT INTO conditions_conditionraster
+        SELECT * FROM condition_raster_partition_moved;
+        DROP TABLE condition_raster_partition_moved;
+    END IF;
+    RETURN partition;
+END
+$$ LANGUAGE plpgsql;
+
+-- Replaces the partition of a condition by _table, a table created LIKE
+-- conditions_conditionraster and holding its new tiles.
+CREATE OR REPLACE FUNCTION replace_condition_raster_partition(
+    _condition_id BIGINT,
+    _table TEXT
+) RETURNS VOID AS $$
+DECLARE
+    partition TEXT := condition_raster_partition(_condition_id);
+    check_name TEXT := _table || '_check';
+BEGIN
+    SET CONSTRAINTS ALL IMMEDIATE;
+    -- proves the partition constraint, so ATTACH does not scan the table.
+    EXECUTE format(
+        'ALTER TABLE %I ADD CONSTRAINT %I CHECK ('
+        'condition_id IS NOT NULL AND condition_id = %s)',
+        _table,
+        check_name,
+        _condition_id
+    );
+    EXECUTE format(
+        'ALTER TABLE conditions_conditionraster DETACH PARTITION %I',
+        partition
+    );
+    EXECUTE format('DROP TABLE %I', partition);
+    EXECUTE format('ALTER TABLE %I RENAME TO %I', _table, partition);
+    EXECUTE format(
+        'ALTER TABLE conditions_conditionraster ATTACH PARTITION %I FOR VALUES IN (%s)',
+        partition,
+        _condition_id
+    );
+    EXECUTE format('ALTER TABLE %I DROP CONSTRAINT %I', partition, check_name);
+END
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,45 @@
+-- Reverts partition_conditionraster.sql: the default partition becomes
+-- conditions_conditionraster again, with the tiles of every other partition.
+ALTER TABLE conditions_conditionraster
+    DETACH PARTITION conditions_conditionraster_default;
+ALTER TABLE conditions_conditionraster_default ALTER COLUMN rid DROP DEFAULT;
+ALTER TABLE conditions_conditionraster_default
+    DROP CONSTRAINT IF EXISTS conditions_conditionraster_default_rid_condition_id_key;
+
+DO $$
+DECLARE
+    partition TEXT;
+BEGIN
+    FOR partition IN
+        SELECT inhrelid::regclass::text
+        FROM pg_inherits
+        WHERE inhparent = 'conditions_conditionraster'::regclass
+    LOOP
+        EXECUTE format(
+            'INSERT INTO conditions_conditionraster_default SELECT * FROM %s',
+            partition
+        );
+    END LOOP;
+END $$;
+
+DROP TABLE conditions_conditionraster;
+DROP FUNCTION IF EXISTS replace_condition_raster_partition(BIGINT, TEXT);
+DROP FUNCTION IF EXISTS condition_raster_partition(BIGINT);
+
+ALTER TABLE conditions_conditionraster_default RENAME TO conditions_conditionraster;
+ALTER INDEX IF EXISTS conditions_conditionraster_default_pkey
+    RENAME TO conditions_conditionraster_pkey;
+ALTER INDEX IF EXISTS conditions_conditionraster_default_raster_id
+    RENAME TO conditions_conditionraster_raster_id;
+ALTER INDEX IF EXISTS conditions_conditionraster_default_convexhull_idx
+    RENAME TO conditions_conditionraster_raster_convexhull_idx;
+
+CREATE SEQUENCE conditions_conditionraster_rid_seq
+    AS INTEGER OWNED BY conditions_conditionraster.rid;
+SELECT setval(
+    'conditions_conditionraster_rid_seq',
+    COALESCE((SELECT max(rid) FROM conditions_conditionraster), 0) + 1,
+    FALSE
+);
+ALTER TABLE conditions_conditionraster
+    ALTER COLUMN rid SET DEFAULT nextval('conditions_conditionraster_rid_seq');
@@ -1,8 +1,17 @@
 from django.test import TestCase
 from pathlib import Path
 from django.conf import settings
-from conditions.registry import get_raster_path, get_tile_name
-from conditions.models import BaseCondition, Condition
+from django.db import connection
+from conditions.registry import (
+    CREATE_LOAD_TABLE,
+    attach_condition_tiles,
+    get_default_partition_condition_ids,
+    get_load_table,
+    get_raster_path,
+    get_tile_name,
+    partition_condition_tiles,
+)
+from conditions.models import BaseCondition, Condition, ConditionRaster
 
 
 class TestRegistry(TestCase):
@@ -34,3 +43,61 @@ class TestRegistry(TestCase):
         actual = get_tile_name(condition)
         expected = "foo:bar_current_raw"
         self.assertEquals(actual, expected)
+
+
+class TestAttachConditionTiles(TestCase):
+    def setUp(self):
+        base = BaseCondition.objects.create(
+            condition_name="bar", condition_level=3, region_name="foo"
+        )
+        self.condition = Condition.objects.create(
+            condition_dataset=base, raster_name="bar.tif"
+        )
+        ConditionRaster.objects.create(name="old", condition=self.condition)
+
+    def load_tiles(self, count):
+        load_table = get_load_table(self.condition)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                CREATE_LOAD_TABLE.format(table=load_table),
+                ["foo:bar_current_raw", self.condition.pk],
+            )
+            for _ in range(count):
+                cursor.execute(f"INSERT INTO {load_table} DEFAULT VALUES")
+        return load_table
+
+    def get_partitions(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT DISTINCT tableoid::regclass::text FROM conditions_conditionraster"
+            )
+            return {row[0] for row in cursor.fetchall()}
+
+    def test_tiles_replace_the_partition_of_the_condition(self):
+        attach_condition_tiles(self.condition, self.load_tiles(3), clear=True)
+
+        names = list(self.condition.raster_tiles.values_list("name", flat=True))
+        self.assertEqual(names, ["foo:bar_current_raw"] * 3)
+        self.assertEqual(
+            self.get_partitions(), {f"conditions_conditionraster_{self.condition.pk}"}
+        )
+
+    def test_tiles_are_added_without_clear(self):
+        attach_condition_tiles(self.condition, self.load_tiles(2), clear=False)
+
+        self.assertEqual(self.condition.raster_tiles.count(), 3)
+        self.assertEqual(
+            self.get_partitions(), {f"conditions_conditionraster_{self.condition.pk}"}
+        )
+
+    def test_tiles_of_the_default_partition_are_moved(self):
+        self.assertEqual(get_default_partition_condition_ids(), [self.condition.pk])
+
+        moved = partition_condition_tiles(self.condition.pk)
+
+        self.assertEqual(moved, 1)
+        self.assertEqual(get_default_partition_condition_ids(), [])
+        self.assertEqual(self.condition.raster_tiles.count(), 1)
+        self.assertEqual(
+            self.get_partitions(), {f"conditions_conditionraster_{self.condition.pk}"}
+        )
@@ -18,20 +18,42 @@ or on paths, with a PillarConfig as input, like
   average_weighted_score
 
 where a path is a file-like path of region/pillar/element/metric or sub-paths thereof.
+
+The score_* functions hold every input raster in memory. For large regions,
+an element or pillar can instead be planned with
+
+  plan_element
+  plan_pillar
+
+and written with write_condition, which evaluates the plan over blocks of
+rows of the (aligned) input rasters, so that memory is bounded by the block
+size times the number of inputs.
+
+The management conditions (ADAPT, MONITOR, PROTECT, TRANSFORM, IMPACT) of
+a condition are written together, block by block, by
+write_management_conditions.
+
+CachedConditionReader keeps the rasters it reads within a byte budget, so
+that scoring several paths sharing conditions reads each raster once.
 """
 
 import functools
 import numpy as np
 import os
 import rasterio
-from typing import Optional, cast
+from collections import OrderedDict
+from contextlib import ExitStack
+from rasterio.windows import Window
+from typing import Optional, Union, cast
 from decouple import config
 
 from django.conf import settings
 from base.conditions import (
+    MANAGEMENT_TYPES,
     average_condition,
     weighted_average_condition,
     convert_nodata_to_nan,
+    management_conditions,
 )
 from base.condition_types import (
     ConditionMatrix,
@@ -56,16 +78,14 @@ class ConditionReader:
     ):
         self._root_directory = root_directory
 
-    def read(
+    def get_path(
         self, filepath: str, condition_type: ConditionScoreType, is_raw: bool = False
-    ) -> Optional[RasterData]:
-        """Reads a condition raster and its profile from the filepath.
+    ) -> str:
+        """Returns the path of a condition raster.
 
         Args:
           filepath: Directory relative to .. containing scores
           condition_type: Which condition to read (CURRENT, FUTURE, IMPACT)
-        Returns:
-          The condition and profile if found, else None.
         """
         match condition_type:
             case ConditionScoreType.CURRENT:
@@ -83,12 +103,104 @@ class ConditionReader:
                 file = "protect.tif"
             case ConditionScoreType.TRANSFORM:
                 file = "transform.tif"
-        with rasterio.open(os.path.join(self._root_directory, filepath) + file) as src:
+        return os.path.join(self._root_directory, filepath) + file
+
+    def open(
+        self, filepath: str, condition_type: ConditionScoreType, is_raw: bool = False
+    ):
+        """Opens a condition raster, to read it by windows."""
+        return rasterio.open(self.get_path(filepath, condition_type, is_raw))
+
+    def read(
+        self, filepath: str, condition_type: ConditionScoreType, is_raw: bool = False
+    ) -> Optional[RasterData]:
+        """Reads a condition raster and its profile from the filepath.
+
+        Args:
+          filepath: Directory relative to .. containing scores
+          condition_type: Which condition to read (CURRENT, FUTURE, IMPACT)
+        Returns:
+          The condition and profile if found, else None.
+        """
+        with self.open(filepath, condition_type, is_raw) as src:
             return RasterData(
                 src.read(1, out_shape=(1, int(src.height), int(src.width))), src.profile
             )
 
 
+# Default byte budget of a CachedConditionReader.
+CONDITION_CACHE_BYTES = config("CONDITION_CACHE_BYTES", default=2**30, cast=int)
+
+
+class CachedConditionReader(ConditionReader):
+    """ConditionReader keeping the rasters it reads in memory.
+
+    Rasters are cached by filepath, condition type, raw flag and modification
+    time of the file, so a rewritten file is read again. The least recently
+    used rasters are evicted once the cached rasters exceed max_bytes, and a
+    raster larger than max_bytes is not cached.
+
+    The rasters returned are read-only, as they are shared between callers;
+    the profiles are copies.
+    """
+
+    def __init__(
+        self,
+        root_directory: str = os.path.dirname(
+            os.path.join(settings.BASE_DIR, "../../")
+        ),
+        max_bytes: int = CONDITION_CACHE_BYTES,
+    ):
+        super().__init__(root_directory)
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._cache: OrderedDict[tuple, RasterData] = OrderedDict()
+
+    def read(
+        self, filepath: str, condition_type: ConditionScoreType, is_raw: bool = False
+    ) -> Optional[RasterData]:
+        try:
+            mtime = os.stat(self.get_path(filepath, condition_type, is_raw)).st_mtime_ns
+        except OSError:
+            # Let rasterio report the missing file.
+            return super().read(filepath, condition_type, is_raw)
+        key = (filepath, condition_type, is_raw, mtime)
+        condition = self._cache.get(key)
+        if condition is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+        else:
+            self.misses += 1
+            condition = super().read(filepath, condition_type, is_raw)
+            if condition is None:
+                return None
+            condition.raster.setflags(write=False)
+            self._insert(key, condition)
+        return RasterData(condition.raster, condition.profile.copy())
+
+    def _insert(self, key: tuple, condition: RasterData):
+        size = condition.raster.nbytes
+        if size > self.max_bytes:
+            return
+        # Drops the rasters read before the file was rewritten.
+        for stale in [k for k in self._cache if k[:3] == key[:3]]:
+            self.current_bytes -= self._cache.pop(stale).raster.nbytes
+        while self._cache and self.current_bytes + size > self.max_bytes:
+            _, evicted = self._cache.popitem(last=False)
+            self.current_bytes -= evicted.raster.nbytes
+            self.evictions += 1
+        self._cache[key] = condition
+        self.current_bytes += size
+
+    def clear(self):
+        """Empties the cache, keeping the counters."""
+        self._cache.clear()
+        self.current_bytes = 0
+
+
 def _summarize(
     no_data_value: float, input: list[Optional[RasterData]], operation: str
 ) -> Optional[RasterData]:
@@ -270,6 +382,189 @@ def score_region(
     return None  # TODO(riecke) Finish this with the "evaluation statistic"
 
 
+# A condition to compute: the filepath of a condition raster, or an
+# operation ("MEAN" or "MIN") over other conditions.
+ConditionPlan = Union[str, tuple[str, list["ConditionPlan"]]]
+
+# Rows of the input rasters read at once by write_condition.
+DEFAULT_BLOCK_ROWS = 128
+
+
+def plan_summary(
+    inputs: list[Optional[ConditionPlan]], operation: Optional[str]
+) -> Optional[ConditionPlan]:
+    """Plans _summarize over the inputs: None if any input is missing."""
+    if not inputs or any(plan is None for plan in inputs):
+        return None
+    return (operation if operation else "MEAN", cast(list[ConditionPlan], inputs))
+
+
+def plan_element(element: Element, recompute: bool = False) -> Optional[ConditionPlan]:
+    """Plans the element score, as score_element computes it."""
+    if not recompute:
+        return element.get("filepath") or None
+    return plan_summary(
+        [
+            metric.get("filepath") or None
+            for metric in element["metrics"]
+            if not metric.get("ignore", False)
+        ],
+        element.get("operation", "MEAN"),
+    )
+
+
+def plan_pillar(pillar: Pillar, recompute: bool = False) -> Optional[ConditionPlan]:
+    """Plans the pillar score, as score_pillar computes it."""
+    if not recompute:
+        return pillar.get("filepath") or None
+    return plan_summary(
+        [
+            plan_element(element, True) or plan_element(element, False)
+            for element in pillar["elements"]
+        ],
+        pillar.get("operation", "MEAN"),
+    )
+
+
+def plan_filepaths(plan: ConditionPlan) -> list[str]:
+    if isinstance(plan, str):
+        return [plan]
+    _, inputs = plan
+    return list(
+        dict.fromkeys(path for input in inputs for path in plan_filepaths(input))
+    )
+
+
+def evaluate_block(
+    plan: ConditionPlan,
+    sources: dict,
+    window: Window,
+    blocks: Optional[dict] = None,
+):
+    """Evaluates a plan over a window of its input rasters.
+
+    Args:
+      sources: open datasets, by filepath.
+      blocks: blocks already read or computed for this window, by filepath;
+        blocks read from sources are added to it.
+    """
+    if isinstance(plan, str):
+        if blocks is None:
+            return sources[plan].read(1, window=window)
+        if plan not in blocks:
+            blocks[plan] = sources[plan].read(1, window=window)
+        return blocks[plan]
+    operation, inputs = plan
+    condition = _summarize(
+        np.nan,
+        [
+            RasterData(evaluate_block(input, sources, window, blocks), None)
+            for input in inputs
+        ],
+        operation,
+    )
+    return cast(RasterData, condition).raster
+
+
+def write_condition(
+    condition_reader: ConditionReader,
+    plan: ConditionPlan,
+    condition_type: ConditionScoreType,
+    output_path: str,
+    block_rows: int = DEFAULT_BLOCK_ROWS,
+) -> None:
+    """Computes a planned condition block by block, writing each block to a
+    GeoTIFF with the profile of the first input raster.
+
+    The output is written next to output_path and moved there once complete.
+
+    Raises:
+      ValueError if the input rasters do not have the same shape.
+    """
+    with ExitStack() as stack:
+        sources = {
+            path: stack.enter_context(condition_reader.open(path, condition_type))
+            for path in plan_filepaths(plan)
+        }
+        first = next(iter(sources.values()))
+        height, width = first.height, first.width
+        for path, src in sources.items():
+            if (src.height, src.width) != (height, width):
+                raise ValueError(
+                    f"{path} is {src.height}x{src.width}, expected {height}x{width}."
+                )
+
+        profile = first.profile.copy()
+        profile.update(driver="GTiff", count=1, dtype="float32", nodata=np.nan)
+        tmp_path = output_path + ".tmp"
+        with rasterio.open(tmp_path, "w", **profile) as dst:
+            for row in range(0, height, block_rows):
+                window = Window(0, row, width, min(block_rows, height - row))
+                block = evaluate_block(plan, sources, window)
+                dst.write(block.astype("float32"), 1, window=window)
+    os.replace(tmp_path, output_path)
+
+
+def write_management_conditions(
+    condition_reader: ConditionReader,
+    filepath: str,
+    types: list[ConditionScoreType] = list(MANAGEMENT_TYPES),
+    block_rows: int = DEFAULT_BLOCK_ROWS,
+) -> list[str]:
+    """Computes the management conditions of a condition from its CURRENT and
+    FUTURE rasters block by block, in one pass, writing each type to its own
+    raster (aligned with the CURRENT raster).
+
+    The outputs are written next to their paths and moved there once
+    complete.
+
+    Returns:
+      The paths of the rasters written, in the order of the types.
+
+    Raises:
+      ValueError if the CURRENT and FUTURE rasters do not have the same shape.
+    """
+    output_paths = [condition_reader.get_path(filepath, type) for type in types]
+    with ExitStack() as stack:
+        current = stack.enter_context(
+            condition_reader.open(filepath, ConditionScoreType.CURRENT)
+        )
+        future = stack.enter_context(
+            condition_reader.open(filepath, ConditionScoreType.FUTURE)
+        )
+        height, width = current.height, current.width
+        if (future.height, future.width) != (height, width):
+            raise ValueError(
+                f"{filepath} future is {future.height}x{future.width}, "
+                f"expected {height}x{width}."
+            )
+
+        profile = current.profile.copy()
+        profile.update(driver="GTiff", count=1, dtype="float32", nodata=np.nan)
+        destinations = [
+            stack.enter_context(rasterio.open(path + ".tmp", "w", **profile))
+            for path in output_paths
+        ]
+        for row in range(0, height, block_rows):
+            window = Window(0, row, width, min(block_rows, height - row))
+            conditions = management_conditions(
+                _read_block(current, window), _read_block(future, window), types
+            )
+            for type, dst in zip(types, destinations):
+                dst.write(conditions[type].astype("float32"), 1, window=window)
+
+    for path in output_paths:
+        os.replace(path + ".tmp", path)
+    return output_paths
+
+
+def _read_block(src, window: Window) -> ConditionMatrix:
+    block = src.read(1, window=window)
+    if src.nodata is None:
+        return block.astype("float32")
+    return cast(ConditionMatrix, convert_nodata_to_nan(src.nodata, block))
+
+
 def score_condition(
     config: PillarConfig,
     condition_reader: ConditionReader,
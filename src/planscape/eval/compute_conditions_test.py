@@ -2,6 +2,10 @@
 
 import logging
 import numpy as np
+import os
+import rasterio
+import tempfile
+from rasterio.transform import from_origin
 from typing import Optional, Tuple
 import unittest
 
@@ -13,6 +17,7 @@ from base.condition_types import (
     Element,
     Metric,
 )
+from base.conditions import MANAGEMENT_TYPES, management_conditions
 import config.conditions_config as pc
 import eval.compute_conditions as cc
 from eval.raster_data import RasterData
@@ -383,3 +388,237 @@ class ScoreConditionTest(unittest.TestCase):
                 FakeConditionReader(), metric, ConditionScoreType.ADAPT
             )
             self.assertTrue(np.all(score == condition.raster))
+
+
+class WriteConditionTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.reader = cc.ConditionReader(self.tmpdir.name)
+        rng = np.random.default_rng(0)
+        for name in ["m1", "m2", "m3", "e2"]:
+            raster = rng.random((7, 5), dtype="float32")
+            raster[rng.random((7, 5)) < 0.2] = np.nan
+            self.write(name, raster)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, name, raster):
+        with rasterio.open(
+            self.reader.get_path(name, ConditionScoreType.CURRENT),
+            "w",
+            driver="GTiff",
+            height=raster.shape[0],
+            width=raster.shape[1],
+            count=1,
+            dtype=raster.dtype,
+            crs="EPSG:3857",
+            transform=from_origin(0, 0, 30, 30),
+            nodata=np.nan,
+        ) as dst:
+            dst.write(raster, 1)
+
+    def test_plan_element_without_metric_file_is_none(self):
+        element: Element = {
+            "element_name": "element",
+            "metrics": [{"metric_name": "metric"}],
+        }
+        self.assertIsNone(cc.plan_element(element, recompute=True))
+
+    def test_streamed_pillar_matches_score_pillar(self):
+        element1: Element = {
+            "element_name": "e1",
+            "metrics": [
+                {"metric_name": "m1", "filepath": "m1"},
+                {"metric_name": "m2", "filepath": "m2"},
+            ],
+            "operation": "MIN",
+        }
+        element2: Element = {
+            "element_name": "e2",
+            "metrics": [{"metric_name": "m3"}],
+            "filepath": "e2",
+        }
+        pillar: Pillar = {"pillar_name": "pillar", "elements": [element1, element2]}
+        output_path = os.path.join(self.tmpdir.name, "pillar.tif")
+
+        cc.write_condition(
+            self.reader,
+            cc.plan_pillar(pillar, recompute=True),
+            ConditionScoreType.CURRENT,
+            output_path,
+            block_rows=3,
+        )
+
+        expected = cc.score_pillar(
+            self.reader, pillar, ConditionScoreType.CURRENT, recompute=True
+        )
+        with rasterio.open(output_path) as src:
+            np.testing.assert_array_equal(src.read(1), expected.raster)
+            self.assertTrue(np.isnan(src.nodata))
+
+    def test_rasters_of_different_shapes_raise(self):
+        self.write("small", np.zeros((3, 3), dtype="float32"))
+        element: Element = {
+            "element_name": "e",
+            "metrics": [
+                {"metric_name": "m1", "filepath": "m1"},
+                {"metric_name": "small", "filepath": "small"},
+            ],
+        }
+        with self.assertRaises(ValueError):
+            cc.write_condition(
+                self.reader,
+                cc.plan_element(element, recompute=True),
+                ConditionScoreType.CURRENT,
+                os.path.join(self.tmpdir.name, "e.tif"),
+            )
+
+
+class CachedConditionReaderTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        # Budget of two 4x5 float32 rasters.
+        self.reader = cc.CachedConditionReader(self.tmpdir.name, max_bytes=160)
+        for i, name in enumerate(["m1", "m2", "m3"]):
+            self.write(name, np.full((4, 5), i, dtype="float32"))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, name, raster):
+        with rasterio.open(
+            self.reader.get_path(name, ConditionScoreType.CURRENT),
+            "w",
+            driver="GTiff",
+            height=raster.shape[0],
+            width=raster.shape[1],
+            count=1,
+            dtype=raster.dtype,
+            crs="EPSG:3857",
+            transform=from_origin(0, 0, 30, 30),
+            nodata=np.nan,
+        ) as dst:
+            dst.write(raster, 1)
+
+    def counters(self):
+        return (self.reader.hits, self.reader.misses, self.reader.evictions)
+
+    def test_reads_are_cached_and_read_only(self):
+        first = self.reader.read("m1", ConditionScoreType.CURRENT)
+        second = self.reader.read("m1", ConditionScoreType.CURRENT)
+
+        self.assertIs(first.raster, second.raster)
+        self.assertIsNot(first.profile, second.profile)
+        self.assertEqual(self.counters(), (1, 1, 0))
+        with self.assertRaises(ValueError):
+            first.raster[0, 0] = 5
+
+    def test_least_recently_used_is_evicted(self):
+        self.reader.read("m1", ConditionScoreType.CURRENT)
+        self.reader.read("m2", ConditionScoreType.CURRENT)
+        self.reader.read("m1", ConditionScoreType.CURRENT)
+        self.reader.read("m3", ConditionScoreType.CURRENT)
+
+        self.assertEqual(self.counters(), (1, 3, 1))
+        self.assertEqual(self.reader.current_bytes, 160)
+        self.reader.read("m1", ConditionScoreType.CURRENT)
+        self.assertEqual(self.counters(), (2, 3, 1))
+        self.reader.read("m2", ConditionScoreType.CURRENT)
+        self.assertEqual(self.counters(), (2, 4, 2))
+
+    def test_rewritten_file_is_read_again(self):
+        self.reader.read("m1", ConditionScoreType.CURRENT)
+        path = self.reader.get_path("m1", ConditionScoreType.CURRENT)
+        mtime = os.stat(path).st_mtime_ns
+        self.write("m1", np.full((4, 5), 7, dtype="float32"))
+        os.utime(path, ns=(mtime + 10**9, mtime + 10**9))
+
+        condition = self.reader.read("m1", ConditionScoreType.CURRENT)
+
+        self.assertEqual(condition.raster[0, 0], 7)
+        self.assertEqual(self.counters(), (0, 2, 0))
+        self.assertEqual(self.reader.current_bytes, 80)
+
+    def test_raster_over_budget_is_not_cached(self):
+        self.write("big", np.zeros((10, 10), dtype="float32"))
+
+        self.reader.read("big", ConditionScoreType.CURRENT)
+        self.reader.read("big", ConditionScoreType.CURRENT)
+
+        self.assertEqual(self.counters(), (0, 2, 0))
+        self.assertEqual(self.reader.current_bytes, 0)
+
+    def test_raw_and_normalized_are_cached_separately(self):
+        self.write("m1", np.ones((4, 5), dtype="float32"))  # writes m1_normalized
+        with rasterio.open(
+            self.reader.get_path("m1", ConditionScoreType.CURRENT, is_raw=True),
+            "w",
+            driver="GTiff",
+            height=4,
+            width=5,
+            count=1,
+            dtype="float32",
+        ) as dst:
+            dst.write(np.full((4, 5), 3, dtype="float32"), 1)
+
+        raw = self.reader.read("m1", ConditionScoreType.CURRENT, is_raw=True)
+        normalized = self.reader.read("m1", ConditionScoreType.CURRENT)
+
+        self.assertEqual((raw.raster[0, 0], normalized.raster[0, 0]), (3, 1))
+        self.assertEqual(self.counters(), (0, 2, 0))
+
+
+class WriteManagementConditionsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.reader = cc.ConditionReader(self.tmpdir.name)
+        rng = np.random.default_rng(0)
+        self.current = rng.uniform(-1, 1, (9, 4)).astype("float32")
+        self.current[rng.random((9, 4)) < 0.2] = -999
+        self.future = rng.uniform(-1, 1, (9, 4)).astype("float32")
+        self.write(ConditionScoreType.CURRENT, self.current, -999)
+        self.write(ConditionScoreType.FUTURE, self.future, np.nan)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, condition_type, raster, nodata):
+        with rasterio.open(
+            self.reader.get_path("m1", condition_type),
+            "w",
+            driver="GTiff",
+            height=raster.shape[0],
+            width=raster.shape[1],
+            count=1,
+            dtype=raster.dtype,
+            crs="EPSG:3857",
+            transform=from_origin(0, 0, 30, 30),
+            nodata=nodata,
+        ) as dst:
+            dst.write(raster, 1)
+
+    def test_blocks_match_management_conditions(self):
+        current = self.current.copy()
+        current[current == -999] = np.nan
+        expected = management_conditions(current, self.future)
+
+        paths = cc.write_management_conditions(self.reader, "m1", block_rows=4)
+
+        self.assertEqual(
+            paths,
+            [self.reader.get_path("m1", type) for type in MANAGEMENT_TYPES],
+        )
+        for type, path in zip(MANAGEMENT_TYPES, paths):
+            with rasterio.open(path) as src:
+                self.assertTrue(np.isnan(src.nodata))
+                np.testing.assert_array_equal(src.read(1), expected[type])
+        self.assertFalse(
+            [name for name in os.listdir(self.tmpdir.name) if name.endswith(".tmp")]
+        )
+
+    def test_different_shapes_raise(self):
+        self.write(ConditionScoreType.FUTURE, self.future[:5], np.nan)
+
+        with self.assertRaises(ValueError):
+            cc.write_management_conditions(self.reader, "m1")
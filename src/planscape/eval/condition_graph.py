@@ -0,0 +1,215 @@
+"""Evaluation of the conditions of a region as a dependency graph.
+
+compile_region turns the elements and pillars of a region that
+compute_elements and compute_pillars write into ConditionNodes. The plan
+of a node (see eval/compute_conditions.py) refers to input rasters and to
+the outputs of other nodes by filepath, so pillars use the outputs of
+their elements instead of recomputing them from the metrics.
+
+Nodes sharing an input or an output form a component, and components are
+independent. evaluate_region evaluates each component block by block,
+reading each block of each input raster once and keeping the element
+blocks for the pillars, and distributes components across a process pool.
+A region is thus computed reading each input raster once.
+"""
+
+import multiprocessing
+import os
+from contextlib import ExitStack
+from functools import partial
+from typing import NamedTuple, Optional
+
+import numpy as np
+import rasterio
+from rasterio.windows import Window
+
+from base.condition_types import ConditionLevel, ConditionScoreType
+from config.conditions_config import PillarConfig
+from eval.compute_conditions import (
+    DEFAULT_BLOCK_ROWS,
+    ConditionPlan,
+    ConditionReader,
+    evaluate_block,
+    plan_element,
+    plan_filepaths,
+    plan_summary,
+)
+
+
+class ConditionNode(NamedTuple):
+    # filepath of the condition, as in the config, where it is written.
+    filepath: str
+    level: ConditionLevel
+    name: str
+    plan: ConditionPlan
+
+
+def compile_region(config: PillarConfig, region_name: str) -> list[ConditionNode]:
+    """Returns the nodes of the displayed elements and pillars of a region
+    that can be computed, elements first.
+    """
+    region = config.get_region(region_name)
+    if region is None:
+        return []
+    elements: list[ConditionNode] = []
+    pillars: list[ConditionNode] = []
+    for pillar in config.get_pillars(region):
+        if not pillar.get("display", False):
+            continue
+        inputs = []
+        for element in config.get_elements(pillar):
+            plan = plan_element(element, recompute=True)
+            if plan is not None and element.get("filepath"):
+                elements.append(
+                    ConditionNode(
+                        element["filepath"],
+                        ConditionLevel.ELEMENT,
+                        element["element_name"],
+                        plan,
+                    )
+                )
+                inputs.append(element["filepath"])
+            else:
+                inputs.append(plan or plan_element(element, recompute=False))
+        plan = plan_summary(inputs, pillar.get("operation", "MEAN"))
+        if plan is not None and pillar.get("filepath"):
+            pillars.append(
+                ConditionNode(
+                    pillar["filepath"],
+                    ConditionLevel.PILLAR,
+                    pillar["pillar_name"],
+                    plan,
+                )
+            )
+    return elements + pillars
+
+
+def get_components(nodes: list[ConditionNode]) -> list[list[ConditionNode]]:
+    """Groups the nodes sharing an input or an output, keeping their order."""
+    parents = list(range(len(nodes)))
+
+    def find(i):
+        while parents[i] != i:
+            parents[i] = parents[parents[i]]
+            i = parents[i]
+        return i
+
+    owners: dict[str, int] = {}
+    for i, node in enumerate(nodes):
+        for path in [node.filepath, *plan_filepaths(node.plan)]:
+            if path in owners:
+                parents[find(i)] = find(owners[path])
+            else:
+                owners[path] = i
+
+    components: dict[int, list[ConditionNode]] = {}
+    for i, node in enumerate(nodes):
+        components.setdefault(find(i), []).append(node)
+    return list(components.values())
+
+
+def evaluate_component(
+    condition_reader: ConditionReader,
+    condition_type: ConditionScoreType,
+    nodes: list[ConditionNode],
+    block_rows: int = DEFAULT_BLOCK_ROWS,
+    output_directory: Optional[str] = None,
+) -> list[str]:
+    """Computes the nodes of a component block by block, writing each to the
+    raster of its filepath.
+
+    The rasters are written under output_directory, laid out as the rasters
+    read by condition_reader, or next to them if output_directory is None.
+
+    Returns:
+      The paths of the rasters written.
+
+    Raises:
+      ValueError if the nodes read no raster besides their own outputs, or
+      if the input rasters do not have the same shape.
+    """
+    outputs = {node.filepath for node in nodes}
+    inputs = dict.fromkeys(
+        path
+        for node in nodes
+        for path in plan_filepaths(node.plan)
+        if path not in outputs
+    )
+    if not inputs:
+        raise ValueError(
+            f"{', '.join(node.filepath for node in nodes)} have no input rasters."
+        )
+    writer = (
+        condition_reader
+        if output_directory is None
+        else ConditionReader(output_directory)
+    )
+    output_paths = {
+        node.filepath: writer.get_path(node.filepath, condition_type) for node in nodes
+    }
+    with ExitStack() as stack:
+        sources = {
+            path: stack.enter_context(condition_reader.open(path, condition_type))
+            for path in inputs
+        }
+        first = next(iter(sources.values()))
+        height, width = first.height, first.width
+        for path, src in sources.items():
+            if (src.height, src.width) != (height, width):
+                raise ValueError(
+                    f"{path} is {src.height}x{src.width}, expected {height}x{width}."
+                )
+
+        profile = first.profile.copy()
+        profile.update(driver="GTiff", count=1, dtype="float32", nodata=np.nan)
+        destinations = {
+            path: stack.enter_context(rasterio.open(output + ".tmp", "w", **profile))
+            for path, output in output_paths.items()
+        }
+        for row in range(0, height, block_rows):
+            window = Window(0, row, width, min(block_rows, height - row))
+            blocks: dict = {}
+            for node in nodes:
+                block = evaluate_block(node.plan, sources, window, blocks)
+                blocks[node.filepath] = block
+                destinations[node.filepath].write(
+                    block.astype("float32"), 1, window=window
+                )
+
+    for output in output_paths.values():
+        os.replace(output + ".tmp", output)
+    return list(output_paths.values())
+
+
+def evaluate_region(
+    condition_reader: ConditionReader,
+    config: PillarConfig,
+    region_name: str,
+    condition_type: ConditionScoreType,
+    max_workers: int = 1,
+    block_rows: int = DEFAULT_BLOCK_ROWS,
+    output_directory: Optional[str] = None,
+) -> list[ConditionNode]:
+    """Computes and writes the elements and pillars of a region, under
+    output_directory if set (see evaluate_component).
+
+    Returns:
+      The nodes written.
+    """
+    nodes = compile_region(config, region_name)
+    components = get_components(nodes)
+    evaluate = partial(
+        evaluate_component,
+        condition_reader,
+        condition_type,
+        block_rows=block_rows,
+        output_directory=output_directory,
+    )
+    if max_workers > 1 and len(components) > 1:
+        with multiprocessing.Pool(min(max_workers, len(components))) as pool:
+            for _ in pool.imap_unordered(evaluate, components):
+                pass
+    else:
+        for component in components:
+            evaluate(component)
+    return nodes
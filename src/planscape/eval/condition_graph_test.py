@@ -0,0 +1,217 @@
+""" Tests for the condition_graph.py file. """
+
+import os
+import tempfile
+import unittest
+from collections import Counter
+
+import numpy as np
+import rasterio
+from rasterio.transform import from_origin
+
+import config.conditions_config as pc
+import eval.compute_conditions as cc
+from base.condition_types import ConditionLevel, ConditionScoreType
+from eval.condition_graph import (
+    ConditionNode,
+    compile_region,
+    evaluate_component,
+    evaluate_region,
+    get_components,
+)
+
+
+class FakePillarConfig(pc.PillarConfig):
+    def __init__(self, regions):
+        self._config = {"regions": regions}
+
+
+class CountingConditionReader(cc.ConditionReader):
+    def __init__(self, root_directory: str):
+        super().__init__(root_directory)
+        self.opened: Counter = Counter()
+
+    def open(self, filepath, condition_type, is_raw=False):
+        self.opened[filepath] += 1
+        return super().open(filepath, condition_type, is_raw)
+
+
+def make_region():
+    return {
+        "region_name": "sierra-nevada",
+        "pillars": [
+            {
+                "pillar_name": "p1",
+                "display": True,
+                "filepath": "p1",
+                "elements": [
+                    {
+                        "element_name": "e1",
+                        "filepath": "e1",
+                        "metrics": [
+                            {"metric_name": "m1", "filepath": "m1"},
+                            {"metric_name": "m2", "filepath": "m2"},
+                        ],
+                        "operation": "MIN",
+                    },
+                    {
+                        "element_name": "e2",
+                        "filepath": "e2",
+                        "metrics": [{"metric_name": "m3"}],
+                    },
+                ],
+            },
+            {
+                "pillar_name": "p2",
+                "display": True,
+                "filepath": "p2",
+                "elements": [
+                    {
+                        "element_name": "e3",
+                        "filepath": "e3",
+                        "metrics": [
+                            {"metric_name": "m4", "filepath": "m4"},
+                            {"metric_name": "m5", "filepath": "m5"},
+                        ],
+                    }
+                ],
+            },
+            {
+                "pillar_name": "hidden",
+                "filepath": "hidden",
+                "elements": [],
+            },
+        ],
+    }
+
+
+class CompileRegionTest(unittest.TestCase):
+    def test_unknown_region_has_no_nodes(self):
+        config = FakePillarConfig([make_region()])
+        self.assertEqual(compile_region(config, "tcsi"), [])
+
+    def test_pillars_use_the_outputs_of_their_elements(self):
+        nodes = compile_region(FakePillarConfig([make_region()]), "sierra-nevada")
+
+        self.assertEqual(
+            [(node.filepath, node.level) for node in nodes],
+            [
+                ("e1", ConditionLevel.ELEMENT),
+                ("e3", ConditionLevel.ELEMENT),
+                ("p1", ConditionLevel.PILLAR),
+                ("p2", ConditionLevel.PILLAR),
+            ],
+        )
+        self.assertEqual(nodes[2].plan, ("MEAN", ["e1", "e2"]))
+
+    def test_independent_pillars_are_separate_components(self):
+        nodes = compile_region(FakePillarConfig([make_region()]), "sierra-nevada")
+
+        components = get_components(nodes)
+
+        self.assertEqual(
+            [[node.filepath for node in c] for c in components],
+            [["e1", "p1"], ["e3", "p2"]],
+        )
+
+
+class EvaluateRegionTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.reader = CountingConditionReader(self.tmpdir.name)
+        rng = np.random.default_rng(0)
+        for name in ["m1", "m2", "m4", "m5", "e2"]:
+            raster = rng.random((9, 4), dtype="float32")
+            raster[rng.random((9, 4)) < 0.2] = np.nan
+            with rasterio.open(
+                self.reader.get_path(name, ConditionScoreType.CURRENT),
+                "w",
+                driver="GTiff",
+                height=9,
+                width=4,
+                count=1,
+                dtype="float32",
+                crs="EPSG:3857",
+                transform=from_origin(0, 0, 30, 30),
+                nodata=np.nan,
+            ) as dst:
+                dst.write(raster, 1)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_region_matches_score_pillar_and_opens_each_input_once(self):
+        region = make_region()
+        expected = {
+            pillar["pillar_name"]: cc.score_pillar(
+                cc.ConditionReader(self.tmpdir.name),
+                pillar,
+                ConditionScoreType.CURRENT,
+                recompute=True,
+            ).raster
+            for pillar in region["pillars"][:2]
+        }
+
+        nodes = evaluate_region(
+            self.reader,
+            FakePillarConfig([region]),
+            "sierra-nevada",
+            ConditionScoreType.CURRENT,
+            block_rows=4,
+        )
+
+        self.assertEqual(len(nodes), 4)
+        self.assertEqual(
+            self.reader.opened, Counter({"m1": 1, "m2": 1, "m4": 1, "m5": 1, "e2": 1})
+        )
+        for name, raster in expected.items():
+            path = self.reader.get_path(name, ConditionScoreType.CURRENT)
+            with rasterio.open(path) as src:
+                np.testing.assert_array_equal(src.read(1), raster.astype("float32"))
+        self.assertFalse(
+            [name for name in os.listdir(self.tmpdir.name) if name.endswith(".tmp")]
+        )
+
+    def test_components_can_run_in_a_pool(self):
+        region = make_region()
+        config = FakePillarConfig([region])
+        evaluate_region(
+            self.reader, config, "sierra-nevada", ConditionScoreType.CURRENT
+        )
+        path = self.reader.get_path("p2", ConditionScoreType.CURRENT)
+        with rasterio.open(path) as src:
+            expected = src.read(1)
+
+        evaluate_region(
+            self.reader,
+            config,
+            "sierra-nevada",
+            ConditionScoreType.CURRENT,
+            max_workers=2,
+        )
+
+        with rasterio.open(path) as src:
+            np.testing.assert_array_equal(src.read(1), expected)
+
+    def test_writes_to_the_output_directory(self):
+        inputs = set(os.listdir(self.tmpdir.name))
+        with tempfile.TemporaryDirectory() as output_directory:
+            evaluate_region(
+                self.reader,
+                FakePillarConfig([make_region()]),
+                "sierra-nevada",
+                ConditionScoreType.CURRENT,
+                output_directory=output_directory,
+            )
+
+            self.assertEqual(
+                sorted(os.listdir(output_directory)),
+                [f"{name}_normalized.tif" for name in ["e1", "e3", "p1", "p2"]],
+            )
+        self.assertEqual(set(os.listdir(self.tmpdir.name)), inputs)
+
+    def test_component_without_inputs_raises(self):
+        node = ConditionNode("e1", ConditionLevel.ELEMENT, "e1", ("MEAN", []))
+
+        with self.assertRaisesRegex(ValueError, "e1"):
+            evaluate_component(self.reader, ConditionScoreType.CURRENT, [node])
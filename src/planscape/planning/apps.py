@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class PlanningConfig(AppConfig):
     name = "planning"
+
+    def ready(self):
+        from planning import signals  # noqa: F401
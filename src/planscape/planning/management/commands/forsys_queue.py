@@ -4,6 +4,7 @@ from typing import Any
 
 from django.core.management.base import BaseCommand
 from planning.models import Scenario, ScenarioResultStatus
+from planning.services import cache_scenario_stands
 from utils.cli_utils import call_forsys
 from utils.signals import SignalHandler
 from django.conf import settings
@@ -42,6 +43,8 @@ class Command(BaseCommand):
                 time.sleep(idle_cooldown)
                 continue
 
+            # forsys reads the stands of the planning area from this cache.
+            cache_scenario_stands(scenario)
             try:
                 call_forsys(scenario.pk)
                 self.stdout.write(
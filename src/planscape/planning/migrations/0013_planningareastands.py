@@ -0,0 +1,62 @@
+# Generated by Django 4.1.13 on 2026-10-18 11:20
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("planning", "0012_sharedlink"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PlanningAreaStands",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "size",
+                    models.CharField(
+                        choices=[
+                            ("SMALL", "Small"),
+                            ("MEDIUM", "Medium"),
+                            ("LARGE", "Large"),
+                        ],
+                        max_length=16,
+                    ),
+                ),
+                ("geometry_checksum", models.CharField(max_length=32)),
+                (
+                    "stand_ids",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.BigIntegerField(), default=list, size=None
+                    ),
+                ),
+                (
+                    "planning_area",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="stands",
+                        to="planning.planningarea",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="planningareastands",
+            constraint=models.UniqueConstraint(
+                fields=("planning_area", "size"), name="unique_planning_area_stands"
+            ),
+        ),
+    ]
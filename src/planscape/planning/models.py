@@ -1,10 +1,12 @@
 from pathlib import Path
 from django.contrib.gis.db import models
+from django.contrib.postgres.fields import ArrayField
 from django.contrib.auth import get_user_model
 from django.conf import settings
 from utils.uuid_utils import generate_short_uuid
 from django.core.serializers.json import DjangoJSONEncoder
 from core.models import CreatedAtMixin, UpdatedAtMixin
+from stands.models import StandSizeChoices
 import uuid, shortuuid
 
 User = get_user_model()
@@ -47,6 +49,41 @@ class PlanningArea(CreatedAtMixin, UpdatedAtMixin, models.Model):
         ordering = ["user", "-created_at"]
 
 
+class PlanningAreaStands(CreatedAtMixin, UpdatedAtMixin, models.Model):
+    """The stands of a size intersecting a planning area, selected once so
+    the scenarios of the area do not select them again. forsys reads their
+    metrics from the stand metric matrix (see stands/matrix.py).
+    """
+
+    planning_area = models.ForeignKey(
+        PlanningArea,
+        related_name="stands",
+        on_delete=models.CASCADE,
+    )
+
+    size = models.CharField(
+        choices=StandSizeChoices.choices,
+        max_length=16,
+    )
+
+    # md5 of the planning area geometry the stands were selected with.
+    geometry_checksum = models.CharField(max_length=32)
+
+    # sorted ids of the stands.
+    stand_ids = ArrayField(models.BigIntegerField(), default=list)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=[
+                    "planning_area",
+                    "size",
+                ],
+                name="unique_planning_area_stands",
+            )
+        ]
+
+
 class Scenario(CreatedAtMixin, UpdatedAtMixin, models.Model):
     planning_area = models.ForeignKey(
         PlanningArea,
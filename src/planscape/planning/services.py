@@ -1,15 +1,24 @@
+import logging
 import math
 import os
 import zipfile
 import fiona
 from datetime import date, time, datetime
 from pathlib import Path
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, Optional, Tuple
 from django.conf import settings
 from fiona.crs import from_epsg
 from django.contrib.gis.geos import GEOSGeometry
-from planning.models import PlanningArea, Scenario, ScenarioResultStatus
-from stands.models import StandSizeChoices, area_from_size
+from django.db.models.expressions import RawSQL
+from planning.models import (
+    PlanningArea,
+    PlanningAreaStands,
+    Scenario,
+    ScenarioResultStatus,
+)
+from stands.models import Stand, StandSizeChoices, area_from_size
+
+log = logging.getLogger(__name__)
 
 
 def zip_directory(file_obj, source_dir):
@@ -48,6 +57,71 @@ def get_acreage(geometry: GEOSGeometry):
     return acres
 
 
+def get_geometry_checksum(planning_area: PlanningArea) -> str:
+    """Returns the md5 of the planning area geometry, as stored in the
+    database, which forsys can compare too.
+    """
+    return (
+        PlanningArea.objects.filter(pk=planning_area.pk)
+        .annotate(checksum=RawSQL("md5(ST_AsBinary(geometry))", []))
+        .values_list("checksum", flat=True)
+        .get()
+    )
+
+
+def cache_planning_area_stands(
+    planning_area: PlanningArea, size: StandSizeChoices
+) -> PlanningAreaStands:
+    """Selects the stands of a size intersecting a planning area, and
+    stores them.
+    """
+    checksum = get_geometry_checksum(planning_area)
+    stand_ids = sorted(
+        Stand.objects.overlapping(planning_area.geometry, size).values_list(
+            "id", flat=True
+        )
+    )
+    cache, _ = PlanningAreaStands.objects.update_or_create(
+        planning_area=planning_area,
+        size=size,
+        defaults={"geometry_checksum": checksum, "stand_ids": stand_ids},
+    )
+    return cache
+
+
+def get_planning_area_stands(
+    planning_area: PlanningArea, size: StandSizeChoices
+) -> PlanningAreaStands:
+    """Returns the stands of a size intersecting a planning area, selecting
+    them again only if the geometry of the area changed.
+    """
+    cache = PlanningAreaStands.objects.filter(
+        planning_area=planning_area, size=size
+    ).first()
+    if cache is None or cache.geometry_checksum != get_geometry_checksum(planning_area):
+        return cache_planning_area_stands(planning_area, size)
+    return cache
+
+
+def cache_scenario_stands(scenario: Scenario) -> Optional[PlanningAreaStands]:
+    """Caches the stands of the planning area of a scenario before forsys
+    runs it, if they were not cached yet.
+
+    forsys selects the stands itself when they are not cached, so a failure
+    is logged instead of failing the run.
+    """
+    try:
+        return get_planning_area_stands(
+            scenario.planning_area,
+            scenario.configuration.get("stand_size") or StandSizeChoices.LARGE,
+        )
+    except Exception:
+        log.exception(
+            f"Could not cache the stands of the planning area of scenario {scenario.pk}"
+        )
+        return None
+
+
 def validate_scenario_treatment_ratio(
     planning_area: PlanningArea,
     configuration: Dict[str, Any],
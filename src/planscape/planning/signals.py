@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from planning.models import PlanningArea, PlanningAreaStands
+from planning.services import get_geometry_checksum
+from planning.tasks import async_cache_planning_area_stands
+from stands.signals import stands_changed
+
+
+@receiver(post_save, sender=PlanningArea)
+def cache_planning_area_stands(sender, instance, created, **kwargs):
+    """Drops the stands cached for a previous geometry of the planning area,
+    and, with CACHE_PLANNING_AREA_STANDS, caches them again in the
+    background. Otherwise they are cached when a scenario of the area is
+    first run (see cache_scenario_stands).
+    """
+    if instance.geometry is None:
+        return
+    stale = 0
+    if not created:
+        stale, _ = (
+            PlanningAreaStands.objects.filter(planning_area=instance)
+            .exclude(geometry_checksum=get_geometry_checksum(instance))
+            .delete()
+        )
+    if (created or stale) and settings.CACHE_PLANNING_AREA_STANDS:
+        transaction.on_commit(
+            lambda: async_cache_planning_area_stands.delay(instance.pk)
+        )
+
+
+@receiver(stands_changed)
+def drop_planning_area_stands(sender, size, **kwargs):
+    PlanningAreaStands.objects.filter(size=size).delete()
@@ -1,6 +1,8 @@
 from subprocess import CalledProcessError, TimeoutExpired
 from planscape.celery import app
-from planning.models import Scenario, ScenarioResultStatus
+from planning.models import PlanningArea, Scenario, ScenarioResultStatus
+from planning.services import cache_scenario_stands, get_planning_area_stands
+from stands.models import StandSizeChoices
 import logging
 
 from utils.cli_utils import call_forsys
@@ -15,6 +17,8 @@ def async_forsys_run(scenario_id: int) -> None:
     except Scenario.DoesNotExist:
         log.warning(f"Scenario with {scenario_id} does not exists.")
 
+    # forsys reads the stands of the planning area from this cache.
+    cache_scenario_stands(scenario)
     try:
         log.info(f"Running scenario {scenario_id}")
         call_forsys(scenario.pk)
@@ -34,3 +38,16 @@ def async_forsys_run(scenario_id: int) -> None:
         log.error(
             f"A panic error happened while trying to call forsys for {scenario_id}"
         )
+
+
+@app.task(max_retries=3, retry_backoff=True)
+def async_cache_planning_area_stands(planning_area_id: int) -> None:
+    try:
+        planning_area = PlanningArea.objects.get(id=planning_area_id)
+    except PlanningArea.DoesNotExist:
+        log.warning(f"Planning area with {planning_area_id} does not exists.")
+        return
+
+    for size in StandSizeChoices.values:
+        log.info(f"Caching {size} stands of planning area {planning_area_id}")
+        get_planning_area_stands(planning_area, size)
@@ -1,18 +1,27 @@
 from datetime import date, datetime
 import shutil
+from unittest import mock
 from django.contrib.gis.geos import GEOSGeometry, MultiPolygon
-from django.test import TestCase, TransactionTestCase
+from django.test import TestCase, TransactionTestCase, override_settings
 import fiona
 from fiona.crs import to_string
 
 from planning.services import (
+    cache_scenario_stands,
     export_to_shapefile,
+    get_planning_area_stands,
     get_max_treatable_area,
     get_max_treatable_stand_count,
     get_schema,
     validate_scenario_treatment_ratio,
 )
-from planning.models import PlanningArea, Scenario, ScenarioResult, ScenarioResultStatus
+from planning.models import (
+    PlanningArea,
+    PlanningAreaStands,
+    Scenario,
+    ScenarioResult,
+    ScenarioResultStatus,
+)
 from stands.models import Stand, StandSizeChoices
 
 
@@ -39,6 +48,90 @@ class MaxTreatableAreaTest(TestCase):
         self.assertEqual(2, stand_count)
 
 
+class PlanningAreaStandsTest(TestCase):
+    def setUp(self):
+        self.area = PlanningArea.objects.create(
+            region_name="sierra-nevada",
+            name="stands",
+            geometry=MultiPolygon(
+                [
+                    GEOSGeometry(
+                        "POLYGON ((-120 38, -120 38.1, -119.9 38.1, -119.9 38, -120 38))",
+                        srid=4269,
+                    )
+                ]
+            ),
+        )
+        self.inside, self.outside = [
+            Stand.objects.create(
+                size=StandSizeChoices.LARGE,
+                geometry=GEOSGeometry(
+                    f"POLYGON (({x} 38.05, {x} 38.051, {x + 0.001} 38.051, "
+                    f"{x + 0.001} 38.05, {x} 38.05))",
+                    srid=4269,
+                ),
+                area_m2=1,
+            )
+            for x in [-119.95, -119.5]
+        ]
+
+    def test_stands_are_cached(self):
+        cache = get_planning_area_stands(self.area, StandSizeChoices.LARGE)
+
+        self.assertEqual(cache.stand_ids, [self.inside.pk])
+        self.assertEqual(
+            get_planning_area_stands(self.area, StandSizeChoices.LARGE).pk, cache.pk
+        )
+
+    def test_changing_the_geometry_drops_the_cache(self):
+        get_planning_area_stands(self.area, StandSizeChoices.LARGE)
+
+        self.area.geometry = MultiPolygon(
+            [
+                GEOSGeometry(
+                    "POLYGON ((-119.6 38, -119.6 38.1, -119.4 38.1, -119.4 38, -119.6 38))",
+                    srid=4269,
+                )
+            ]
+        )
+        self.area.save()
+
+        self.assertFalse(PlanningAreaStands.objects.exists())
+        cache = get_planning_area_stands(self.area, StandSizeChoices.LARGE)
+        self.assertEqual(cache.stand_ids, [self.outside.pk])
+
+    def test_stands_are_cached_when_a_scenario_runs(self):
+        scenario = Scenario.objects.create(
+            planning_area=self.area, name="scenario", configuration={}
+        )
+
+        cache = cache_scenario_stands(scenario)
+
+        self.assertEqual(cache.stand_ids, [self.inside.pk])
+
+    def test_scenario_runs_without_cache_on_failure(self):
+        scenario = Scenario.objects.create(
+            planning_area=self.area, name="scenario", configuration={}
+        )
+        with mock.patch(
+            "planning.services.get_planning_area_stands", side_effect=RuntimeError
+        ), self.assertLogs("planning.services", level="ERROR"):
+            self.assertIsNone(cache_scenario_stands(scenario))
+
+    @override_settings(CACHE_PLANNING_AREA_STANDS=True)
+    def test_stands_are_cached_in_the_background_on_creation(self):
+        with mock.patch(
+            "planning.signals.async_cache_planning_area_stands.delay"
+        ) as delay, self.captureOnCommitCallbacks(execute=True):
+            area = PlanningArea.objects.create(
+                region_name="sierra-nevada",
+                name="other",
+                geometry=self.area.geometry,
+            )
+
+        delay.assert_called_once_with(area.pk)
+
+
 class ValidateScenarioTreatmentRatioTest(TransactionTestCase):
     def setUp(self) -> None:
         # Note: Test Polygon is 12163249.414195888 acres
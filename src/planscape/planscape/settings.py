@@ -363,12 +363,31 @@ FORSYS_PATCHMAX_SCRIPT = BASE_DIR / "rscripts" / "forsys.R"
 # TODO: Move this to a conf file that R can read?
 OUTPUT_DIR = BASE_DIR / "output"
 
+# Label rasters of stands, aligned to condition grids (see stands/zonal.py).
+STAND_LABELS_DIR = config("STAND_LABELS_DIR", OUTPUT_DIR / "stand_labels")
+
+# Block hashes of the rasters used to compute stand metrics (see
+# stands/manifest.py).
+STAND_MANIFESTS_DIR = config("STAND_MANIFESTS_DIR", OUTPUT_DIR / "stand_manifests")
+
+# Uncompressed, memory-mapped copies of condition rasters (see
+# stands/raster_cache.py).
+RASTER_CACHE_DIR = config("RASTER_CACHE_DIR", OUTPUT_DIR / "raster_cache")
+
+# Neighbour graphs of stands, one per size (see stands/adjacency.py).
+STAND_ADJACENCY_DIR = config("STAND_ADJACENCY_DIR", OUTPUT_DIR / "stand_adjacency")
+
 DEFAULT_EST_COST_PER_ACRE = config("DEFAULT_EST_COST_PER_ACRE", 2470, cast=float)
 
 
 # SINGLE QUEUE BEHAVIOR
 USE_CELERY_FOR_FORSYS = config("USE_CELERY_FOR_FORSYS", False, cast=bool)
 
+# Select the stands of a planning area in a celery task when the area is
+# saved, instead of when a scenario of the area is first run. Off by
+# default, since forsys may run without celery (see forsys_queue).
+CACHE_PLANNING_AREA_STANDS = config("CACHE_PLANNING_AREA_STANDS", False, cast=bool)
+
 # CELERY
 CELERY_BROKER_URL = config("CELERY_BROKER_URL", "redis://localhost:6379/0")
 
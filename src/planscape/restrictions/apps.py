@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class RestrictionsConfig(AppConfig):
+    name = "restrictions"
+
+    def ready(self):
+        from restrictions import signals  # noqa: F401
@@ -1,5 +1,6 @@
 from django.contrib.gis.utils import LayerMapping
-from restrictions.models import Restriction
+from django.db import connection, transaction
+from restrictions.models import Restriction, StandRestriction
 
 MAPPINGS = {
     "WILDERNESS_AREA": {"name": "WILDERNE_1", "geometry": "MULTIPOLYGON"},
@@ -10,6 +11,23 @@ MAPPINGS = {
     "STATE_PARKS": {"name": "UNITNAME", "geometry": "MULTIPOLYGON"},
 }
 
+# Restrictions are subdivided so that each stand is only intersected with
+# the parts of the (often huge) restriction polygons around it.
+INSERT_STAND_RESTRICTIONS = """
+INSERT INTO restrictions_standrestriction (stand_id, type)
+SELECT DISTINCT ss.id, %(type)s
+FROM (
+    SELECT ST_Subdivide(rr.geometry, 256) AS geometry
+    FROM restrictions_restriction rr
+    WHERE rr.type = %(type)s
+) parts
+JOIN stands_stand ss ON (
+    ss.geometry && parts.geometry AND
+    ST_Intersects(ss.geometry, parts.geometry)
+)
+WHERE %(size)s::VARCHAR IS NULL OR ss.size = %(size)s
+"""
+
 
 class CustomLayerMapping(LayerMapping):
     def __init__(self, *args, **kwargs):
@@ -35,3 +53,30 @@ def load_data(
         transform=True,
     )
     lm.save(strict=True, verbose=True)
+
+
+def compute_stand_restrictions(layer_type, size=None) -> int:
+    """Records the stands intersecting the restrictions of a type,
+    replacing the previous records of that type.
+
+    Args:
+      layer_type: the type of restrictions.
+      size: if set, only the stands of this size are recorded again.
+
+    Returns:
+      the number of stands intersecting the restrictions.
+    """
+    records = StandRestriction.objects.filter(type=layer_type)
+    if size is not None:
+        records = records.filter(stand__size=size)
+    with transaction.atomic(), connection.cursor() as cursor:
+        records.delete()
+        cursor.execute(INSERT_STAND_RESTRICTIONS, {"type": layer_type, "size": size})
+        return cursor.rowcount
+
+
+def get_loaded_types() -> list[str]:
+    """Returns the types of the restrictions loaded."""
+    return list(
+        Restriction.objects.order_by("type").values_list("type", flat=True).distinct()
+    )
@@ -1,6 +1,6 @@
 from django.core.management.base import BaseCommand, CommandParser
 from django.db import connection
-from restrictions.loader import MAPPINGS, load_data
+from restrictions.loader import MAPPINGS, compute_stand_restrictions, load_data
 from restrictions.models import Restriction
 
 
@@ -25,6 +25,12 @@ class Command(BaseCommand):
             help="If set to false, the command will not remove previous restrictions data.",
         )
 
+        parser.add_argument(
+            "--stands-only",
+            action="store_true",
+            help="Only record again the stands intersecting the restrictions, e.g. after creating stands.",
+        )
+
     def clear(self, type):
         counts = Restriction.objects.filter(type=type).delete()
         self.stdout.write(f"Deleted {counts} for {type}")
@@ -37,11 +43,15 @@ class Command(BaseCommand):
             self.stderr.write("INVALID TYPE")
             return
 
-        if clear:
-            self.clear(type)
+        if not options.get("stands_only"):
+            if clear:
+                self.clear(type)
 
-        load_data(
-            input_file,
-            MAPPINGS[type],
-            type,
-        )
+            load_data(
+                input_file,
+                MAPPINGS[type],
+                type,
+            )
+
+        stands = compute_stand_restrictions(type)
+        self.stdout.write(f"Recorded {stands} stands intersecting {type}")
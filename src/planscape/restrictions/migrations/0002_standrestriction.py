@@ -0,0 +1,47 @@
+# Generated by Django 4.1.13 on 2026-10-18 12:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("stands", "0001_initial"),
+        ("restrictions", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StandRestriction",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("type", models.CharField(max_length=128)),
+                (
+                    "stand",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="restrictions",
+                        to="stands.stand",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="standrestriction",
+            index=models.Index(fields=["type"], name="stand_restriction_type_index"),
+        ),
+        migrations.AddConstraint(
+            model_name="standrestriction",
+            constraint=models.UniqueConstraint(
+                fields=("stand", "type"), name="unique_stand_restriction"
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.1.13 on 2026-10-18 21:30
+
+from django.db import migrations
+from utils.file_utils import read_file
+
+UP_MIGRATION = read_file("restrictions/sql/create_stands_with_restrictions.sql")
+
+DOWN_MIGRATION = read_file("stands/sql/create_stands.sql")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("stands", "0002_auto_20230816_1812"),
+        ("restrictions", "0002_standrestriction"),
+    ]
+
+    operations = [migrations.RunSQL(UP_MIGRATION, DOWN_MIGRATION)]
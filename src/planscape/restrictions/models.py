@@ -1,4 +1,5 @@
 from django.contrib.gis.db import models
+from stands.models import Stand
 
 
 class Restriction(models.Model):
@@ -10,3 +11,29 @@ class Restriction(models.Model):
 
     class Meta:
         indexes = [models.Index(fields=["type"], name="restriction_type_index")]
+
+
+class StandRestriction(models.Model):
+    """A stand intersecting restrictions of a type, so stands can be
+    excluded by type without intersecting geometries.
+    """
+
+    stand = models.ForeignKey(
+        Stand,
+        related_name="restrictions",
+        on_delete=models.CASCADE,
+    )
+
+    type = models.CharField(max_length=128)
+
+    class Meta:
+        indexes = [models.Index(fields=["type"], name="stand_restriction_type_index")]
+        constraints = [
+            models.UniqueConstraint(
+                fields=[
+                    "stand",
+                    "type",
+                ],
+                name="unique_stand_restriction",
+            )
+        ]
@@ -0,0 +1,13 @@
+from django.dispatch import receiver
+from restrictions.loader import compute_stand_restrictions, get_loaded_types
+from stands.signals import stands_changed
+
+
+@receiver(stands_changed)
+def record_stand_restrictions(sender, size, **kwargs):
+    """Records the stands of a size intersecting each type of restrictions
+    loaded, so that forsys excludes the stands created after the
+    restrictions were loaded.
+    """
+    for type in get_loaded_types():
+        compute_stand_restrictions(type, size)
@@ -0,0 +1,52 @@
+-- Replaces create_stands (see stands/sql/create_stands.sql) so that it also
+-- records the restrictions intersecting the stands it creates, as
+-- compute_stand_restrictions does (see restrictions/loader.py), since these
+-- stands do not go through the stands_changed signal.
+CREATE OR REPLACE FUNCTION create_stands(
+		extent geometry,
+		hex_length float,
+		size_indicator varchar,
+		clean bool
+	) RETURNS int AS $$
+DECLARE
+	my_timestamp timestamp := timezone('utc', now());
+BEGIN
+	IF clean THEN
+		DELETE FROM restrictions_standrestriction sr
+		USING stands_stand ss
+		WHERE sr.stand_id = ss.id AND ss.size = size_indicator;
+
+		DELETE FROM stands_stand ss
+		WHERE size = size_indicator;
+	END IF;
+
+	WITH created AS (
+		INSERT INTO stands_stand (created_at, size, geometry, area_m2) (
+			SELECT
+				my_timestamp AS "created_at",
+				size_indicator AS "size",
+				ST_Transform(hex.geom, 4269) AS "geometry",
+				ROUND(ST_Area(hex.geom)::numeric, 2) AS "area_m2"
+			FROM
+				ST_HexagonGrid(hex_length, extent) AS hex
+		)
+		RETURNING id, geometry
+	)
+	INSERT INTO restrictions_standrestriction (stand_id, type)
+	SELECT DISTINCT c.id, parts.type
+	FROM (
+		SELECT rr.type, ST_Subdivide(rr.geometry, 256) AS geometry
+		FROM restrictions_restriction rr
+	) parts
+	JOIN created c ON (
+		c.geometry && parts.geometry AND
+		ST_Intersects(c.geometry, parts.geometry)
+	);
+
+	RETURN (
+		SELECT count(*)
+		FROM stands_stand ss
+		WHERE size = size_indicator
+	);
+END;
+$$ LANGUAGE plpgsql;
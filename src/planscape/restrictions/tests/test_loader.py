@@ -0,0 +1,122 @@
+from django.contrib.gis.geos import MultiPolygon, Polygon
+from django.db import connection
+from django.test import TestCase
+
+from restrictions.loader import compute_stand_restrictions
+from restrictions.models import Restriction, StandRestriction
+from stands.models import Stand, StandSizeChoices
+from stands.signals import stands_changed
+
+
+def square(x, y, side=1):
+    return Polygon(
+        ((x, y), (x, y + side), (x + side, y + side), (x + side, y), (x, y)),
+        srid=4269,
+    )
+
+
+class ComputeStandRestrictionsTest(TestCase):
+    def setUp(self):
+        self.stands = [
+            Stand.objects.create(
+                size=StandSizeChoices.LARGE, geometry=square(i, 0), area_m2=1
+            )
+            for i in range(3)
+        ]
+        Restriction.objects.create(
+            type="WILDERNESS_AREA", geometry=MultiPolygon([square(0.5, 0.5, 0.2)])
+        )
+        Restriction.objects.create(
+            type="TRIBAL_LANDS", geometry=MultiPolygon([square(2.5, 0.5, 0.2)])
+        )
+
+    def test_records_the_intersecting_stands(self):
+        self.assertEqual(compute_stand_restrictions("WILDERNESS_AREA"), 1)
+
+        self.assertEqual(
+            list(StandRestriction.objects.values_list("stand_id", "type")),
+            [(self.stands[0].pk, "WILDERNESS_AREA")],
+        )
+
+    def test_replaces_the_records_of_the_type(self):
+        compute_stand_restrictions("WILDERNESS_AREA")
+        compute_stand_restrictions("TRIBAL_LANDS")
+        Restriction.objects.filter(type="WILDERNESS_AREA").update(
+            geometry=MultiPolygon([square(1.5, 0.5, 0.2)])
+        )
+
+        compute_stand_restrictions("WILDERNESS_AREA")
+
+        self.assertEqual(
+            sorted(StandRestriction.objects.values_list("stand_id", "type")),
+            [
+                (self.stands[1].pk, "WILDERNESS_AREA"),
+                (self.stands[2].pk, "TRIBAL_LANDS"),
+            ],
+        )
+
+    def test_records_the_stands_of_a_size(self):
+        compute_stand_restrictions("WILDERNESS_AREA")
+        medium = Stand.objects.create(
+            size=StandSizeChoices.MEDIUM, geometry=square(0.4, 0.4, 0.5), area_m2=1
+        )
+
+        self.assertEqual(
+            compute_stand_restrictions("WILDERNESS_AREA", StandSizeChoices.MEDIUM), 1
+        )
+        self.assertEqual(
+            sorted(StandRestriction.objects.values_list("stand_id", flat=True)),
+            [self.stands[0].pk, medium.pk],
+        )
+
+
+class StandsChangedTest(TestCase):
+    def test_stands_created_after_the_restrictions_are_recorded(self):
+        Restriction.objects.create(
+            type="WILDERNESS_AREA", geometry=MultiPolygon([square(0.5, 0.5, 0.2)])
+        )
+        Restriction.objects.create(
+            type="TRIBAL_LANDS", geometry=MultiPolygon([square(2.5, 0.5, 0.2)])
+        )
+        compute_stand_restrictions("WILDERNESS_AREA")
+        compute_stand_restrictions("TRIBAL_LANDS")
+        stands = [
+            Stand.objects.create(
+                size=StandSizeChoices.SMALL, geometry=square(i, 0), area_m2=1
+            )
+            for i in range(3)
+        ]
+
+        stands_changed.send(sender=None, size=StandSizeChoices.SMALL)
+
+        self.assertEqual(
+            sorted(StandRestriction.objects.values_list("stand_id", "type")),
+            [
+                (stands[0].pk, "WILDERNESS_AREA"),
+                (stands[2].pk, "TRIBAL_LANDS"),
+            ],
+        )
+
+    def test_stands_created_in_sql_are_recorded(self):
+        area = Polygon(
+            ((0, 0), (0, 1000), (1000, 1000), (1000, 0), (0, 0)), srid=5070
+        ).transform(4269, clone=True)
+        restriction = Restriction.objects.create(
+            type="WILDERNESS_AREA", geometry=MultiPolygon([area])
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT create_stands("
+                "ST_MakeEnvelope(-2000, -2000, 2000, 2000, 5070), 300, %s, FALSE)",
+                [StandSizeChoices.SMALL],
+            )
+
+        restricted = Stand.objects.filter(
+            size=StandSizeChoices.SMALL, geometry__intersects=restriction.geometry
+        )
+        self.assertTrue(restricted.exists())
+        self.assertEqual(
+            sorted(StandRestriction.objects.values_list("stand_id", flat=True)),
+            sorted(restricted.values_list("id", flat=True)),
+        )
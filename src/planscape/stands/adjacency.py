@@ -0,0 +1,192 @@
+"""Neighbour graphs of stands.
+
+The stands of a size are cells of a hex grid (see stands/hexgrid.py), so
+the neighbours of a stand are the stands of the six cells around its
+cell, found by looking up their (i, j) coordinates instead of intersecting
+polygons.
+
+A graph is stored in compressed sparse row (CSR) form, in a folder per
+stand size and save, behind a symlink per stand size (`small`, ...):
+
+- `ids.npy`: the stand ids, sorted;
+- `indptr.npy`: the neighbours of the stand `ids[n]` are at
+  `indices[indptr[n]:indptr[n + 1]]`;
+- `indices.npy`: positions of the neighbours in `ids`.
+
+`save_adjacency` switches the symlink to the new folder at once, so readers
+see either the previous or the new graph, never a mix of both.
+`load_adjacency` maps the arrays read-only, so workers share them through
+the OS page cache.
+"""
+
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+
+ADJACENCY_VERSION = 1
+
+# (di, dj) of the neighbours of a cell in an even and in an odd column;
+# odd columns are shifted up by half a cell.
+EVEN_COLUMN_NEIGHBOURS = [(0, -1), (0, 1), (-1, -1), (-1, 0), (1, -1), (1, 0)]
+ODD_COLUMN_NEIGHBOURS = [(0, -1), (0, 1), (-1, 0), (-1, 1), (1, 0), (1, 1)]
+
+ARRAYS = ["ids", "indptr", "indices"]
+
+
+def _cell_keys(i, j) -> np.ndarray:
+    return (np.asarray(i, dtype="int64") << 32) + (
+        np.asarray(j, dtype="int64") + (1 << 31)
+    )
+
+
+def build_adjacency(ids, hex_i, hex_j):
+    """Builds the neighbour graph of stands from their cells.
+
+    Returns:
+      (ids, indptr, indices), as described in the module docstring.
+    """
+    ids = np.asarray(ids, dtype="int64")
+    order = np.argsort(ids)
+    ids = ids[order]
+    hex_i = np.asarray(hex_i, dtype="int64")[order]
+    hex_j = np.asarray(hex_j, dtype="int64")[order]
+    if not len(ids):
+        return ids, np.zeros(1, dtype="int64"), np.zeros(0, dtype="int32")
+
+    keys = _cell_keys(hex_i, hex_j)
+    by_key = np.argsort(keys)
+    sorted_keys = keys[by_key]
+
+    odd = hex_i % 2 == 1
+    sources, targets = [], []
+    for even_offset, odd_offset in zip(EVEN_COLUMN_NEIGHBOURS, ODD_COLUMN_NEIGHBOURS):
+        di = np.where(odd, odd_offset[0], even_offset[0])
+        dj = np.where(odd, odd_offset[1], even_offset[1])
+        wanted = _cell_keys(hex_i + di, hex_j + dj)
+        found = np.searchsorted(sorted_keys, wanted)
+        found[found == len(sorted_keys)] = 0
+        exists = sorted_keys[found] == wanted
+        sources.append(np.flatnonzero(exists))
+        targets.append(by_key[found[exists]])
+
+    sources = np.concatenate(sources)
+    targets = np.concatenate(targets)
+    edges = np.lexsort((targets, sources))
+    indptr = np.zeros(len(ids) + 1, dtype="int64")
+    np.cumsum(np.bincount(sources, minlength=len(ids)), out=indptr[1:])
+    return ids, indptr, targets[edges].astype("int32")
+
+
+def get_adjacency_path(folder, size) -> Path:
+    return Path(folder) / str(size).lower()
+
+
+def save_adjacency(folder, size, ids, indptr, indices) -> Path:
+    """Writes a graph, replacing the previous graph of the size.
+
+    The previous folder is kept for the readers still resolving it; older
+    ones are removed.
+    """
+    path = get_adjacency_path(folder, size)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    saved = path.parent / f"{path.name}.{time.time_ns()}"
+    saved.mkdir()
+    for name, array in zip(ARRAYS, [ids, indptr, indices]):
+        np.save(saved / f"{name}.npy", array)
+    metadata = {
+        "version": ADJACENCY_VERSION,
+        "size": str(size),
+        "stands": int(len(ids)),
+        "edges": int(len(indices)),
+    }
+    with open(saved / "metadata.json", "w") as f:
+        json.dump(metadata, f)
+
+    previous = None
+    if path.is_symlink():
+        previous = os.readlink(path)
+    elif path.is_dir():
+        # a graph saved in place, before folders were switched.
+        previous = f"{path.name}.0"
+        os.replace(path, path.parent / previous)
+    link = path.parent / f"{path.name}.link"
+    if link.is_symlink():
+        link.unlink()
+    os.symlink(saved.name, link)
+    os.replace(link, path)
+
+    for old in path.parent.glob(f"{path.name}.*"):
+        suffix = old.name[len(path.name) + 1 :]
+        if suffix.isdigit() and old.name not in (saved.name, previous):
+            shutil.rmtree(old, ignore_errors=True)
+    return path
+
+
+class StandAdjacency:
+    """A neighbour graph of stands, keyed by `Stand.id`."""
+
+    def __init__(self, ids: np.ndarray, indptr: np.ndarray, indices: np.ndarray):
+        self.ids = ids
+        self.indptr = indptr
+        self.indices = indices
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def positions(self, stand_ids) -> np.ndarray:
+        """Returns the positions of stands in `ids`. Raises a KeyError for
+        stands that are not in the graph.
+        """
+        stand_ids = np.atleast_1d(np.asarray(stand_ids, dtype="int64"))
+        positions = np.searchsorted(self.ids, stand_ids)
+        missing = (positions == len(self.ids)) | (
+            self.ids[np.minimum(positions, len(self.ids) - 1)] != stand_ids
+        )
+        if missing.any():
+            raise KeyError(f"Stands not in the graph: {stand_ids[missing].tolist()}")
+        return positions
+
+    def neighbours(self, stand_id: int) -> np.ndarray:
+        """Returns the ids of the neighbours of a stand."""
+        (position,) = self.positions(stand_id)
+        return self.ids[self.indices[self.indptr[position] : self.indptr[position + 1]]]
+
+    def expand(self, stand_ids: Iterable[int], steps: int = 1) -> np.ndarray:
+        """Returns the ids of the stands at most `steps` neighbours away
+        from `stand_ids`, these included.
+        """
+        reached = np.zeros(len(self.ids), dtype=bool)
+        frontier = self.positions(list(stand_ids))
+        reached[frontier] = True
+        for _ in range(steps):
+            starts = self.indptr[frontier]
+            counts = self.indptr[frontier + 1] - starts
+            offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+            neighbours = self.indices[offsets + np.arange(counts.sum())]
+            frontier = np.unique(neighbours[~reached[neighbours]])
+            if not frontier.size:
+                break
+            reached[frontier] = True
+        return self.ids[reached]
+
+
+def load_adjacency(folder, size) -> StandAdjacency:
+    """Maps the graph of a stand size read-only."""
+    # every array is read from the same save, even if the graph is replaced
+    # meanwhile.
+    path = get_adjacency_path(folder, size).resolve()
+    try:
+        with open(path / "metadata.json") as f:
+            metadata = json.load(f)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"No stand adjacency for {size} in {folder}.")
+    if metadata.get("version") != ADJACENCY_VERSION:
+        raise ValueError(f"Stand adjacency in {path} is out of date.")
+    return StandAdjacency(
+        *(np.load(path / f"{name}.npy", mmap_mode="r") for name in ARRAYS)
+    )
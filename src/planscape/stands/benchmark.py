@@ -0,0 +1,264 @@
+"""Zonal statistics benchmarks on synthetic data.
+
+Generates GeoTIFFs (a float raster with NaN nodata and an integer
+categorical raster) and hexagonal stand grids, and measures the engines
+that compute stand metrics on them:
+
+- `stand`: `stands.stats.get_zonal_stats`, one stand at a time, reading
+  from a dataset kept open, as `calculate_metrics` does.
+- `memmap`: the same, reading from a memory-mapped copy of the raster
+  (`stands.raster_cache`). Making the copy counts as reading.
+- `label`: `stands.zonal`, rasterizing the stands once and reducing the
+  raster strip by strip.
+
+Every case runs in a fresh process, so its peak RSS is not inflated by
+the previous cases.
+"""
+
+import math
+import platform
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Iterable, Tuple
+
+import numpy as np
+import rasterio
+from rasterio.transform import from_origin
+from shapely import STRtree
+from shapely.geometry import Polygon, box
+
+from stands.raster_cache import get_cached_raster, open_cached_raster
+from stands.stats import get_zonal_stats
+from stands.zonal import (
+    build_label_raster,
+    get_label_raster_path,
+    get_label_zonal_stats,
+)
+from utils.timing import PhaseTimer
+
+ENGINES = ["stand", "memmap", "label"]
+
+RASTER_KINDS = ["float", "categorical"]
+
+RESULTS_VERSION = 1
+
+# EPSG:3857 origin of the synthetic rasters, over the Sierra Nevada.
+ORIGIN = (-13400000, 4700000)
+
+CATEGORICAL_NODATA = 255
+
+
+def hexagon(x, y, length) -> Polygon:
+    return Polygon(
+        [
+            (
+                x + length * math.cos(math.radians(a)),
+                y + length * math.sin(math.radians(a)),
+            )
+            for a in range(0, 360, 60)
+        ]
+    )
+
+
+def hex_grid(bounds, length, first_id: int = 100) -> list[Tuple[int, Polygon]]:
+    """Returns (stand_id, polygon) pairs of flat-topped hexagons with sides
+    of `length`, covering `bounds`, column by column.
+    """
+    minx, miny, maxx, maxy = bounds
+    stands = []
+    stand_id = first_id
+    column = 0
+    x = minx
+    while x < maxx + length:
+        y = miny + (column % 2) * length * math.sqrt(3) / 2
+        while y < maxy + length:
+            stands.append((stand_id, hexagon(x, y, length)))
+            stand_id += 1
+            y += length * math.sqrt(3)
+        x += length * 1.5
+        column += 1
+    return stands
+
+
+def write_synthetic_raster(
+    path, kind: str, width: int, height: int, resolution: float, seed: int = 0
+) -> Path:
+    """Writes a tiled GeoTIFF with smooth values and patches of nodata.
+
+    `float` rasters are float32 with NaN nodata, `categorical` rasters are
+    uint8 classes 0-9 with 255 nodata.
+    """
+    rng = np.random.default_rng(seed)
+    rows, cols = np.mgrid[0:height, 0:width]
+    values = np.sin(rows / 37.0) + np.cos(cols / 53.0) + rng.random((height, width))
+    nodata_mask = rng.random((height, width)) < 0.1
+    nodata_mask[: height // 10, : width // 10] = True
+
+    if kind == "float":
+        array = values.astype("float32")
+        array[nodata_mask] = np.nan
+        nodata = np.nan
+    elif kind == "categorical":
+        array = np.clip(values * 3 + 2, 0, 9).astype("uint8")
+        array[nodata_mask] = CATEGORICAL_NODATA
+        nodata = CATEGORICAL_NODATA
+    else:
+        raise ValueError(f"Unknown raster kind {kind}.")
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with rasterio.open(
+        path,
+        "w",
+        driver="GTiff",
+        height=height,
+        width=width,
+        count=1,
+        dtype=array.dtype,
+        crs="EPSG:3857",
+        transform=from_origin(*ORIGIN, resolution, resolution),
+        nodata=nodata,
+        tiled=True,
+        blockxsize=256,
+        blockysize=256,
+    ) as dst:
+        dst.write(array, 1)
+    return path
+
+
+def get_raster_stands(raster_path, length: float) -> list[Tuple[int, Polygon]]:
+    with rasterio.open(raster_path) as src:
+        return hex_grid(tuple(src.bounds), length)
+
+
+def _count_stands_with_data(src, stands, timer: PhaseTimer) -> int:
+    count = 0
+    for _, geometry in stands:
+        stats = get_zonal_stats(stand_geometry=geometry, raster=src, timer=timer)
+        count += stats["count"] > 0
+    return count
+
+
+def run_stand_engine(raster_path, stands, folder, timer: PhaseTimer) -> int:
+    with rasterio.open(raster_path) as src:
+        return _count_stands_with_data(src, stands, timer)
+
+
+def run_memmap_engine(raster_path, stands, folder, timer: PhaseTimer) -> int:
+    with timer.phase("read"):
+        src = open_cached_raster(get_cached_raster(raster_path, folder / "cache"))
+    return _count_stands_with_data(src, stands, timer)
+
+
+def run_label_engine(raster_path, stands, folder, timer: PhaseTimer) -> int:
+    tree = STRtree([geometry for _, geometry in stands])
+
+    def fetch_stands(bounds):
+        return [
+            (stands[i][0], stands[i][1].wkb)
+            for i in tree.query(box(*bounds), predicate="intersects")
+        ]
+
+    with rasterio.open(raster_path) as src:
+        profile = src.profile
+    label_path = get_label_raster_path(folder, f"bench{len(stands)}", profile)
+    with timer.phase("rasterize"):
+        build_label_raster(label_path, profile, fetch_stands)
+    return sum(1 for _ in get_label_zonal_stats(label_path, raster_path, timer=timer))
+
+
+RUNNERS = {
+    "stand": run_stand_engine,
+    "memmap": run_memmap_engine,
+    "label": run_label_engine,
+}
+
+
+def run_case(engine: str, raster_path, length: float, folder) -> dict:
+    """Runs one engine on one raster and stand size, in the current process."""
+    stands = get_raster_stands(raster_path, length)
+    timer = PhaseTimer()
+    start = time.perf_counter()
+    with_data = RUNNERS[engine](raster_path, stands, Path(folder), timer)
+    seconds = time.perf_counter() - start
+    return {
+        "stands": len(stands),
+        "stands_with_data": with_data,
+        "seconds": seconds,
+        "stands_per_second": len(stands) / seconds if seconds > 0 else None,
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+        "peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        * (1 if sys.platform == "darwin" else 1024),
+        "phases": {
+            phase: timer.totals.get(phase, 0.0)
+            for phase in ["read", "rasterize", "reduce"]
+        },
+    }
+
+
+def run_benchmarks(
+    folder,
+    stand_lengths: dict,
+    kinds: Iterable[str] = RASTER_KINDS,
+    engines: Iterable[str] = ENGINES,
+    width: int = 1000,
+    height: int = 1000,
+    resolution: float = 30,
+    write=print,
+) -> dict:
+    """Runs every (stand size, raster kind, engine) case.
+
+    Args:
+      folder: Where synthetic rasters and label rasters are written.
+      stand_lengths: Hexagon side length in meters, keyed by stand size.
+
+    Returns:
+      The results, ready to be dumped as JSON.
+    """
+    folder = Path(folder)
+    rasters = {
+        kind: write_synthetic_raster(
+            folder / f"{kind}_{width}x{height}.tif", kind, width, height, resolution
+        )
+        for kind in kinds
+    }
+
+    results = []
+    context = get_context("spawn")
+    for size, length in stand_lengths.items():
+        for kind, raster_path in rasters.items():
+            for engine in engines:
+                with ProcessPoolExecutor(1, mp_context=context) as executor:
+                    result = executor.submit(
+                        run_case, engine, str(raster_path), length, str(folder)
+                    ).result()
+                result.update({"size": size, "raster": kind, "engine": engine})
+                results.append(result)
+                write(
+                    f"[OK] {size} {kind} {engine}: "
+                    f"{result['stands_per_second']:.1f} stands/s, "
+                    f"peak RSS {result['peak_rss_bytes'] / 2**20:.0f} MiB, "
+                    + ", ".join(
+                        f"{phase} {seconds:.2f}s"
+                        for phase, seconds in result["phases"].items()
+                    )
+                )
+
+    return {
+        "version": RESULTS_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "rasterio": rasterio.__version__,
+            "gdal": rasterio.__gdal_version__,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+        },
+        "raster": {"width": width, "height": height, "resolution": resolution},
+        "results": results,
+    }
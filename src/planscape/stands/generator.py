@@ -0,0 +1,94 @@
+"""Generation of hexagonal stands, tile by tile.
+
+`sql/create_stands.sql` inserts every stand of a size over the whole
+extent in a single statement. Here the hex grid of a size (see
+stands/hexgrid.py) is split into tiles of cells: the stands of a tile are
+generated with NumPy and loaded on their own (see the `create_stands`
+command). Tiles are aligned on multiples of their size in cells, so a cell
+always belongs to the same tile, and a tile can be loaded again without
+duplicating its stands.
+"""
+
+import io
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+import shapely
+from shapely.geometry import box
+from shapely.geometry.base import BaseGeometry
+
+from stands.hexgrid import SQRT3, bbox_ranges, hexagons, overlaps_bbox
+from stands.hilbert import HILBERT_EXTENT
+
+# Extent covering California, in EPSG:5070, as in sql/create_200ha_stands.sql.
+STANDS_EXTENT = HILBERT_EXTENT
+
+
+class Tile(NamedTuple):
+    """The cells i0 <= i < i1, j0 <= j < j1 of a hex grid."""
+
+    i0: int
+    j0: int
+    i1: int
+    j1: int
+
+    def bounds(self, length: float) -> Tuple[float, float, float, float]:
+        height = SQRT3 * length
+        return (
+            1.5 * length * self.i0 - length,
+            height * self.j0 - height / 2,
+            1.5 * length * (self.i1 - 1) + length,
+            height * (self.j1 - 1) + height,
+        )
+
+
+def get_tiles(
+    extent, length: float, tile_cells: int, clip: Optional[BaseGeometry] = None
+) -> list[Tile]:
+    """Returns the tiles of `tile_cells` x `tile_cells` cells holding the
+    cells intersecting `extent`, and `clip` if given.
+    """
+    i_start, i_stop, j_start, j_stop = bbox_ranges(extent, length)
+    tiles = [
+        Tile(i, j, i + tile_cells, j + tile_cells)
+        for i in range(i_start // tile_cells * tile_cells, i_stop, tile_cells)
+        for j in range(j_start // tile_cells * tile_cells, j_stop, tile_cells)
+    ]
+    if clip is None or not tiles:
+        return tiles
+    boxes = shapely.box(*np.array([tile.bounds(length) for tile in tiles]).T)
+    return [tile for tile, keep in zip(tiles, shapely.intersects(boxes, clip)) if keep]
+
+
+def get_tile_stands(
+    tile: Tile, extent, length: float, clip: Optional[BaseGeometry] = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Returns the cells (i, j) of a tile intersecting `extent`, and `clip`
+    if given, with their hexagons.
+    """
+    i, j = (
+        a.ravel()
+        for a in np.meshgrid(
+            np.arange(tile.i0, tile.i1), np.arange(tile.j0, tile.j1), indexing="ij"
+        )
+    )
+    keep = overlaps_bbox(i, j, extent, length)
+    i, j = i[keep], j[keep]
+    polygons = hexagons(i, j, length)
+    keep = shapely.intersects(polygons, box(*extent))
+    if clip is not None:
+        keep &= shapely.intersects(polygons, clip)
+    return i[keep], j[keep], polygons[keep]
+
+
+def write_stands(buffer: io.StringIO, i, j, polygons, length: float) -> None:
+    """Writes stands as CSV rows of (hex_i, hex_j, geometry, area_m2), the
+    geometry being hex encoded WKB in EPSG:5070.
+    """
+    # the same rounding as sql/create_stands.sql
+    area = round(3 * SQRT3 / 2 * length**2, 2)
+    wkbs = shapely.to_wkb(polygons, hex=True)
+    buffer.writelines(
+        f"{ci},{cj},{wkb},{area}\n"
+        for ci, cj, wkb in zip(i.tolist(), j.tolist(), wkbs.tolist())
+    )
@@ -0,0 +1,138 @@
+"""Arithmetic on the hexagon grids of stands.
+
+Stands are the cells of `ST_HexagonGrid(length, extent)` in EPSG:5070 (see
+`sql/create_stands.sql`). PostGIS anchors that grid at the origin of the
+CRS, so every cell is identified by its column `i` and row `j`, whatever
+the extent used to create it:
+
+- the center of cell (i, j) is (1.5 * length * i, height * j), shifted up
+  by half a height when i is odd, where height = sqrt(3) * length;
+- the cells are flat-topped hexagons with sides of `length`.
+
+`Stand.hex_i` and `Stand.hex_j` hold these coordinates, so the stands
+overlapping a geometry can be found with index lookups instead of
+intersecting every stand polygon.
+"""
+
+import math
+from typing import Tuple
+
+import numpy as np
+import shapely
+from shapely.geometry import Polygon
+from shapely.geometry.base import BaseGeometry
+
+HEX_GRID_SRID = 5070
+
+SQRT3 = math.sqrt(3)
+
+# Vertices of a cell relative to its center, in units of (length, height),
+# in the order used by PostGIS.
+HEX_X = np.array([-1.0, -0.5, 0.5, 1.0, 0.5, -0.5, -1.0])
+HEX_Y = np.array([0.0, -0.5, -0.5, 0.0, 0.5, 0.5, 0.0])
+
+Cells = Tuple[np.ndarray, np.ndarray]
+
+
+def cell_centers(i, j, length: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the centers of cells (i, j)."""
+    i = np.asarray(i, dtype="int64")
+    j = np.asarray(j, dtype="int64")
+    height = SQRT3 * length
+    return 1.5 * length * i, height * j + (i % 2) * height / 2
+
+
+def hexagons(i, j, length: float) -> np.ndarray:
+    """Returns the polygons of cells (i, j), as an array of geometries."""
+    x, y = cell_centers(np.atleast_1d(i), np.atleast_1d(j), length)
+    coords = np.stack(
+        [
+            x[:, None] + length * HEX_X,
+            y[:, None] + SQRT3 * length * HEX_Y,
+        ],
+        axis=-1,
+    )
+    return shapely.polygons(coords)
+
+
+def hexagon(i: int, j: int, length: float) -> Polygon:
+    """Returns the polygon of cell (i, j)."""
+    return hexagons(i, j, length)[0]
+
+
+def point_cells(x, y, length: float) -> Cells:
+    """Returns the cells containing points (x, y)."""
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    # fractional axial coordinates, rounded to the nearest cell in cube
+    # coordinates (q + r + s = 0)
+    q = 2 / 3 * x / length
+    r = (-x / 3 + SQRT3 / 3 * y) / length
+    s = -q - r
+    rq, rr, rs = np.round(q), np.round(r), np.round(s)
+    dq, dr, ds = np.abs(rq - q), np.abs(rr - r), np.abs(rs - s)
+    fix_q = (dq > dr) & (dq > ds)
+    fix_r = ~fix_q & (dr > ds)
+    rq = np.where(fix_q, -rr - rs, rq)
+    rr = np.where(fix_r, -rq - rs, rr)
+    i = rq.astype("int64")
+    return i, rr.astype("int64") + i // 2
+
+
+def bbox_ranges(bounds, length: float) -> Tuple[int, int, int, int]:
+    """Returns the ranges of columns [i_start, i_stop) and rows
+    [j_start, j_stop) holding every cell intersecting `bounds`.
+    """
+    minx, miny, maxx, maxy = bounds
+    height = SQRT3 * length
+    return (
+        math.floor((minx - length) / (1.5 * length)),
+        math.ceil((maxx + length) / (1.5 * length)) + 1,
+        math.floor((miny - height) / height),
+        math.ceil((maxy + height) / height) + 1,
+    )
+
+
+def bbox_cells(bounds, length: float) -> Cells:
+    """Returns the cells whose bounding box intersects `bounds`, a superset
+    of the cells intersecting `bounds`.
+    """
+    i_start, i_stop, j_start, j_stop = bbox_ranges(bounds, length)
+    i, j = (
+        a.ravel()
+        for a in np.meshgrid(
+            np.arange(i_start, i_stop), np.arange(j_start, j_stop), indexing="ij"
+        )
+    )
+    keep = overlaps_bbox(i, j, bounds, length)
+    return i[keep], j[keep]
+
+
+def overlaps_bbox(i, j, bounds, length: float) -> np.ndarray:
+    """Returns whether the bounding boxes of cells (i, j) intersect `bounds`."""
+    minx, miny, maxx, maxy = bounds
+    height = SQRT3 * length
+    x, y = cell_centers(i, j, length)
+    return (
+        (x - length <= maxx)
+        & (x + length >= minx)
+        & (y - height / 2 <= maxy)
+        & (y + height / 2 >= miny)
+    )
+
+
+def polygon_cells(geometry: BaseGeometry, length: float) -> Tuple[Cells, Cells]:
+    """Splits the cells that may intersect a geometry, in EPSG:5070.
+
+    Returns:
+      (interior, boundary): the cells entirely inside the geometry, and the
+      cells within `length` of its boundary, which may or may not intersect
+      it and need an exact test. Other cells do not intersect the geometry.
+    """
+    i, j = bbox_cells(geometry.bounds, length)
+    x, y = cell_centers(i, j, length)
+    # a cell is within `length` of its center, so a cell farther than that
+    # from the boundary is either entirely inside or entirely outside.
+    near = shapely.distance(shapely.points(x, y), geometry.boundary) <= length
+    inside = ~near & shapely.contains_xy(geometry, x, y)
+    return (i[inside], j[inside]), (i[near], j[near])
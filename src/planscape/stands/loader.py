@@ -0,0 +1,332 @@
+"""Loads stand metrics into `stands_standmetric`.
+
+Metrics are streamed with COPY into one temporary staging table per
+condition, in batches of bounded size, and then upserted into
+`stands_standmetric` in a single transaction per condition. Reruns replace
+the previous metrics of a stand instead of failing on the
+`unique_stand_metric` constraint. When the metrics of only some stands are
+recomputed, the previous metrics of those stands that no longer have data
+are deleted in the same transaction.
+
+`stands_standmetric` is partitioned by condition and stand size (see
+`sql/partition_standmetric.sql`). When every metric of a condition and
+size is recomputed, the staged metrics are written to a new table that
+replaces the partition, instead of being upserted into it. The metrics
+loaded before partitioning are moved to the partitions, a condition at a
+time, by `move_unpartitioned_metrics`.
+"""
+
+import csv
+import io
+import json
+
+from django.db import connection, transaction
+
+METRIC_COLUMNS = [
+    "stand_id",
+    "condition_id",
+    "min",
+    "max",
+    "avg",
+    "sum",
+    "count",
+    "majority",
+    "minority",
+    "histogram",
+]
+
+CREATE_STAGING = """
+CREATE TEMPORARY TABLE IF NOT EXISTS {table} (
+    stand_id     BIGINT,
+    condition_id BIGINT,
+    min          DOUBLE PRECISION,
+    max          DOUBLE PRECISION,
+    avg          DOUBLE PRECISION,
+    sum          DOUBLE PRECISION,
+    count        INTEGER,
+    majority     DOUBLE PRECISION,
+    minority     DOUBLE PRECISION,
+    histogram    JSONB
+);
+TRUNCATE {table};
+"""
+
+# Staged metrics, with the size of their stand.
+INSERT_STAGED_METRICS = """
+INSERT INTO {target} (
+    created_at,
+    stand_id,
+    condition_id,
+    size,
+    min,
+    max,
+    avg,
+    sum,
+    count,
+    majority,
+    minority,
+    histogram
+)
+SELECT
+    timezone('utc', now()),
+    st.stand_id,
+    st.condition_id,
+    ss.size,
+    st.min,
+    st.max,
+    st.avg,
+    st.sum,
+    st.count,
+    st.majority,
+    st.minority,
+    st.histogram
+FROM {table} st
+JOIN stands_stand ss ON ss.id = st.stand_id
+"""
+
+UPSERT_METRICS = (
+    INSERT_STAGED_METRICS
+    + """WHERE NOT (ss.size = ANY(%(replace_sizes)s::VARCHAR[]))
+ON CONFLICT (stand_id, condition_id, size) DO UPDATE
+SET
+    created_at = EXCLUDED.created_at,
+    min = EXCLUDED.min,
+    max = EXCLUDED.max,
+    avg = EXCLUDED.avg,
+    sum = EXCLUDED.sum,
+    count = EXCLUDED.count,
+    majority = EXCLUDED.majority,
+    minority = EXCLUDED.minority,
+    histogram = EXCLUDED.histogram;
+"""
+)
+
+CREATE_PARTITION_TABLE = """
+DROP TABLE IF EXISTS {target};
+CREATE TABLE {target} (LIKE stands_standmetric INCLUDING DEFAULTS);
+"""
+
+LOAD_PARTITION_TABLE = INSERT_STAGED_METRICS + "WHERE ss.size = %(size)s;"
+
+DELETE_STALE_METRICS = """
+DELETE FROM stands_standmetric sm
+WHERE
+    sm.condition_id = %s AND
+    sm.stand_id = ANY(%s) AND
+    NOT EXISTS (SELECT 1 FROM {table} st WHERE st.stand_id = sm.stand_id);
+"""
+
+
+# Left by the migration partitioning stands_standmetric.
+UNPARTITIONED_TABLE = "stands_standmetric_unpartitioned"
+
+# Metrics already in the partitions were computed after those moved.
+MOVE_UNPARTITIONED_METRICS = f"""
+WITH moved AS (
+    DELETE FROM {UNPARTITIONED_TABLE}
+    WHERE condition_id = %(condition_id)s
+    RETURNING *
+)
+INSERT INTO stands_standmetric (
+    id,
+    created_at,
+    stand_id,
+    condition_id,
+    size,
+    min,
+    avg,
+    max,
+    sum,
+    count,
+    majority,
+    minority,
+    histogram
+)
+SELECT
+    sm.id,
+    sm.created_at,
+    sm.stand_id,
+    sm.condition_id,
+    ss.size,
+    sm.min,
+    sm.avg,
+    sm.max,
+    sm.sum,
+    sm.count,
+    sm.majority,
+    sm.minority,
+    sm.histogram
+FROM moved sm
+JOIN stands_stand ss ON ss.id = sm.stand_id
+ON CONFLICT (stand_id, condition_id, size) DO NOTHING
+"""
+
+
+def get_staging_table(condition_id) -> str:
+    return f"stand_metric_staging_{int(condition_id)}"
+
+
+def get_partition_table(condition_id, size) -> str:
+    return f"stand_metric_partition_{int(condition_id)}_{str(size).lower()}"
+
+
+class StandMetricLoader:
+    """Streams stand metrics into the database.
+
+    Usage:
+        loader = StandMetricLoader()
+        for stand_id, stats in results:
+            loader.write(stand_id, condition_id, stats)
+        loader.commit(condition_id)
+    """
+
+    def __init__(self, batch_size: int = 10000, using=connection):
+        self.batch_size = batch_size
+        self.connection = using
+        self._buffers: dict[int, io.StringIO] = {}
+        self._pending: dict[int, int] = {}
+
+    def write(self, stand_id: int, condition_id: int, stats: dict) -> None:
+        """Adds the metric of a stand. `stats` has the keys returned by
+        `get_zonal_stats`, `histogram` being optional.
+        """
+        buffer = self._buffers.get(condition_id)
+        if buffer is None:
+            buffer = self._open(condition_id)
+
+        histogram = stats.get("histogram")
+        if histogram is not None:
+            histogram = json.dumps(histogram)
+        csv.writer(buffer).writerow(
+            [
+                stand_id,
+                condition_id,
+                stats["min"],
+                stats["max"],
+                stats["mean"],
+                stats["sum"],
+                stats["count"],
+                stats["majority"],
+                stats["minority"],
+                histogram,
+            ]
+        )
+        self._pending[condition_id] += 1
+        if self._pending[condition_id] >= self.batch_size:
+            self.flush(condition_id)
+
+    def _open(self, condition_id: int) -> io.StringIO:
+        with self.connection.cursor() as cursor:
+            cursor.execute(CREATE_STAGING.format(table=get_staging_table(condition_id)))
+        self._pending[condition_id] = 0
+        buffer = self._buffers[condition_id] = io.StringIO()
+        return buffer
+
+    def flush(self, condition_id: int) -> None:
+        """Copies the buffered metrics of a condition to its staging table."""
+        buffer = self._buffers.get(condition_id)
+        if buffer is None or self._pending[condition_id] == 0:
+            return
+        buffer.seek(0)
+        with self.connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {get_staging_table(condition_id)} ({', '.join(METRIC_COLUMNS)}) "
+                "FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+        buffer.seek(0)
+        buffer.truncate()
+        self._pending[condition_id] = 0
+
+    def commit(self, condition_id: int, replace_stands=None, replace_sizes=None) -> int:
+        """Upserts the staged metrics of a condition into `stands_standmetric`
+        in a single transaction.
+
+        Args:
+          replace_stands: ids of the stands whose metrics were recomputed.
+            Their previous metrics are deleted if they were not staged again.
+          replace_sizes: stand sizes whose metrics were all recomputed. Their
+            partitions are replaced by the staged metrics.
+
+        Returns:
+          The number of metrics upserted.
+        """
+        replace_sizes = [str(size) for size in replace_sizes or []]
+        if condition_id not in self._buffers:
+            if not replace_stands and not replace_sizes:
+                return 0
+            self._open(condition_id)
+        self.flush(condition_id)
+        table = get_staging_table(condition_id)
+        with transaction.atomic(using=self.connection.alias):
+            with self.connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT stand_metric_partition(%s, NULL)", [condition_id]
+                )
+                if replace_stands:
+                    cursor.execute(
+                        DELETE_STALE_METRICS.format(table=table),
+                        [condition_id, [int(i) for i in replace_stands]],
+                    )
+                cursor.execute(
+                    UPSERT_METRICS.format(target="stands_standmetric", table=table),
+                    {"replace_sizes": replace_sizes},
+                )
+                upserted = cursor.rowcount
+                for size in replace_sizes:
+                    target = get_partition_table(condition_id, size)
+                    cursor.execute(CREATE_PARTITION_TABLE.format(target=target))
+                    cursor.execute(
+                        LOAD_PARTITION_TABLE.format(target=target, table=table),
+                        {"size": size},
+                    )
+                    upserted += cursor.rowcount
+                    cursor.execute(
+                        "SELECT replace_stand_metric_partition(%s, %s, %s)",
+                        [condition_id, size, target],
+                    )
+                cursor.execute(f"DROP TABLE {table};")
+        del self._buffers[condition_id]
+        del self._pending[condition_id]
+        return upserted
+
+
+def get_unpartitioned_condition_ids() -> list[int]:
+    """Returns the conditions with metrics left to move to the partitions,
+    or [] once they were all moved.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s)", [UNPARTITIONED_TABLE])
+        if cursor.fetchone()[0] is None:
+            return []
+        cursor.execute(
+            f"SELECT DISTINCT condition_id FROM {UNPARTITIONED_TABLE} ORDER BY 1"
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def move_unpartitioned_metrics(condition_id) -> int:
+    """Moves the metrics of a condition loaded before stands_standmetric was
+    partitioned to its partitions, in one transaction.
+
+    Returns:
+      the number of metrics moved.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SELECT stand_metric_partition(%s, NULL)", [condition_id])
+        cursor.execute(MOVE_UNPARTITIONED_METRICS, {"condition_id": condition_id})
+        return cursor.rowcount
+
+
+def drop_unpartitioned_metrics() -> bool:
+    """Drops the table of the metrics loaded before partitioning, if every
+    metric was moved.
+
+    Returns:
+      True if the table was dropped.
+    """
+    if get_unpartitioned_condition_ids():
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {UNPARTITIONED_TABLE}")
+    return True
@@ -0,0 +1,86 @@
+import json
+import tempfile
+
+from django.core.management.base import BaseCommand
+from stands.benchmark import ENGINES, RASTER_KINDS, run_benchmarks
+from stands.models import STAND_LENGTH_METERS, StandSizeChoices
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks zonal statistics engines on synthetic rasters and hexagonal "
+        "stand grids, and writes the results as JSON."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--size",
+            nargs="+",
+            type=str,
+            choices=StandSizeChoices.values,
+            default=StandSizeChoices.values,
+            help="One or more stand sizes.",
+        )
+
+        parser.add_argument(
+            "--raster",
+            nargs="+",
+            type=str,
+            choices=RASTER_KINDS,
+            default=RASTER_KINDS,
+        )
+
+        parser.add_argument(
+            "--engine",
+            nargs="+",
+            type=str,
+            choices=ENGINES,
+            default=ENGINES,
+        )
+
+        parser.add_argument(
+            "--width",
+            type=int,
+            default=1000,
+            help="Width of the synthetic rasters, in pixels.",
+        )
+
+        parser.add_argument(
+            "--height",
+            type=int,
+            default=1000,
+            help="Height of the synthetic rasters, in pixels.",
+        )
+
+        parser.add_argument("--resolution", type=float, default=30)
+
+        parser.add_argument(
+            "--folder",
+            type=str,
+            default=None,
+            help="Where synthetic rasters are written. Defaults to a temporary folder.",
+        )
+
+        parser.add_argument(
+            "--output",
+            type=str,
+            default="zonal_stats_benchmark.json",
+            help="Results file.",
+        )
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as tmp_folder:
+            results = run_benchmarks(
+                options.get("folder") or tmp_folder,
+                {size: STAND_LENGTH_METERS[size] for size in options.get("size")},
+                kinds=options.get("raster"),
+                engines=options.get("engine"),
+                width=options.get("width"),
+                height=options.get("height"),
+                resolution=options.get("resolution"),
+                write=self.stdout.write,
+            )
+
+        with open(options.get("output"), "w") as f:
+            json.dump(results, f, indent=2)
+        self.stdout.write(f"[OK] Results written to {options.get('output')}")
@@ -0,0 +1,58 @@
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from stands.adjacency import build_adjacency, save_adjacency
+from stands.models import Stand, StandSizeChoices
+
+
+class Command(BaseCommand):
+    help = (
+        "Builds the neighbour graph of the stands of each size from their hex "
+        "grid cells, and saves it as memory-mappable CSR arrays."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--size",
+            nargs="+",
+            type=str,
+            choices=StandSizeChoices.values,
+            default=StandSizeChoices.values,
+            help="One or more stand sizes.",
+        )
+
+        parser.add_argument(
+            "--folder",
+            type=str,
+            default=settings.STAND_ADJACENCY_DIR,
+            help="Folder where the graphs are saved.",
+        )
+
+        parser.add_argument("--batch-size", type=int, default=100000)
+
+    def get_cells(self, size, batch_size):
+        cells = (
+            Stand.objects.filter(size=size, hex_i__isnull=False)
+            .values_list("id", "hex_i", "hex_j")
+            .iterator(chunk_size=batch_size)
+        )
+        array = np.fromiter(
+            cells, dtype=[("id", "int64"), ("i", "int64"), ("j", "int64")]
+        )
+        return array["id"], array["i"], array["j"]
+
+    def handle(self, *args, **options):
+        start = time.time()
+        for size in options.get("size"):
+            start_size = time.time()
+            ids, indptr, indices = build_adjacency(
+                *self.get_cells(size, options.get("batch_size"))
+            )
+            path = save_adjacency(options.get("folder"), size, ids, indptr, indices)
+            self.stdout.write(
+                f"[OK] {size}: {len(ids)} stands, {len(indices) // 2} edges, "
+                f"saved to {path} in {time.time() - start_size:.1f}s."
+            )
+        self.stdout.write(f"[OK] TOTAL RUNTIME {time.time() - start}")
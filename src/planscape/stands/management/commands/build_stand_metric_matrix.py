@@ -0,0 +1,88 @@
+import time
+
+from base.region_name import RegionName
+from conditions.models import Condition
+from django.core.management.base import BaseCommand
+from stands.matrix import (
+    MATRIX_STATISTICS,
+    build_matrix,
+    get_forsys_condition_names,
+    get_matrix_table,
+)
+from stands.models import StandSizeChoices
+
+
+class Command(BaseCommand):
+    help = (
+        "Builds the wide stand metric matrix of a region for each stand size: "
+        "a table with one row per stand and one column per condition and "
+        "statistic, replacing the previous matrix. By default, it holds the "
+        "statistic forsys reads for each condition forsys can request."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--region",
+            type=str,
+            required=True,
+            choices=[region.value for region in RegionName],
+        )
+
+        parser.add_argument(
+            "--size",
+            nargs="+",
+            type=str,
+            choices=StandSizeChoices.values,
+            default=StandSizeChoices.values,
+            help="One or more stand sizes.",
+        )
+
+        parser.add_argument(
+            "--condition-ids",
+            nargs="+",
+            type=int,
+            help=(
+                "Conditions of the matrix. Defaults to the conditions of the "
+                "region in its treatment goals and restrictions."
+            ),
+        )
+
+        parser.add_argument(
+            "--statistics",
+            nargs="+",
+            type=str,
+            choices=MATRIX_STATISTICS,
+            help=(
+                "Statistics of each condition in the matrix. Defaults to the "
+                "statistic forsys reads for each condition."
+            ),
+        )
+
+    def get_condition_ids(self, region, condition_ids=None):
+        qs = Condition.objects.filter(condition_dataset__region_name=region)
+        if condition_ids:
+            qs = qs.filter(id__in=condition_ids)
+        else:
+            qs = qs.filter(
+                condition_dataset__condition_name__in=get_forsys_condition_names(region)
+            )
+        return list(qs.order_by("id").values_list("id", flat=True))
+
+    def handle(self, *args, **options):
+        start = time.time()
+        region = options.get("region")
+        statistics = options.get("statistics")
+        condition_ids = self.get_condition_ids(region, options.get("condition_ids"))
+        if not condition_ids:
+            self.stderr.write(f"No conditions found for {region}.")
+            return
+
+        columns = len(condition_ids) * (len(statistics) if statistics else 1)
+        for size in options.get("size"):
+            start_size = time.time()
+            stands = build_matrix(region, size, condition_ids, statistics)
+            self.stdout.write(
+                f"[OK] {get_matrix_table(region, size)}: {stands} stands, "
+                f"{columns} columns in {time.time() - start_size:.1f}s."
+            )
+        self.stdout.write(f"[OK] TOTAL RUNTIME {time.time() - start}")
@@ -1,31 +1,161 @@
-import json
+import argparse
+import math
 import multiprocessing
+from contextlib import ExitStack
 from pathlib import Path
 import time
-from itertools import repeat
+from functools import partial
+from typing import NamedTuple
 
 import rasterio
 from conditions.models import Condition
 from conditions.registry import get_raster_path
-from django.contrib.gis.db.models.functions import AsWKT, Transform
+from django.contrib.gis.db.models.functions import AsWKB, Transform
 from django.contrib.gis.geos import GEOSGeometry
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from stands.stats import get_zonal_stats
-from stands.models import Stand
+from stands.loader import StandMetricLoader
+from stands.matrix import get_forsys_condition_names, refresh_matrix
+from stands.manifest import (
+    compute_manifest,
+    get_changed_windows,
+    get_manifest_path,
+    load_manifest,
+    save_manifest,
+)
+from stands.models import Stand, StandMetricCheckpoint, geometry_field_for
+from stands.raster_cache import get_cached_raster, open_cached_raster
+from stands.zonal import (
+    build_label_raster,
+    get_grid_key,
+    get_label_raster_path,
+    get_multi_label_zonal_stats,
+    get_window_stand_ids,
+)
 from django.conf import settings
+from utils.pool_utils import imap_bounded
+from utils.progress import ProgressReporter
+from shapely import wkb
 from shapely.geometry import box
+from shapely.ops import unary_union
 
+CSV_HEADER = "stand_id,condition_id,min,max,avg,sum,count,majority,minority\n"
 
-def calculate_metric(stand, condition_id, raster):
-    stand_id, geometry = stand
-    stats = get_zonal_stats(
-        stand_geometry=geometry,
-        raster=raster,
+STAND_ORDERS = {
+    # spatial order along a Hilbert curve; stands without keys come last.
+    "hilbert": ["hilbert_key", "id"],
+    # stands are created column by column by ST_HexagonGrid.
+    "id": ["id"],
+}
+
+
+# Rasters opened by each worker process, kept open for the lifetime of the pool.
+_datasets = {}
+
+# Memory-mapped copies of the rasters (see stands/raster_cache.py), keyed by
+# raster path, read instead of the rasters when present.
+_cached_paths = {}
+
+
+def get_dataset(raster_path):
+    src = _datasets.get(raster_path)
+    if src is None:
+        cached_path = _cached_paths.get(raster_path)
+        if cached_path:
+            src = open_cached_raster(cached_path)
+        else:
+            src = rasterio.open(raster_path, "r")
+        _datasets[raster_path] = src
+    return src
+
+
+def init_worker(raster_paths, cached_paths=None):
+    _cached_paths.update(cached_paths or {})
+    for raster_path in raster_paths:
+        get_dataset(str(raster_path))
+
+
+class ChunkResult(NamedTuple):
+    # position of the chunk among the chunks of a condition and size
+    chunk: int
+    # ids of the stands in the chunk
+    stand_ids: list
+    # (stand_id, stats) of the stands with data
+    metrics: list
+    # raster blocks read by all stands of the chunk, and distinct blocks
+    # among them; their ratio estimates the block cache hit rate.
+    block_reads: int
+    distinct_blocks: int
+
+
+def get_blocks(src, bounds):
+    """Returns the (row, col) of the raster blocks covered by bounds."""
+    block_height, block_width = src.block_shapes[0]
+    window = src.window(*bounds)
+    first_row = max(math.floor(window.row_off), 0)
+    last_row = min(math.ceil(window.row_off + window.height), src.height) - 1
+    first_col = max(math.floor(window.col_off), 0)
+    last_col = min(math.ceil(window.col_off + window.width), src.width) - 1
+    return {
+        (row, col)
+        for row in range(first_row // block_height, last_row // block_height + 1)
+        for col in range(first_col // block_width, last_col // block_width + 1)
+    }
+
+
+def calculate_metrics(indexed_chunk, raster_path, histograms=False):
+    """Computes the metrics of a chunk of (stand_id, wkb) pairs, reading from
+    the dataset kept open by this worker.
+    """
+    index, chunk = indexed_chunk
+    src = get_dataset(str(raster_path))
+    results = []
+    block_reads = 0
+    blocks = set()
+    for stand_id, geometry in chunk:
+        geometry = wkb.loads(geometry)
+        stand_blocks = get_blocks(src, geometry.bounds)
+        block_reads += len(stand_blocks)
+        blocks |= stand_blocks
+        stats = get_zonal_stats(
+            stand_geometry=geometry,
+            raster=src,
+            histogram=histograms,
+        )
+        if stats["count"] > 0:
+            results.append((stand_id, stats))
+    return ChunkResult(
+        index, [stand_id for stand_id, _ in chunk], results, block_reads, len(blocks)
     )
 
-    if stats["count"] <= 0:
-        return None
 
+def get_chunks(stand_data, chunk_size):
+    """Groups (stand_id, wkb) pairs into lists of `chunk_size` stands, yielded
+    with their position.
+    """
+    chunk = []
+    index = 0
+    for stand_id, geometry in stand_data:
+        chunk.append((stand_id, bytes(geometry)))
+        if len(chunk) >= chunk_size:
+            yield index, chunk
+            index += 1
+            chunk = []
+    if chunk:
+        yield index, chunk
+
+
+def skip_chunks(chunks, done, on_skip):
+    """Drops the chunks whose position is in `done`."""
+    for index, chunk in chunks:
+        if index in done:
+            on_skip(len(chunk))
+            continue
+        yield index, chunk
+
+
+def format_metric(stand_id, condition_id, stats):
     min = stats["min"]
     max = stats["max"]
     avg = stats["mean"]
@@ -38,7 +168,7 @@ def calculate_metric(stand, condition_id, raster):
 
 
 class Command(BaseCommand):
-    help = "Calculates stand metrics based on conditions existing in the database and creates a file to be copied."
+    help = "Calculates stand metrics based on conditions existing in the database and loads them into the stand metrics table."
 
     def add_arguments(self, parser) -> None:
         parser.add_argument(
@@ -49,8 +179,10 @@ class Command(BaseCommand):
 
         parser.add_argument(
             "--size",
+            nargs="+",
             type=str,
-            default="LARGE",
+            default=["LARGE"],
+            help="One or more stand sizes.",
         )
 
         parser.add_argument(
@@ -63,14 +195,148 @@ class Command(BaseCommand):
 
         parser.add_argument("--max-workers", type=int, default=4)
 
+        parser.add_argument(
+            "--order",
+            type=str,
+            choices=list(STAND_ORDERS.keys()),
+            default="hilbert",
+            help="Order in which stands are sent to workers, when using the 'stand' engine. 'hilbert' requires keys computed by compute_stand_keys.",
+        )
+
+        parser.add_argument(
+            "--max-pending",
+            type=int,
+            default=None,
+            help="Maximum number of chunks in flight, when using the 'stand' engine. Defaults to 4 per worker.",
+        )
+
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Number of stands sent at once to a worker, when using the 'stand' engine.",
+        )
+
         parser.add_argument("--force-yes", action="store_true")
 
+        parser.add_argument(
+            "--load",
+            default=True,
+            action=argparse.BooleanOptionalAction,
+            help="Stream metrics into the stand metrics table through COPY, upserting existing metrics.",
+        )
+
+        parser.add_argument(
+            "--csv",
+            action="store_true",
+            help="Also write metrics to one CSV file per condition and size in the output folder.",
+        )
+
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10000,
+            help="Number of metrics buffered per condition before they are copied to the database.",
+        )
+
+        parser.add_argument(
+            "--engine",
+            type=str,
+            choices=["stand", "label"],
+            default="stand",
+            help="'stand' reads the raster once per stand. 'label' rasterizes the stands once per size and grid, and reduces all conditions sharing a grid, for all sizes, in a single pass.",
+        )
+
+        parser.add_argument(
+            "--labels-folder",
+            type=str,
+            default=settings.STAND_LABELS_DIR,
+            help="Folder where label rasters are persisted, when using the 'label' engine.",
+        )
+
+        parser.add_argument(
+            "--rebuild-labels",
+            action="store_true",
+            help="Rebuild label rasters even if they already exist.",
+        )
+
+        parser.add_argument(
+            "--raster-cache",
+            action="store_true",
+            help="Workers read uncompressed, memory-mapped copies of the rasters, when using the 'stand' engine. Copies are made on first use and rebuilt when a raster changes.",
+        )
+
+        parser.add_argument(
+            "--raster-cache-dir",
+            type=str,
+            default=settings.RASTER_CACHE_DIR,
+            help="Folder of the memory-mapped copies of the rasters.",
+        )
+
+        parser.add_argument(
+            "--histograms",
+            action="store_true",
+            help="Also store the pixel count of each value of categorical (integer) conditions.",
+        )
+
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Skip the chunks of stands committed by a previous interrupted run. Use the same --order and --chunk-size as that run.",
+        )
+
+        parser.add_argument(
+            "--commit-every",
+            type=int,
+            default=20,
+            help="Number of chunks whose metrics are committed together with their checkpoint, when using the 'stand' engine.",
+        )
+
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Only recompute the stands overlapping raster blocks that changed since the last incremental run. The first run computes every stand.",
+        )
+
+        parser.add_argument(
+            "--manifests-folder",
+            type=str,
+            default=settings.STAND_MANIFESTS_DIR,
+            help="Folder where the block hashes of the rasters are persisted, when using --incremental.",
+        )
+
     def get_condition_extent(self, raster_path):
         with rasterio.open(raster_path, "r") as rast:
             bounds = rast.bounds
             geom = box(*bounds)
             return GEOSGeometry(geom.wkt, srid=rast.crs.to_epsg())
 
+    def get_windows_extent(self, raster_path, windows):
+        with rasterio.open(raster_path, "r") as rast:
+            geom = unary_union([box(*rast.window_bounds(w)) for w in windows])
+            return GEOSGeometry(geom.wkt, srid=rast.crs.to_epsg())
+
+    def get_changed_windows(self, condition_id, raster_path, size):
+        """Returns the windows of the raster that changed since the metrics of
+        a condition and size were last computed, or None if every stand must
+        be recomputed.
+        """
+        manifest = self.manifests.get(str(raster_path))
+        if manifest is None:
+            manifest = self.manifests[str(raster_path)] = compute_manifest(raster_path)
+        previous = load_manifest(
+            get_manifest_path(self.manifests_folder, condition_id, size)
+        )
+        return get_changed_windows(previous, manifest)
+
+    def save_manifest(self, condition_id, raster_path, size):
+        if not self.incremental:
+            return
+        save_manifest(
+            get_manifest_path(self.manifests_folder, condition_id, size),
+            self.manifests[str(raster_path)],
+        )
+
     def get_stands_queryset(self, raster_path=None, size=None):
         queryset = Stand.objects.all()
 
@@ -85,11 +351,25 @@ class Command(BaseCommand):
                 )
                 return Stand.objects.none()
 
-            queryset = queryset.filter(geometry__intersects=extent)
+            queryset = self.filter_intersecting(queryset, extent)
 
-        return queryset.annotate(
-            geom=AsWKT(Transform(srid=settings.CRS_FOR_RASTERS, expression="geometry"))
-        )
+        # stands are stored projected to the CRS of the rasters, unless it
+        # was changed.
+        field = geometry_field_for(settings.CRS_FOR_RASTERS)
+        if field == "geometry":
+            return queryset.annotate(
+                geom=AsWKB(
+                    Transform(srid=settings.CRS_FOR_RASTERS, expression="geometry")
+                )
+            )
+        return queryset.annotate(geom=AsWKB(field))
+
+    def filter_intersecting(self, queryset, extent):
+        """Filters stands intersecting `extent`, through the geometry column
+        in the CRS of `extent` when there is one.
+        """
+        field = geometry_field_for(extent.srid)
+        return queryset.filter(**{f"{field}__intersects": extent})
 
     def get_conditions(self, condition_ids=None, discover_region=None):
         if not discover_region:
@@ -100,33 +380,8 @@ class Command(BaseCommand):
         else:
             return self.discover(discover_region)
 
-    def get_treatment_goals(self, region):
-        with open(settings.DEFAULT_TREATMENTS_FILE) as f:
-            goals = json.load(f)
-
-            for i in goals.get("regions"):
-                if i.get("region_name") == region:
-                    return i
-
     def discover(self, region, force_yes=False):
-        conditions = list()
-        treatment_goals = self.get_treatment_goals(region)
-
-        for questions in treatment_goals.get("treatment_goals", []):
-            for question in questions.get("questions", []):
-                output_fields = question.get("scenario_output_fields_paths", {})
-                conditions.extend(output_fields.get("metrics", []))
-
-        # fixed all scenarios can have these restrictions, so they must be loaded.
-        conditions.extend(
-            [
-                "slope",
-                "distance_to_roads",
-            ]
-        )
-
-        # removes duplicates
-        condition_names = list(set(conditions))
+        condition_names = get_forsys_condition_names(region)
         self.stdout.write("Conditions:\n")
         for c in condition_names:
             self.stdout.write(f"{c}")
@@ -143,10 +398,325 @@ class Command(BaseCommand):
 
         return []
 
+    def get_label_raster(self, profile, size, labels_folder, rebuild=False):
+        label_path = get_label_raster_path(labels_folder, size, profile)
+        if label_path.exists() and (not rebuild or label_path in self.built_labels):
+            return label_path
+
+        self.stdout.write(f"[OK] Building label raster {label_path}.")
+        srid = profile["crs"].to_epsg()
+
+        def fetch_stands(bounds):
+            extent = GEOSGeometry(box(*bounds).wkt, srid=srid)
+            return (
+                self.filter_intersecting(self.get_stands_queryset(size=size), extent)
+                .values_list("id", "geom")
+                .iterator(chunk_size=1000)
+            )
+
+        self.built_labels.add(label_path)
+        return build_label_raster(label_path, profile, fetch_stands)
+
+    def group_by_grid(self, conditions):
+        """Groups conditions whose rasters share a grid, so they can be
+        reduced in a single pass.
+        """
+        grids = {}
+        for condition in conditions:
+            raster_path = get_raster_path(condition)
+            if not raster_path.exists():
+                self.stdout.write(
+                    f"[FAIL] Raster for condition {condition.pk} does not exists in disk"
+                )
+                continue
+            with rasterio.open(raster_path, "r") as rast:
+                profile = rast.profile
+            _, grid_conditions = grids.setdefault(get_grid_key(profile), (profile, []))
+            grid_conditions.append((condition, raster_path))
+        return list(grids.values())
+
+    def open_csv(self, stack, output_folder, condition, size):
+        """Opens the CSV side channel of a condition and size, if enabled."""
+        if not self.csv:
+            return None
+        outfile = self.get_outfile_path(
+            output_folder,
+            region=condition.condition_dataset.region_name,
+            condition_id=condition.pk,
+            stand_size=size,
+        )
+        out = stack.enter_context(open(outfile, "w"))
+        out.write(CSV_HEADER)
+        return out
+
+    def write_metric(self, out, stand_id, condition_id, stats):
+        if out:
+            out.write(format_metric(stand_id, condition_id, stats))
+        if self.loader:
+            self.loader.write(stand_id, condition_id, stats)
+
+    def commit_metrics(self, condition_id, replace_stands=None, replace_sizes=None):
+        if not self.loader:
+            return
+        upserted = self.loader.commit(
+            condition_id, replace_stands=replace_stands, replace_sizes=replace_sizes
+        )
+        self.stdout.write(f"[OK] Loaded {upserted} metrics for {condition_id}.")
+
+    def commit_chunks(self, condition_id, size, chunk_size, results, replace):
+        """Commits the metrics of some chunks together with their checkpoints,
+        in a single transaction.
+
+        Args:
+          replace: whether the previous metrics of the stands of the chunks
+            that no longer have data must be deleted.
+        """
+        if not self.loader or not results:
+            return
+        replace_stands = None
+        if replace:
+            replace_stands = [i for result in results for i in result.stand_ids]
+        with transaction.atomic():
+            self.commit_metrics(condition_id, replace_stands=replace_stands)
+            StandMetricCheckpoint.objects.mark_done(
+                condition_id, size, chunk_size, [result.chunk for result in results]
+            )
+
+    def refresh_matrices(self, condition_id, sizes):
+        """Copies the loaded metrics into the stand metric matrices of the
+        region of the condition, if they have columns for it.
+
+        Runs after the metrics are committed: a failed refresh is reported
+        and leaves the matrix stale until it is rebuilt, but never loses the
+        metrics nor stops the run.
+        """
+        if not self.loader:
+            return
+        for size in sizes:
+            try:
+                refreshed = refresh_matrix(condition_id, size)
+            except Exception as e:
+                self.stderr.write(
+                    f"[FAIL] Could not refresh the matrix for {condition_id} {size}: {e}"
+                )
+                continue
+            if refreshed is not None:
+                self.stdout.write(
+                    f"[OK] Refreshed {refreshed} matrix rows for {condition_id} {size}."
+                )
+
+    def mark_complete(self, condition_id, sizes):
+        if not self.loader:
+            return
+        for size in sizes:
+            StandMetricCheckpoint.objects.mark_complete(condition_id, size)
+
     def get_outfile_path(self, output_folder, region, condition_id, stand_size):
         base_path = Path(output_folder)
         return base_path / f"{region}_{condition_id}_{stand_size}.csv"
 
+    def handle_label_engine(
+        self, conditions, sizes, output_folder, labels_folder, rebuild_labels
+    ):
+        for profile, grid_conditions in self.group_by_grid(conditions):
+            start_grid = time.time()
+            label_paths = {
+                size: self.get_label_raster(
+                    profile, size, labels_folder, rebuild=rebuild_labels
+                )
+                for size in sizes
+            }
+            if self.resume:
+                for condition, raster_path in list(grid_conditions):
+                    if all(
+                        StandMetricCheckpoint.objects.is_complete(condition.pk, size)
+                        for size in sizes
+                    ):
+                        self.stdout.write(
+                            f"[OK] Skipping {condition.pk}: already done."
+                        )
+                        grid_conditions.remove((condition, raster_path))
+                if not grid_conditions:
+                    continue
+            # stands to recompute per (size, condition); None means all.
+            scopes = {}
+            if self.incremental:
+                for condition, raster_path in list(grid_conditions):
+                    for size in sizes:
+                        windows = self.get_changed_windows(
+                            condition.pk, raster_path, size
+                        )
+                        if windows is not None:
+                            windows = set(
+                                get_window_stand_ids(label_paths[size], windows)
+                            )
+                        scopes[(size, condition.pk)] = windows
+                    if all(scopes[(size, condition.pk)] == set() for size in sizes):
+                        self.stdout.write(
+                            f"[OK] Skipping {condition.pk}: raster unchanged since last run."
+                        )
+                        grid_conditions.remove((condition, raster_path))
+                if not grid_conditions:
+                    continue
+            rasters = {
+                condition.pk: raster_path for condition, raster_path in grid_conditions
+            }
+            self.stdout.write(
+                f"[OK] Processing conditions {list(rasters.keys())} for sizes {sizes} in a single pass."
+            )
+            with ExitStack() as stack:
+                outputs = {}
+                for condition, _ in grid_conditions:
+                    for size in sizes:
+                        outputs[(size, condition.pk)] = self.open_csv(
+                            stack, output_folder, condition, size
+                        )
+
+                # with --incremental, only the strips holding the stands
+                # overlapping changed windows are read.
+                for size, condition_id, stand_id, stats in get_multi_label_zonal_stats(
+                    label_paths, rasters, histograms=self.histograms, stands=scopes
+                ):
+                    self.write_metric(
+                        outputs[(size, condition_id)], stand_id, condition_id, stats
+                    )
+
+            for condition_id, raster_path in rasters.items():
+                replace_stands = set()
+                for size in sizes:
+                    replace_stands |= scopes.get((size, condition_id)) or set()
+                # every stand of these sizes was recomputed, so their
+                # partitions are replaced instead of upserted into.
+                replace_sizes = [
+                    size for size in sizes if scopes.get((size, condition_id)) is None
+                ]
+                with transaction.atomic():
+                    self.commit_metrics(
+                        condition_id,
+                        replace_stands=replace_stands,
+                        replace_sizes=replace_sizes,
+                    )
+                    self.mark_complete(condition_id, sizes)
+                self.refresh_matrices(condition_id, sizes)
+                for size in sizes:
+                    self.save_manifest(condition_id, raster_path, size)
+
+            end_grid = time.time()
+            self.stdout.write(
+                f"[OK] GRID RUNTIME {list(rasters.keys())} {end_grid - start_grid}"
+            )
+
+    def handle_stand_engine(
+        self,
+        pool,
+        condition,
+        size,
+        output_folder,
+        chunk_size,
+        max_pending,
+        order,
+        commit_every,
+    ):
+        start_condition = time.time()
+        raster_path = get_raster_path(condition)
+        condition_id = condition.pk
+        if self.resume and StandMetricCheckpoint.objects.is_complete(
+            condition_id, size
+        ):
+            self.stdout.write(f"[OK] Skipping {condition_id}: already done.")
+            return
+        if not raster_path.exists():
+            self.stdout.write("[FAIL] Raster does not exists in disk")
+            return
+
+        windows = None
+        if self.incremental:
+            windows = self.get_changed_windows(condition_id, raster_path, size)
+            if windows == []:
+                self.stdout.write(
+                    f"[OK] Skipping {condition_id}: raster unchanged since last run."
+                )
+                return
+
+        stands = self.get_stands_queryset(raster_path=raster_path, size=size)
+        if windows:
+            stands = self.filter_intersecting(
+                stands, self.get_windows_extent(raster_path, windows)
+            )
+        stand_count = stands.count()
+        if stand_count <= 0:
+            self.stdout.write(
+                f"[OK] Finished {condition_id}: 0 seconds - no raster data."
+            )
+            return
+        self.stdout.write(f"[OK] Processing {condition_id} with {stand_count} stands.")
+        stand_data = (
+            stands.order_by(*STAND_ORDERS[order])
+            .values_list("id", "geom")
+            .iterator(chunk_size=1000)
+        )
+
+        progress = ProgressReporter(
+            total=stand_count, write=self.stdout.write, unit="stands"
+        )
+        chunks = get_chunks(stand_data, chunk_size)
+        if self.resume:
+            done = StandMetricCheckpoint.objects.done_chunks(
+                condition_id, size, chunk_size
+            )
+            if done:
+                self.stdout.write(
+                    f"[OK] Resuming {condition_id}: {len(done)} chunks already done."
+                )
+                chunks = skip_chunks(chunks, done, progress.update)
+        with ExitStack() as stack:
+            out = self.open_csv(stack, output_folder, condition, size)
+            # results are written as soon as a chunk is done, and new chunks
+            # are only read from the database as results are consumed, so
+            # memory does not grow with the number of stands.
+            results = imap_bounded(
+                pool,
+                partial(
+                    calculate_metrics,
+                    raster_path=str(raster_path),
+                    histograms=self.histograms,
+                ),
+                chunks,
+                max_pending,
+            )
+            block_reads = distinct_blocks = 0
+            staged = []
+            for result in results:
+                for stand_id, stats in result.metrics:
+                    self.write_metric(out, stand_id, condition_id, stats)
+                block_reads += result.block_reads
+                distinct_blocks += result.distinct_blocks
+                progress.update(len(result.stand_ids))
+                staged.append(result)
+                if len(staged) >= commit_every:
+                    self.commit_chunks(
+                        condition_id, size, chunk_size, staged, bool(windows)
+                    )
+                    staged = []
+            self.commit_chunks(condition_id, size, chunk_size, staged, bool(windows))
+        self.mark_complete(condition_id, [size])
+        self.refresh_matrices(condition_id, [size])
+        self.save_manifest(condition_id, raster_path, size)
+
+        if block_reads:
+            self.stdout.write(
+                f"[OK] BLOCK CACHE HIT RATE {condition_id} {1 - distinct_blocks / block_reads:.2%} "
+                f"({block_reads} block reads, {distinct_blocks} distinct per chunk)"
+            )
+        self.stdout.write(
+            f"[OK] THROUGHPUT {condition_id} {progress.rate:.1f} stands/s"
+        )
+
+        end_condition = time.time()
+        self.stdout.write(
+            f"[OK] CONDITION RUNTIME {condition_id} {end_condition - start_condition}"
+        )
+
     def handle(self, *args, **options):
         with rasterio.Env(
             GDAL_NUM_THREADS="ALL_CPUS",
@@ -156,55 +726,74 @@ class Command(BaseCommand):
             max_workers = options.get("max_workers")
             condition_ids = options.get("condition_ids")
             discover_region = options.get("discover")
-            size = options.get("size")
+            sizes = options.get("size")
             output_folder = options.get("output_folder")
-            conditions = self.get_conditions(condition_ids, discover_region)
+            engine = options.get("engine")
+            labels_folder = options.get("labels_folder")
+            rebuild_labels = options.get("rebuild_labels")
+            self.built_labels = set()
+            self.csv = options.get("csv")
+            self.histograms = options.get("histograms")
+            self.incremental = options.get("incremental")
+            self.manifests_folder = options.get("manifests_folder")
+            self.manifests = {}
+            if not self.csv and not options.get("load"):
+                self.stderr.write("Nothing to do: use --load and/or --csv.")
+                return
+            if self.incremental and not options.get("load"):
+                self.stderr.write("--incremental requires --load.")
+                return
+            self.resume = options.get("resume")
+            if self.resume and not options.get("load"):
+                self.stderr.write("--resume requires --load.")
+                return
+            self.loader = (
+                StandMetricLoader(batch_size=options.get("batch_size"))
+                if options.get("load")
+                else None
+            )
+            conditions = list(self.get_conditions(condition_ids, discover_region))
+            if not self.resume:
+                StandMetricCheckpoint.objects.clear([c.pk for c in conditions])
             real_start = time.time()
-            for condition in conditions:
-                start_condition = time.time()
-                raster_path = get_raster_path(condition)
-                stands = self.get_stands_queryset(raster_path=raster_path, size=size)
-                condition_id = condition.pk
-                region = condition.condition_dataset.region_name
-                if stands.count() <= 0:
-                    self.stdout.write(
-                        f"[OK] Finished {condition_id}: 0 seconds - no raster data."
-                    )
-                    continue
-                self.stdout.write(
-                    f"[OK] Processing {condition_id} with {stands.count()} stands."
+            if engine == "label":
+                self.handle_label_engine(
+                    conditions, sizes, output_folder, labels_folder, rebuild_labels
                 )
-                stand_data = stands.values_list("id", "geom").iterator(chunk_size=1000)
-
-                if not raster_path.exists():
-                    self.stdout.write("[FAIL] Raster does not exists in disk")
-                    continue
-
-                outfile = self.get_outfile_path(
-                    output_folder,
-                    region=region,
-                    condition_id=condition_id,
-                    stand_size=size,
-                )
-                with multiprocessing.Pool(max_workers) as pool:
-                    data = zip(
-                        stand_data,
-                        repeat(condition_id),
-                        repeat(raster_path),
-                    )
-                    with open(outfile, "w") as out:
-                        results = pool.starmap_async(
-                            calculate_metric,
-                            data,
+            else:
+                raster_paths = [
+                    str(get_raster_path(condition)) for condition in conditions
+                ]
+                raster_paths = [p for p in raster_paths if Path(p).exists()]
+                cached_paths = {}
+                if options.get("raster_cache"):
+                    for raster_path in raster_paths:
+                        self.stdout.write(f"[OK] Caching {raster_path}.")
+                        cached_paths[raster_path] = str(
+                            get_cached_raster(
+                                raster_path, options.get("raster_cache_dir")
+                            )
                         )
-                        out.writelines(
-                            "stand_id,condition_id,min,max,avg,sum,count,majority,minority\n"
-                        )
-                        out.writelines([r for r in results.get() if r])
-
-                end_condition = time.time()
-                self.stdout.write(
-                    f"[OK] CONDITION RUNTIME {condition_id} {end_condition - start_condition}"
-                )
+                # a single pool serves every condition; each worker opens the
+                # rasters once and keeps them open until the pool is closed.
+                with multiprocessing.Pool(
+                    max_workers,
+                    initializer=init_worker,
+                    initargs=(raster_paths, cached_paths),
+                ) as pool:
+                    for size in sizes:
+                        for condition in conditions:
+                            self.handle_stand_engine(
+                                pool,
+                                condition,
+                                size,
+                                output_folder,
+                                options.get("chunk_size"),
+                                options.get("max_pending") or max_workers * 4,
+                                options.get("order"),
+                                options.get("commit_every"),
+                            )
+            # the run is complete, nothing is left to resume.
+            StandMetricCheckpoint.objects.clear([c.pk for c in conditions])
             real_end = time.time()
             self.stdout.write(f"[OK] TOTAL RUNTIME {real_end - real_start}")
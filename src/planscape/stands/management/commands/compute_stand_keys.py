@@ -0,0 +1,86 @@
+import time
+
+from django.contrib.gis.db.models.functions import Centroid, Transform
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import F
+from psycopg2.extras import execute_values
+from stands.hilbert import HILBERT_SRID, hilbert_keys
+from stands.models import Stand, geometry_field_for
+from utils.progress import ProgressReporter
+
+
+class Command(BaseCommand):
+    help = (
+        "Computes the Hilbert curve key of stands, used to read them in spatial order."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--size",
+            nargs="+",
+            type=str,
+            default=None,
+            help="Stand sizes to update. Defaults to all sizes.",
+        )
+
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Recompute keys of stands that already have one.",
+        )
+
+        parser.add_argument("--batch-size", type=int, default=10000)
+
+    def get_queryset(self, sizes=None, recompute=False):
+        queryset = Stand.objects.all()
+        if sizes:
+            queryset = queryset.filter(size__in=sizes)
+        if not recompute:
+            queryset = queryset.filter(hilbert_key__isnull=True)
+        return queryset
+
+    def get_geometry(self):
+        field = geometry_field_for(HILBERT_SRID)
+        if field == "geometry":
+            return Transform("geometry", srid=HILBERT_SRID)
+        return F(field)
+
+    def update_keys(self, batch):
+        ids, xs, ys = zip(*batch)
+        keys = hilbert_keys(xs, ys)
+        with connection.cursor() as cursor:
+            execute_values(
+                cursor.cursor,
+                """UPDATE stands_stand SET hilbert_key = data.key
+                FROM (VALUES %s) AS data (id, key)
+                WHERE stands_stand.id = data.id""",
+                list(zip(ids, keys.tolist())),
+                page_size=len(ids),
+            )
+
+    def handle(self, *args, **options):
+        start = time.time()
+        batch_size = options.get("batch_size")
+        queryset = self.get_queryset(options.get("size"), options.get("all"))
+        progress = ProgressReporter(
+            total=queryset.count(), write=self.stdout.write, unit="stands"
+        )
+        centroids = (
+            queryset.annotate(centroid=Centroid(self.get_geometry()))
+            .values_list("id", "centroid")
+            .iterator(chunk_size=batch_size)
+        )
+
+        batch = []
+        for stand_id, centroid in centroids:
+            batch.append((stand_id, centroid.x, centroid.y))
+            if len(batch) >= batch_size:
+                self.update_keys(batch)
+                progress.update(len(batch))
+                batch = []
+        if batch:
+            self.update_keys(batch)
+            progress.update(len(batch))
+
+        self.stdout.write(f"[OK] TOTAL RUNTIME {time.time() - start}")
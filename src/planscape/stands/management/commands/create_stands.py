@@ -0,0 +1,197 @@
+import io
+import multiprocessing
+import time
+from functools import partial
+
+import shapely
+from boundary.models import BoundaryDetails
+from django.contrib.gis.db.models import Union
+from django.contrib.gis.db.models.functions import Transform
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from stands.generator import STANDS_EXTENT, get_tile_stands, get_tiles, write_stands
+from stands.hexgrid import HEX_GRID_SRID
+from stands.models import length_from_size
+from stands.signals import stands_changed
+from utils.pool_utils import imap_bounded
+from utils.progress import ProgressReporter
+
+CREATE_STAGING = """
+CREATE TEMPORARY TABLE IF NOT EXISTS stand_staging (
+    hex_i    INTEGER,
+    hex_j    INTEGER,
+    geometry geometry(Polygon, 5070),
+    area_m2  DOUBLE PRECISION
+) ON COMMIT DELETE ROWS;
+"""
+
+# Stands already created by a previous run are kept, so their metrics are.
+INSERT_STANDS = """
+INSERT INTO stands_stand (created_at, size, geometry, area_m2)
+SELECT
+    timezone('utc', now()),
+    %(size)s,
+    ST_Transform(st.geometry, 4269),
+    st.area_m2
+FROM stand_staging st
+WHERE NOT EXISTS (
+    SELECT 1
+    FROM stands_stand ss
+    WHERE
+        ss.size = %(size)s AND
+        ss.hex_i = st.hex_i AND
+        ss.hex_j = st.hex_j
+);
+"""
+
+_extent = None
+_clip = None
+
+
+def init_worker(extent, clip_wkb=None):
+    global _extent, _clip
+    _extent = extent
+    _clip = shapely.from_wkb(clip_wkb) if clip_wkb else None
+    if _clip is not None:
+        shapely.prepare(_clip)
+
+
+def load_tile(tile, size):
+    """Generates the stands of a tile and copies them to the database, in
+    a transaction of its own. Runs in a worker, with its own connection.
+
+    Returns:
+      (created, generated): the number of stands inserted, and generated.
+    """
+    length = length_from_size(size)
+    i, j, polygons = get_tile_stands(tile, _extent, length, _clip)
+    if not i.size:
+        return 0, 0
+    buffer = io.StringIO()
+    write_stands(buffer, i, j, polygons, length)
+    buffer.seek(0)
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(CREATE_STAGING)
+            cursor.copy_expert(
+                "COPY stand_staging (hex_i, hex_j, geometry, area_m2) "
+                "FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+            cursor.execute(INSERT_STANDS, {"size": str(size)})
+            return cursor.rowcount, int(i.size)
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates hexagonal stands tile by tile, generating them with NumPy in "
+        "parallel workers that COPY them to the database. Tiles are loaded in "
+        "transactions of their own, and existing stands are kept, so an "
+        "interrupted run can be run again."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--size",
+            nargs="+",
+            type=str,
+            default=["LARGE"],
+            help="One or more stand sizes.",
+        )
+
+        parser.add_argument(
+            "--extent",
+            nargs=4,
+            type=float,
+            default=None,
+            metavar=("MINX", "MINY", "MAXX", "MAXY"),
+            help="Extent of the stands, in EPSG:5070. Defaults to the boundary if given, or to California.",
+        )
+
+        parser.add_argument(
+            "--boundary",
+            type=str,
+            default=None,
+            help="Name of a boundary; only the stands intersecting its shapes are created.",
+        )
+
+        parser.add_argument(
+            "--shape-name",
+            nargs="+",
+            type=str,
+            default=None,
+            help="Only use these shapes of the boundary.",
+        )
+
+        parser.add_argument(
+            "--tile-cells",
+            type=int,
+            default=256,
+            help="Number of columns and rows of cells of a tile.",
+        )
+
+        parser.add_argument("--max-workers", type=int, default=4)
+
+        parser.add_argument(
+            "--max-pending",
+            type=int,
+            default=None,
+            help="Maximum number of tiles in flight. Defaults to 4 per worker.",
+        )
+
+    def get_clip(self, boundary_name, shape_names=None):
+        details = BoundaryDetails.objects.filter(boundary__boundary_name=boundary_name)
+        if shape_names:
+            details = details.filter(shape_name__in=shape_names)
+        geometry = details.aggregate(
+            geometry=Union(Transform("geometry", srid=HEX_GRID_SRID))
+        )["geometry"]
+        if geometry is None:
+            raise CommandError(f"Boundary {boundary_name} has no shapes.")
+        return shapely.from_wkb(bytes(geometry.wkb))
+
+    def handle(self, *args, **options):
+        start = time.time()
+        tile_cells = options.get("tile_cells")
+        max_workers = options.get("max_workers")
+        max_pending = options.get("max_pending") or max_workers * 4
+
+        clip = None
+        if options.get("boundary"):
+            clip = self.get_clip(options.get("boundary"), options.get("shape_name"))
+        extent = options.get("extent") or (
+            clip.bounds if clip is not None else STANDS_EXTENT
+        )
+        clip_wkb = shapely.to_wkb(clip) if clip is not None else None
+
+        # workers open their own connections, instead of sharing this one.
+        connections.close_all()
+        with multiprocessing.Pool(
+            max_workers, initializer=init_worker, initargs=(tuple(extent), clip_wkb)
+        ) as pool:
+            for size in options.get("size"):
+                start_size = time.time()
+                tiles = get_tiles(extent, length_from_size(size), tile_cells, clip)
+                self.stdout.write(f"[OK] Creating {size} stands in {len(tiles)} tiles.")
+                progress = ProgressReporter(
+                    total=len(tiles), write=self.stdout.write, unit="tiles"
+                )
+                created = generated = 0
+                for tile_created, tile_generated in imap_bounded(
+                    pool, partial(load_tile, size=size), tiles, max_pending
+                ):
+                    created += tile_created
+                    generated += tile_generated
+                    progress.update()
+                self.stdout.write(
+                    f"[OK] Created {created} {size} stands, "
+                    f"{generated - created} already existed."
+                )
+                if created:
+                    stands_changed.send(sender=None, size=size)
+                self.stdout.write(
+                    f"[OK] THROUGHPUT {size} "
+                    f"{generated / (time.time() - start_size):.1f} stands/s"
+                )
+
+        self.stdout.write(f"[OK] TOTAL RUNTIME {time.time() - start}")
@@ -0,0 +1,90 @@
+import time
+
+from conditions.models import Condition
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from stands.matrix import refresh_matrix
+
+
+class Command(BaseCommand):
+    help = (
+        "Computes stand metrics inside the database, from the condition raster "
+        "tiles, with the set based `generate_stand_metrics` SQL function. "
+        "Reports the same runtime and throughput lines as calculate_metrics, "
+        "so both paths can be compared on the same data."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--condition-ids",
+            nargs="+",
+            type=int,
+        )
+
+        parser.add_argument(
+            "--size",
+            nargs="+",
+            type=str,
+            default=["LARGE"],
+            help="One or more stand sizes.",
+        )
+
+        parser.add_argument(
+            "--clean",
+            action="store_true",
+            help="Delete the existing metrics of the condition and size first.",
+        )
+
+        parser.add_argument(
+            "--parallel-workers",
+            type=int,
+            default=None,
+            help="Sets max_parallel_workers_per_gather for the session.",
+        )
+
+    def get_conditions(self, condition_ids=None):
+        qs = Condition.objects.filter(raster_tiles__isnull=False).distinct()
+        if condition_ids:
+            qs = qs.filter(id__in=condition_ids)
+        return qs.order_by("id")
+
+    def handle(self, *args, **options):
+        sizes = options.get("size")
+        clean = options.get("clean")
+        parallel_workers = options.get("parallel_workers")
+
+        real_start = time.time()
+        with connection.cursor() as cursor:
+            if parallel_workers is not None:
+                cursor.execute(
+                    "SET max_parallel_workers_per_gather = %s", [parallel_workers]
+                )
+
+            for condition in self.get_conditions(options.get("condition_ids")):
+                for size in sizes:
+                    start_condition = time.time()
+                    with transaction.atomic():
+                        cursor.execute(
+                            "SELECT generate_stand_metrics(%s, %s, %s)",
+                            [condition.pk, clean, size],
+                        )
+                        (loaded,) = cursor.fetchone()
+                    try:
+                        refresh_matrix(condition.pk, size)
+                    except Exception as e:
+                        self.stderr.write(
+                            f"[FAIL] Could not refresh the matrix for {condition.pk} {size}: {e}"
+                        )
+                    elapsed = time.time() - start_condition
+                    self.stdout.write(
+                        f"[OK] Loaded {loaded} metrics for {condition.pk}."
+                    )
+                    self.stdout.write(
+                        f"[OK] THROUGHPUT {condition.pk} {loaded / elapsed if elapsed > 0 else 0.0:.1f} stands/s"
+                    )
+                    self.stdout.write(
+                        f"[OK] CONDITION RUNTIME {condition.pk} {elapsed}"
+                    )
+
+        real_end = time.time()
+        self.stdout.write(f"[OK] TOTAL RUNTIME {real_end - real_start}")
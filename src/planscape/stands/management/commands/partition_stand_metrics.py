@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+from stands.loader import (
+    drop_unpartitioned_metrics,
+    get_unpartitioned_condition_ids,
+    move_unpartitioned_metrics,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves the stand metrics loaded before stands_standmetric was "
+        "partitioned (migration stands 0014) to their partitions, a condition "
+        "per transaction, and then drops stands_standmetric_unpartitioned. "
+        "`make deploy-backend` runs it after migrating; it can be interrupted "
+        "and run again, and does nothing once every metric was moved."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--condition-ids",
+            nargs="+",
+            type=int,
+            help="Only move the metrics of these conditions.",
+        )
+
+    def handle(self, *args, **options):
+        start = time.time()
+        condition_ids = get_unpartitioned_condition_ids()
+        if options.get("condition_ids"):
+            condition_ids = [
+                id for id in condition_ids if id in options["condition_ids"]
+            ]
+
+        for condition_id in condition_ids:
+            start_condition = time.time()
+            moved = move_unpartitioned_metrics(condition_id)
+            self.stdout.write(
+                f"[OK] Condition {condition_id}: moved {moved} metrics in "
+                f"{time.time() - start_condition:.1f}s."
+            )
+
+        if drop_unpartitioned_metrics():
+            self.stdout.write("[OK] Dropped stands_standmetric_unpartitioned.")
+        self.stdout.write(f"[OK] TOTAL RUNTIME {time.time() - start}")
@@ -0,0 +1,89 @@
+"""Block-level content manifests of condition rasters.
+
+A manifest records a hash of every block of a raster at the time its stand
+metrics were computed. Comparing it with the manifest of the current raster
+tells which windows changed, so only the stands overlapping them need to be
+recomputed.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+import rasterio
+from rasterio.windows import Window
+
+from stands.zonal import get_grid_key
+
+
+def get_manifest_path(folder, condition_id, stand_size: str) -> Path:
+    return Path(folder) / f"{condition_id}_{stand_size.lower()}.json"
+
+
+def compute_manifest(raster_path, band: int = 1) -> dict:
+    """Hashes every block of a raster."""
+    with rasterio.open(raster_path, "r") as src:
+        block_height, block_width = src.block_shapes[band - 1]
+        blocks = {}
+        for (row, col), window in src.block_windows(band):
+            data = src.read(band, window=window)
+            blocks[f"{row},{col}"] = hashlib.blake2b(
+                data.tobytes(), digest_size=16
+            ).hexdigest()
+        return {
+            "grid": get_grid_key(src.profile),
+            "width": src.width,
+            "height": src.height,
+            "block_height": block_height,
+            "block_width": block_width,
+            "blocks": blocks,
+        }
+
+
+def load_manifest(path) -> Optional[dict]:
+    path = Path(path)
+    if not path.exists():
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(path, manifest: dict) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+
+def get_changed_windows(old: Optional[dict], new: dict) -> Optional[list[Window]]:
+    """Returns the windows of the blocks that differ between two manifests.
+
+    Returns:
+      None if the manifests cannot be compared (no previous manifest, or a
+      different grid or block layout), meaning everything must be recomputed.
+      An empty list if nothing changed.
+    """
+    layout = ["grid", "block_height", "block_width"]
+    if old is None or any(old.get(key) != new[key] for key in layout):
+        return None
+
+    windows = []
+    for block, digest in new["blocks"].items():
+        if old["blocks"].get(block) == digest:
+            continue
+        row, col = (int(i) for i in block.split(","))
+        row_off = row * new["block_height"]
+        col_off = col * new["block_width"]
+        windows.append(
+            Window(
+                col_off,
+                row_off,
+                min(new["block_width"], new["width"] - col_off),
+                min(new["block_height"], new["height"] - row_off),
+            )
+        )
+    return windows
@@ -0,0 +1,288 @@
+"""Wide stand metric matrices.
+
+`stands_standmetric` holds one row per stand, condition and size, so the
+metrics of a planning area for several conditions take one query per
+condition. A matrix holds the same metrics with one row per stand and one
+column per condition and statistic, in a table per region and stand size:
+
+    stand_metric_matrix_<region>_<size> (
+        stand_id BIGINT PRIMARY KEY,
+        c<condition_id>_<statistic> ...
+    )
+
+so all the metrics of a planning area are read with a single query. Rows
+are written in the order of the stands along the Hilbert curve (see
+stands/hilbert.py), so the stands of a planning area share few pages.
+
+A matrix is built with `build_matrix` (see the `build_stand_metric_matrix`
+command), by default with only the statistic forsys reads for each of the
+conditions forsys can request, and the columns a condition already has are
+refreshed with `refresh_matrix` when its metrics are loaded. Refreshed stands
+that were not in the matrix are appended at its end; rebuilding restores the
+order.
+"""
+
+import json
+import re
+from typing import Iterable, Optional
+
+from conditions.models import Condition
+from django.conf import settings
+from django.db import connection, transaction
+
+MATRIX_STATISTICS = ["min", "max", "avg", "sum", "count", "majority", "minority"]
+
+# The statistic forsys reads for each condition, "avg" for the others; keep
+# in sync with METRIC_COLUMNS in rscripts/forsys.R.
+FORSYS_STATISTICS = {
+    "distance_to_roads": "min",
+    "slope": "max",
+    "low_income_population_proportional": "sum",
+    "wui": "majority",
+    "mean_percent_fire_return_interval_departure_condition_class": "majority",
+    "f3veg100": "majority",
+}
+FORSYS_DEFAULT_STATISTIC = "avg"
+
+# Every scenario can be restricted by these conditions.
+FORSYS_RESTRICTIONS = ["slope", "distance_to_roads"]
+
+# PostgreSQL allows 1600 columns per table, but a row must fit in a page,
+# which leaves room for about 1000 DOUBLE PRECISION columns.
+MAX_MATRIX_COLUMNS = 1000
+
+COLUMN_PATTERN = re.compile(r"^c(\d+)_([a-z]+)$")
+
+BUILD_MATRIX = """
+DROP TABLE IF EXISTS {table};
+CREATE TABLE {table} AS
+SELECT
+    ss.id AS stand_id,
+    {columns}
+FROM stands_standmetric sm
+JOIN stands_stand ss ON (ss.id = sm.stand_id)
+WHERE
+    sm.size = %(size)s AND
+    sm.condition_id = ANY(%(condition_ids)s)
+GROUP BY ss.id
+ORDER BY ss.hilbert_key, ss.id;
+ALTER TABLE {table} ADD PRIMARY KEY (stand_id);
+"""
+
+REPLACE_MATRIX = """
+DROP TABLE IF EXISTS {table};
+ALTER TABLE {new_table} RENAME TO {table};
+ALTER INDEX {new_table}_pkey RENAME TO {table}_pkey;
+"""
+
+INSERT_STANDS = """
+INSERT INTO {table} (stand_id)
+SELECT sm.stand_id
+FROM stands_standmetric sm
+WHERE
+    sm.condition_id = %(condition_id)s AND
+    sm.size = %(size)s
+ON CONFLICT (stand_id) DO NOTHING;
+"""
+
+# Only the rows whose values changed are updated; the columns of the stands
+# that no longer have metrics are set to NULL.
+UPDATE_COLUMNS = """
+UPDATE {table} m
+SET {assignments}
+FROM {table} previous
+LEFT JOIN stands_standmetric sm ON (
+    sm.stand_id = previous.stand_id AND
+    sm.condition_id = %(condition_id)s AND
+    sm.size = %(size)s
+)
+WHERE
+    m.stand_id = previous.stand_id AND
+    ({changed});
+"""
+
+
+def get_matrix_table(region_name, size) -> str:
+    region = re.sub(r"[^a-z0-9]+", "_", str(region_name).lower())
+    return f"stand_metric_matrix_{region}_{str(size).lower()}"
+
+
+def get_matrix_column(condition_id, statistic) -> str:
+    if statistic not in MATRIX_STATISTICS:
+        raise ValueError(f"Unknown statistic {statistic}.")
+    return f"c{int(condition_id)}_{statistic}"
+
+
+def get_forsys_statistic(condition_name) -> str:
+    return FORSYS_STATISTICS.get(condition_name, FORSYS_DEFAULT_STATISTIC)
+
+
+def get_forsys_condition_names(region_name) -> list[str]:
+    """Returns the names of the conditions forsys can read in a region: the
+    priorities and output metrics of its treatment goals, and the
+    restrictions.
+    """
+    with open(settings.DEFAULT_TREATMENTS_FILE) as f:
+        regions = json.load(f).get("regions", [])
+
+    names = []
+    for region in regions:
+        if region.get("region_name") != region_name:
+            continue
+        for goal in region.get("treatment_goals", []):
+            for question in goal.get("questions", []):
+                names.extend(question.get("scenario_priorities", []))
+                output_fields = question.get("scenario_output_fields_paths", {})
+                names.extend(output_fields.get("metrics", []))
+    names.extend(FORSYS_RESTRICTIONS)
+    return sorted(set(names))
+
+
+def parse_matrix_column(column):
+    """Returns the (condition_id, statistic) of a matrix column, or None for
+    other columns.
+    """
+    match = COLUMN_PATTERN.match(column)
+    if not match or match.group(2) not in MATRIX_STATISTICS:
+        return None
+    return int(match.group(1)), match.group(2)
+
+
+def get_matrix_columns(table) -> list[str]:
+    """Returns the metric columns of a matrix, or an empty list if the matrix
+    does not exist.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT column_name
+            FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = %s
+            ORDER BY ordinal_position
+            """,
+            [table],
+        )
+        columns = [row[0] for row in cursor.fetchall()]
+    return [column for column in columns if parse_matrix_column(column)]
+
+
+def _check_columns(table, count):
+    if count > MAX_MATRIX_COLUMNS:
+        raise ValueError(
+            f"{table} would have {count} metric columns, more than "
+            f"{MAX_MATRIX_COLUMNS}; use fewer conditions or statistics."
+        )
+
+
+def build_matrix(
+    region_name,
+    size,
+    condition_ids: Iterable[int],
+    statistics: Optional[Iterable[str]] = None,
+) -> int:
+    """Builds the matrix of a region and stand size from the metrics of some
+    conditions, replacing the previous matrix.
+
+    The matrix is built in a new table that replaces the previous one in the
+    same transaction, so readers keep using the previous matrix meanwhile.
+
+    Args:
+      statistics: the statistics of every condition. By default, each
+        condition only has the statistic forsys reads for it.
+
+    Returns:
+      the number of stands in the matrix.
+    """
+    condition_ids = sorted(set(condition_ids))
+    if statistics is None:
+        names = dict(
+            Condition.objects.filter(id__in=condition_ids).values_list(
+                "id", "condition_dataset__condition_name"
+            )
+        )
+        metrics = [(cid, get_forsys_statistic(names.get(cid))) for cid in condition_ids]
+    else:
+        statistics = list(statistics)
+        metrics = [(cid, s) for cid in condition_ids for s in statistics]
+    table = get_matrix_table(region_name, size)
+    new_table = f"{table}_new"
+    _check_columns(table, len(metrics))
+    if not condition_ids:
+        raise ValueError("A matrix needs at least one condition.")
+
+    columns = ",\n    ".join(
+        f"max(sm.{statistic}) FILTER (WHERE sm.condition_id = {condition_id}) "
+        f"AS {get_matrix_column(condition_id, statistic)}"
+        for condition_id, statistic in metrics
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            BUILD_MATRIX.format(table=new_table, columns=columns),
+            {"size": str(size), "condition_ids": condition_ids},
+        )
+        cursor.execute(f"SELECT count(*) FROM {new_table}")
+        (stands,) = cursor.fetchone()
+        cursor.execute(REPLACE_MATRIX.format(table=table, new_table=new_table))
+    with connection.cursor() as cursor:
+        cursor.execute(f"ANALYZE {table}")
+    return stands
+
+
+def refresh_matrix(condition_id, size) -> int | None:
+    """Copies the metrics of a condition and stand size into the columns the
+    condition already has in the matrix of its region.
+
+    Columns are never added: a refresh runs after every metric load, so it
+    must not grow the matrix nor lock it with an ALTER TABLE while forsys
+    reads it. New conditions are added by rebuilding the matrix.
+
+    Returns:
+      the number of updated stands, or None if the matrix does not exist or
+      has no columns for the condition.
+    """
+    region_name = Condition.objects.values_list(
+        "condition_dataset__region_name", flat=True
+    ).get(pk=condition_id)
+    table = get_matrix_table(region_name, size)
+    statistics = [
+        statistic
+        for cid, statistic in map(parse_matrix_column, get_matrix_columns(table))
+        if cid == condition_id
+    ]
+    if not statistics:
+        return None
+
+    columns = {s: get_matrix_column(condition_id, s) for s in statistics}
+    assignments = ", ".join(f"{columns[s]} = sm.{s}" for s in statistics)
+    changed = " OR ".join(f"m.{columns[s]} IS DISTINCT FROM sm.{s}" for s in statistics)
+    params = {"condition_id": condition_id, "size": str(size)}
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(INSERT_STANDS.format(table=table), params)
+        cursor.execute(
+            UPDATE_COLUMNS.format(
+                table=table, assignments=assignments, changed=changed
+            ),
+            params,
+        )
+        updated = cursor.rowcount
+    return updated
+
+
+def read_matrix(region_name, size, stand_ids, metrics) -> dict[int, dict]:
+    """Reads some metrics of some stands with a single query.
+
+    Args:
+      metrics: (condition_id, statistic) pairs.
+
+    Returns:
+      for each stand in the matrix, its metrics keyed by their column name.
+    """
+    table = get_matrix_table(region_name, size)
+    columns = [get_matrix_column(cid, statistic) for cid, statistic in metrics]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT {', '.join(['stand_id'] + columns)} FROM {table} "
+            "WHERE stand_id = ANY(%s)",
+            [list(stand_ids)],
+        )
+        return {row[0]: dict(zip(columns, row[1:])) for row in cursor.fetchall()}
@@ -0,0 +1,23 @@
+# Generated by Django 4.1.13 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("stands", "0007_alter_stand_created_at_alter_standmetric_created_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="stand",
+            name="hilbert_key",
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AddIndex(
+            model_name="stand",
+            index=models.Index(
+                fields=["size", "hilbert_key"], name="stand_size_hilbert_index"
+            ),
+        ),
+    ]
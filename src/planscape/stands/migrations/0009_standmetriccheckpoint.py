@@ -0,0 +1,57 @@
+# Generated by Django 4.1.13 on 2026-10-18 11:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("conditions", "0009_auto_20231222_0900"),
+        ("stands", "0008_stand_hilbert_key"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StandMetricCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, null=True)),
+                (
+                    "size",
+                    models.CharField(
+                        choices=[
+                            ("SMALL", "Small"),
+                            ("MEDIUM", "Medium"),
+                            ("LARGE", "Large"),
+                        ],
+                        max_length=16,
+                    ),
+                ),
+                ("chunk_size", models.IntegerField()),
+                ("chunk", models.IntegerField()),
+                (
+                    "condition",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="stand_metric_checkpoints",
+                        to="conditions.condition",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="standmetriccheckpoint",
+            constraint=models.UniqueConstraint(
+                fields=("condition", "size", "chunk_size", "chunk"),
+                name="unique_stand_metric_checkpoint",
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.1.13 on 2026-10-18 12:30
+
+from django.db import migrations
+from utils.file_utils import read_file
+
+UP_MIGRATION_CREATE_COMPUTE_CONDITION_STAND_STATS = read_file(
+    "stands/sql/create_compute_condition_stand_stats.sql"
+)
+
+UP_MIGRATION_CREATE_GENERATE_STAND_METRICS = read_file(
+    "stands/sql/create_generate_stand_metrics_set_based.sql"
+)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("stands", "0009_standmetriccheckpoint"),
+    ]
+
+    operations = [
+        migrations.RunSQL(UP_MIGRATION_CREATE_COMPUTE_CONDITION_STAND_STATS),
+        migrations.RunSQL(UP_MIGRATION_CREATE_GENERATE_STAND_METRICS),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.1.13 on 2026-10-18 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("stands", "0010_set_based_generate_stand_metrics"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="standmetric",
+            name="histogram",
+            field=models.JSONField(null=True),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.1.13 on 2026-10-18 15:20
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations, models
+from utils.file_utils import read_file
+
+UP_MIGRATION_CREATE_STAND_PROJECTIONS_TRIGGER = read_file(
+    "stands/sql/create_stand_projections_trigger.sql"
+)
+
+UP_MIGRATION_POPULATE_STAND_PROJECTIONS = read_file(
+    "stands/sql/populate_stand_projections.sql"
+)
+
+UP_MIGRATION_CREATE_COMPUTE_CONDITION_STAND_STATS = read_file(
+    "stands/sql/create_compute_condition_stand_stats_projected.sql"
+)
+
+DOWN_MIGRATION_DROP_STAND_PROJECTIONS_TRIGGER = """
+DROP TRIGGER IF EXISTS stand_projections ON stands_stand;
+DROP FUNCTION IF EXISTS set_stand_projections;
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("stands", "0011_standmetric_histogram"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="stand",
+            name="geometry_5070",
+            field=django.contrib.gis.db.models.fields.PolygonField(
+                null=True, srid=5070
+            ),
+        ),
+        migrations.AddField(
+            model_name="stand",
+            name="geometry_3857",
+            field=django.contrib.gis.db.models.fields.PolygonField(
+                null=True, srid=3857
+            ),
+        ),
+        migrations.AddField(
+            model_name="stand",
+            name="area_acres",
+            field=models.FloatField(null=True),
+        ),
+        migrations.RunSQL(
+            UP_MIGRATION_CREATE_STAND_PROJECTIONS_TRIGGER,
+            DOWN_MIGRATION_DROP_STAND_PROJECTIONS_TRIGGER,
+        ),
+        migrations.RunSQL(
+            UP_MIGRATION_POPULATE_STAND_PROJECTIONS, migrations.RunSQL.noop
+        ),
+        migrations.RunSQL(UP_MIGRATION_CREATE_COMPUTE_CONDITION_STAND_STATS),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.1.13 on 2026-10-18 16:05
+
+from django.db import migrations, models
+from utils.file_utils import read_file
+
+UP_MIGRATION_CREATE_STAND_HEX_INDEX = read_file("stands/sql/create_stand_hex_index.sql")
+
+UP_MIGRATION_POPULATE_STAND_HEX_INDEX = read_file(
+    "stands/sql/populate_stand_hex_index.sql"
+)
+
+# Restores the trigger of 0012, which does not set the hex index.
+DOWN_MIGRATION_DROP_STAND_HEX_INDEX = (
+    read_file("stands/sql/create_stand_projections_trigger.sql")
+    + """
+DROP FUNCTION IF EXISTS hex_cell;
+DROP FUNCTION IF EXISTS stand_hex_length;
+"""
+)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("stands", "0012_stand_projections"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="stand",
+            name="hex_i",
+            field=models.IntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name="stand",
+            name="hex_j",
+            field=models.IntegerField(null=True),
+        ),
+        migrations.AddIndex(
+            model_name="stand",
+            index=models.Index(
+                fields=["size", "hex_i", "hex_j"], name="stand_size_hex_index"
+            ),
+        ),
+        migrations.RunSQL(
+            UP_MIGRATION_CREATE_STAND_HEX_INDEX,
+            DOWN_MIGRATION_DROP_STAND_HEX_INDEX,
+        ),
+        migrations.RunSQL(
+            UP_MIGRATION_POPULATE_STAND_HEX_INDEX, migrations.RunSQL.noop
+        ),
+    ]
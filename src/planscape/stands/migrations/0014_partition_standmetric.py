@@ -0,0 +1,68 @@
+# Generated by Django 4.1.13 on 2026-10-18 17:10
+
+from django.db import migrations, models
+from utils.file_utils import read_file
+
+# The metrics are moved to the partitions afterwards, by
+# `manage.py partition_stand_metrics` (see `make deploy-backend`), not in
+# this migration.
+UP_MIGRATION_PARTITION_STANDMETRIC = read_file("stands/sql/partition_standmetric.sql")
+
+DOWN_MIGRATION_UNPARTITION_STANDMETRIC = read_file(
+    "stands/sql/unpartition_standmetric.sql"
+)
+
+UP_MIGRATION_CREATE_GENERATE_STAND_METRICS = read_file(
+    "stands/sql/create_generate_stand_metrics_partitioned.sql"
+)
+
+DOWN_MIGRATION_CREATE_GENERATE_STAND_METRICS = read_file(
+    "stands/sql/create_generate_stand_metrics_set_based.sql"
+)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("conditions", "0010_partition_conditionraster"),
+        ("stands", "0013_stand_hex_index"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddField(
+                    model_name="standmetric",
+                    name="size",
+                    field=models.CharField(
+                        choices=[
+                            ("SMALL", "Small"),
+                            ("MEDIUM", "Medium"),
+                            ("LARGE", "Large"),
+                        ],
+                        max_length=16,
+                    ),
+                ),
+                migrations.RemoveConstraint(
+                    model_name="standmetric",
+                    name="unique_stand_metric",
+                ),
+                migrations.AddConstraint(
+                    model_name="standmetric",
+                    constraint=models.UniqueConstraint(
+                        fields=("stand", "condition", "size"),
+                        name="unique_stand_metric",
+                    ),
+                ),
+            ],
+            database_operations=[
+                migrations.RunSQL(
+                    UP_MIGRATION_PARTITION_STANDMETRIC,
+                    DOWN_MIGRATION_UNPARTITION_STANDMETRIC,
+                ),
+            ],
+        ),
+        migrations.RunSQL(
+            UP_MIGRATION_CREATE_GENERATE_STAND_METRICS,
+            DOWN_MIGRATION_CREATE_GENERATE_STAND_METRICS,
+        ),
+    ]
@@ -1,8 +1,11 @@
+import shapely
 from django.contrib.gis.db import models
 from django.contrib.gis.geos import GEOSGeometry
-from django.db.models import QuerySet
+from django.db.models import Q, QuerySet
+from django.db.models.expressions import RawSQL
 from conditions.models import Condition
 from core.models import CreatedAtMixin
+from stands.hexgrid import HEX_GRID_SRID, polygon_cells
 
 
 class StandSizeChoices(models.TextChoices):
@@ -30,6 +33,21 @@ STAND_AREA_ACRES = {
 }
 
 
+# Columns holding the stand geometry projected to the CRSs used by condition
+# rasters (3857) and by forsys (5070), keyed by SRID.
+PROJECTED_GEOMETRY_FIELDS = {
+    5070: "geometry_5070",
+    3857: "geometry_3857",
+}
+
+
+def geometry_field_for(srid) -> str:
+    """Returns the name of the stand geometry column in `srid`, or
+    `geometry` when it is not stored in that CRS.
+    """
+    return PROJECTED_GEOMETRY_FIELDS.get(srid, "geometry")
+
+
 def length_from_size(size):
     return STAND_LENGTH_METERS[size]
 
@@ -38,13 +56,42 @@ def area_from_size(size):
     return STAND_AREA_ACRES[size]
 
 
+# Ids of the stands of a size in a list of hex grid cells.
+CELL_STANDS = """
+SELECT ss.id
+FROM stands_stand ss
+JOIN unnest(%s::int[], %s::int[]) AS cell(i, j)
+    ON ss.hex_i = cell.i AND ss.hex_j = cell.j
+WHERE ss.size = %s
+"""
+
+
+def _cell_stands(cells, stand_size) -> RawSQL:
+    i, j = cells
+    return RawSQL(CELL_STANDS, (i.tolist(), j.tolist(), str(stand_size)))
+
+
 class StandManager(models.Manager):
     def overlapping(
         self, target_geometry: GEOSGeometry, stand_size: str | StandSizeChoices
     ) -> QuerySet["Stand"]:
+        """Returns the stands of a size intersecting `target_geometry`.
+
+        Candidate stands are found from their hex grid cells (see
+        stands/hexgrid.py); only the stands along the boundary of the target
+        are intersected with it.
+        """
+        target = target_geometry.transform(HEX_GRID_SRID, clone=True)
+        interior, boundary = polygon_cells(
+            shapely.from_wkb(bytes(target.wkb)), length_from_size(stand_size)
+        )
         queryset = self.get_queryset()
         return queryset.filter(
-            geometry__intersects=target_geometry,
+            Q(id__in=_cell_stands(interior, stand_size))
+            | Q(
+                id__in=_cell_stands(boundary, stand_size),
+                geometry__intersects=target_geometry,
+            ),
             size=stand_size,
         )
 
@@ -59,6 +106,25 @@ class Stand(CreatedAtMixin, models.Model):
 
     area_m2 = models.FloatField()
 
+    # Projections of `geometry` and its geodesic area, set by the
+    # `stand_projections` trigger whenever `geometry` is written
+    # (see `sql/create_stand_projections_trigger.sql`).
+    geometry_5070 = models.PolygonField(srid=5070, spatial_index=True, null=True)
+
+    geometry_3857 = models.PolygonField(srid=3857, spatial_index=True, null=True)
+
+    area_acres = models.FloatField(null=True)
+
+    # Position of the stand centroid along a Hilbert curve (see stands/hilbert.py).
+    # Ordering by this key keeps consecutive stands spatially close.
+    hilbert_key = models.BigIntegerField(null=True)
+
+    # Column and row of the stand in the ST_HexagonGrid of its size, set by
+    # the `stand_projections` trigger (see stands/hexgrid.py).
+    hex_i = models.IntegerField(null=True)
+
+    hex_j = models.IntegerField(null=True)
+
     objects = StandManager()
 
     class Meta:
@@ -68,7 +134,22 @@ class Stand(CreatedAtMixin, models.Model):
                     "size",
                 ],
                 name="stand_size_index",
-            )
+            ),
+            models.Index(
+                fields=[
+                    "size",
+                    "hilbert_key",
+                ],
+                name="stand_size_hilbert_index",
+            ),
+            models.Index(
+                fields=[
+                    "size",
+                    "hex_i",
+                    "hex_j",
+                ],
+                name="stand_size_hex_index",
+            ),
         ]
 
 
@@ -79,6 +160,13 @@ class StandMetric(CreatedAtMixin, models.Model):
         Condition, related_name="metrics", on_delete=models.CASCADE
     )
 
+    # Size of the stand, copied from it: the table is partitioned by
+    # condition and size (see `sql/partition_standmetric.sql`).
+    size = models.CharField(
+        choices=StandSizeChoices.choices,
+        max_length=16,
+    )
+
     min = models.FloatField(null=True)
 
     avg = models.FloatField(null=True)
@@ -93,13 +181,94 @@ class StandMetric(CreatedAtMixin, models.Model):
 
     minority = models.FloatField(null=True)
 
+    # Pixel count of each value of categorical (integer) conditions, keyed by
+    # value. Only computed on request, see `calculate_metrics --histograms`.
+    histogram = models.JSONField(null=True)
+
     class Meta:
         constraints = [
             models.UniqueConstraint(
                 fields=[
                     "stand",
                     "condition",
+                    "size",
                 ],
                 name="unique_stand_metric",
             )
         ]
+
+
+# Chunk index marking that every stand of a condition and size is committed.
+CHECKPOINT_COMPLETE = -1
+
+
+class StandMetricCheckpointManager(models.Manager):
+    def done_chunks(self, condition_id, size, chunk_size) -> set[int]:
+        return set(
+            self.filter(
+                condition_id=condition_id,
+                size=size,
+                chunk_size=chunk_size,
+                chunk__gte=0,
+            ).values_list("chunk", flat=True)
+        )
+
+    def is_complete(self, condition_id, size) -> bool:
+        return self.filter(
+            condition_id=condition_id, size=size, chunk=CHECKPOINT_COMPLETE
+        ).exists()
+
+    def mark_done(self, condition_id, size, chunk_size, chunks) -> None:
+        self.bulk_create(
+            [
+                self.model(
+                    condition_id=condition_id,
+                    size=size,
+                    chunk_size=chunk_size,
+                    chunk=chunk,
+                )
+                for chunk in chunks
+            ],
+            ignore_conflicts=True,
+        )
+
+    def mark_complete(self, condition_id, size) -> None:
+        self.mark_done(condition_id, size, 0, [CHECKPOINT_COMPLETE])
+
+    def clear(self, condition_ids) -> None:
+        self.filter(condition_id__in=condition_ids).delete()
+
+
+class StandMetricCheckpoint(CreatedAtMixin, models.Model):
+    """A chunk of stands whose metrics for a condition are committed, so an
+    interrupted `calculate_metrics` run can be resumed. Chunks are slices
+    of `chunk_size` stands in the order they are sent to workers.
+    """
+
+    condition = models.ForeignKey(
+        Condition, related_name="stand_metric_checkpoints", on_delete=models.CASCADE
+    )
+
+    size = models.CharField(
+        choices=StandSizeChoices.choices,
+        max_length=16,
+    )
+
+    chunk_size = models.IntegerField()
+
+    chunk = models.IntegerField()
+
+    objects = StandMetricCheckpointManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=[
+                    "condition",
+                    "size",
+                    "chunk_size",
+                    "chunk",
+                ],
+                name="unique_stand_metric_checkpoint",
+            )
+        ]
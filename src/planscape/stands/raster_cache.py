@@ -0,0 +1,163 @@
+"""Memory-mapped copies of condition rasters.
+
+Condition rasters are compressed GeoTIFFs, so every worker computing
+stand metrics decodes the same tiles again. This module materializes a
+band once as an uncompressed `.npy` file, with a JSON sidecar describing
+its grid, under a cache folder. Workers then map the file read-only, and
+share its pages through the OS page cache instead of decoding tiles.
+
+A cached copy is rebuilt when its source changes: the size and mtime of
+the source are checked first, and if they differ, its content hash.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import rasterio
+from affine import Affine
+from rasterio.crs import CRS
+from rasterio.windows import from_bounds
+
+from stands.zonal import iter_strips
+
+CACHE_VERSION = 1
+
+# Rows copied at once when materializing a raster.
+STRIP_HEIGHT = 512
+
+
+class MemmapRaster:
+    """A band of a raster mapped from the cache, exposing the subset of the
+    rasterio dataset API used to compute stand metrics.
+    """
+
+    def __init__(self, array: np.ndarray, metadata: dict):
+        self.array = array
+        self.transform = Affine(*metadata["transform"])
+        self.crs = CRS.from_wkt(metadata["crs"])
+        self.nodata = metadata["nodata"]
+        self.block_shapes = [tuple(metadata["block_shape"])]
+        self.name = metadata["source"]
+
+    @property
+    def height(self) -> int:
+        return self.array.shape[0]
+
+    @property
+    def width(self) -> int:
+        return self.array.shape[1]
+
+    @property
+    def shape(self):
+        return self.array.shape
+
+    def window(self, left, bottom, right, top):
+        return from_bounds(left, bottom, right, top, self.transform)
+
+
+def get_cache_paths(cache_dir, raster_path, band: int = 1):
+    """Returns the paths of the array and of the sidecar of a cached band."""
+    raster_path = Path(raster_path).resolve()
+    key = hashlib.sha1(f"{raster_path}:{band}".encode()).hexdigest()[:16]
+    base = Path(cache_dir) / f"{raster_path.stem}_{key}"
+    return base.with_suffix(".npy"), base.with_suffix(".json")
+
+
+def get_file_digest(path) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _load_metadata(metadata_path) -> Optional[dict]:
+    try:
+        with open(metadata_path) as f:
+            metadata = json.load(f)
+    except FileNotFoundError:
+        return None
+    if metadata.get("version") != CACHE_VERSION:
+        return None
+    return metadata
+
+
+def _save_metadata(metadata_path, metadata: dict) -> None:
+    tmp_path = Path(metadata_path).with_suffix(".tmp.json")
+    with open(tmp_path, "w") as f:
+        json.dump(metadata, f)
+    os.replace(tmp_path, metadata_path)
+
+
+def _materialize(raster_path, array_path, band: int) -> dict:
+    tmp_path = Path(array_path).with_suffix(".tmp.npy")
+    with rasterio.open(raster_path, "r") as src:
+        array = np.lib.format.open_memmap(
+            tmp_path,
+            mode="w+",
+            dtype=src.dtypes[band - 1],
+            shape=(src.height, src.width),
+        )
+        for window in iter_strips(src.height, src.width, STRIP_HEIGHT):
+            rows = slice(window.row_off, window.row_off + window.height)
+            array[rows] = src.read(band, window=window)
+        array.flush()
+        del array
+        metadata = {
+            "transform": list(src.transform)[:6],
+            "crs": src.crs.to_wkt(),
+            "nodata": src.nodata,
+            "block_shape": list(src.block_shapes[band - 1]),
+        }
+    os.replace(tmp_path, array_path)
+    return metadata
+
+
+def get_cached_raster(raster_path, cache_dir, band: int = 1) -> Path:
+    """Returns the path of the cached copy of a band of a raster, creating
+    it, or rebuilding it if the source changed since it was cached.
+    """
+    raster_path = Path(raster_path).resolve()
+    array_path, metadata_path = get_cache_paths(cache_dir, raster_path, band)
+    stat = raster_path.stat()
+
+    metadata = _load_metadata(metadata_path)
+    digest = None
+    if metadata is not None and array_path.exists():
+        if (metadata["mtime_ns"], metadata["size"]) == (
+            stat.st_mtime_ns,
+            stat.st_size,
+        ):
+            return array_path
+        # touched or copied, but maybe not changed
+        digest = get_file_digest(raster_path)
+        if digest == metadata["digest"]:
+            metadata.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            _save_metadata(metadata_path, metadata)
+            return array_path
+
+    Path(cache_dir).mkdir(parents=True, exist_ok=True)
+    metadata = _materialize(raster_path, array_path, band)
+    metadata.update(
+        version=CACHE_VERSION,
+        source=str(raster_path),
+        band=band,
+        mtime_ns=stat.st_mtime_ns,
+        size=stat.st_size,
+        digest=digest or get_file_digest(raster_path),
+    )
+    _save_metadata(metadata_path, metadata)
+    return array_path
+
+
+def open_cached_raster(array_path) -> MemmapRaster:
+    """Maps a cached band read-only."""
+    array_path = Path(array_path)
+    metadata = _load_metadata(array_path.with_suffix(".json"))
+    if metadata is None:
+        raise FileNotFoundError(f"No cache metadata for {array_path}.")
+    return MemmapRaster(np.load(array_path, mmap_mode="r"), metadata)
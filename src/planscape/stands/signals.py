@@ -0,0 +1,8 @@
+"""Signals sent when stands change, so that data derived from them
+elsewhere can be updated.
+"""
+
+from django.dispatch import Signal
+
+# Sent with `size` when stands of that size are created.
+stands_changed = Signal()
@@ -0,0 +1,54 @@
+DROP FUNCTION IF EXISTS compute_condition_stand_stats;
+CREATE OR REPLACE FUNCTION compute_condition_stand_stats(_condition_id INT, _size VARCHAR DEFAULT NULL)
+  RETURNS SETOF stand_stats AS $$
+
+    WITH raster_extent AS (
+      SELECT
+        ST_Transform(ST_Envelope(ST_Collect(ST_Envelope(raster))), 4269) AS geometry
+      FROM conditions_conditionraster
+      WHERE
+        condition_id = _condition_id
+    ),
+
+    stand AS (
+      SELECT
+        ss.id,
+        ST_Transform(ss.geometry, 3857) AS geometry
+      FROM stands_stand ss, raster_extent re
+      WHERE
+        (_size IS NULL OR ss.size = _size) AND
+        ss.geometry && re.geometry AND
+        ST_Intersects(ss.geometry, re.geometry)
+    ),
+
+    -- one row per stand and tile; `&&` uses the index on the convex hull of
+    -- the tiles created by raster2pgsql -I.
+    stats AS (
+      SELECT
+        s.id AS stand_id,
+        (ST_SummaryStats(ST_Clip(cc.raster, s.geometry))).*
+      FROM stand s
+      JOIN conditions_conditionraster cc ON
+        cc.condition_id = _condition_id AND
+        s.geometry && cc.raster AND
+        ST_Intersects(s.geometry, ST_ConvexHull(cc.raster))
+    )
+
+    SELECT
+      ss.stand_id,
+      _condition_id::BIGINT,
+      min(ss.min) AS min,
+      sum(ss.mean * ss.count)/sum(ss.count) AS avg,
+      max(ss.max) AS max,
+      sum(ss.sum) AS sum,
+      sum(ss.count) AS count
+    FROM
+      stats ss
+    WHERE
+      ss.count > 0
+    GROUP BY
+      ss.stand_id
+
+$$ LANGUAGE sql
+STABLE
+PARALLEL SAFE;
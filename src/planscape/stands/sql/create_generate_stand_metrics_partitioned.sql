@@ -0,0 +1,70 @@
+CREATE OR REPLACE FUNCTION generate_stand_metrics(_condition_id INT, _clean bool, _size VARCHAR DEFAULT NULL)
+RETURNS BIGINT AS $$
+DECLARE
+    loaded BIGINT;
+    size_value TEXT;
+BEGIN
+    PERFORM stand_metric_partition(_condition_id, NULL);
+    IF _clean THEN
+        -- truncating partitions leaves no dead rows behind, unlike DELETE.
+        FOREACH size_value IN ARRAY CASE
+            WHEN _size IS NULL THEN ARRAY['SMALL', 'MEDIUM', 'LARGE']
+            ELSE ARRAY[_size::TEXT]
+        END LOOP
+            EXECUTE format(
+                'TRUNCATE %I',
+                stand_metric_partition(_condition_id, size_value)
+            );
+        END LOOP;
+    END IF;
+
+    -- The stats of every stand are computed by a single query. Unlike a loop
+    -- over stands, or INSERT ... SELECT, CREATE TABLE AS can run its query
+    -- on parallel workers.
+    DROP TABLE IF EXISTS generate_stand_metrics_staging;
+    CREATE TEMPORARY TABLE generate_stand_metrics_staging AS
+        SELECT * FROM compute_condition_stand_stats(_condition_id, _size);
+
+    INSERT INTO stands_standmetric (
+        created_at,
+        min,
+        avg,
+        max,
+        sum,
+        count,
+        majority,
+        minority,
+        condition_id,
+        stand_id,
+        size
+    )
+    SELECT
+        timezone('utc', now()),
+        st.min,
+        st.avg,
+        st.max,
+        st.sum,
+        st.count,
+        NULL,
+        NULL,
+        st.condition_id,
+        st.stand_id,
+        ss.size
+    FROM generate_stand_metrics_staging st
+    JOIN stands_stand ss ON ss.id = st.stand_id
+    -- majority and minority are only computed by calculate_metrics, so the
+    -- values it loaded are kept.
+    ON CONFLICT (stand_id, condition_id, size) DO UPDATE
+    SET
+        created_at = EXCLUDED.created_at,
+        min = EXCLUDED.min,
+        avg = EXCLUDED.avg,
+        max = EXCLUDED.max,
+        sum = EXCLUDED.sum,
+        count = EXCLUDED.count;
+    GET DIAGNOSTICS loaded = ROW_COUNT;
+
+    DROP TABLE generate_stand_metrics_staging;
+    RETURN loaded;
+END
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,62 @@
+DROP FUNCTION IF EXISTS generate_stand_metrics;
+CREATE OR REPLACE FUNCTION generate_stand_metrics(_condition_id INT, _clean bool, _size VARCHAR DEFAULT NULL)
+RETURNS BIGINT AS $$
+DECLARE
+    loaded BIGINT;
+BEGIN
+    IF _clean THEN
+        DELETE FROM stands_standmetric sm
+        USING stands_stand ss
+        WHERE
+            sm.stand_id = ss.id AND
+            sm.condition_id = _condition_id AND
+            (_size IS NULL OR ss.size = _size);
+    END IF;
+
+    -- The stats of every stand are computed by a single query. Unlike a loop
+    -- over stands, or INSERT ... SELECT, CREATE TABLE AS can run its query
+    -- on parallel workers.
+    DROP TABLE IF EXISTS generate_stand_metrics_staging;
+    CREATE TEMPORARY TABLE generate_stand_metrics_staging AS
+        SELECT * FROM compute_condition_stand_stats(_condition_id, _size);
+
+    INSERT INTO stands_standmetric (
+        created_at,
+        min,
+        avg,
+        max,
+        sum,
+        count,
+        majority,
+        minority,
+        condition_id,
+        stand_id
+    )
+    SELECT
+        timezone('utc', now()),
+        st.min,
+        st.avg,
+        st.max,
+        st.sum,
+        st.count,
+        NULL,
+        NULL,
+        st.condition_id,
+        st.stand_id
+    FROM generate_stand_metrics_staging st
+    -- majority and minority are only computed by calculate_metrics, so the
+    -- values it loaded are kept.
+    ON CONFLICT (stand_id, condition_id) DO UPDATE
+    SET
+        created_at = EXCLUDED.created_at,
+        min = EXCLUDED.min,
+        avg = EXCLUDED.avg,
+        max = EXCLUDED.max,
+        sum = EXCLUDED.sum,
+        count = EXCLUDED.count;
+    GET DIAGNOSTICS loaded = ROW_COUNT;
+
+    DROP TABLE generate_stand_metrics_staging;
+    RETURN loaded;
+END
+$$ LANGUAGE plpgsql;
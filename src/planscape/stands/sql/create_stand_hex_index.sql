@@ -0,0 +1,48 @@
+-- Side length in meters of the hexagons of each stand size, as in
+-- stands.models.STAND_LENGTH_METERS.
+CREATE OR REPLACE FUNCTION stand_hex_length(_size VARCHAR)
+RETURNS DOUBLE PRECISION AS $$
+    SELECT CASE _size
+        WHEN 'LARGE' THEN 877.38267558
+        WHEN 'MEDIUM' THEN 392.377463
+        WHEN 'SMALL' THEN 124.0806483
+    END
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+-- Column i and row j of the ST_HexagonGrid cell of side _length whose
+-- center is closest to _point (see stands/hexgrid.py).
+CREATE OR REPLACE FUNCTION hex_cell(_point GEOMETRY, _length DOUBLE PRECISION)
+RETURNS INT[] AS $$
+    WITH column_index AS (
+        SELECT round(ST_X(_point) / (1.5 * _length))::INT AS i
+    )
+    SELECT ARRAY[
+        i,
+        round(
+            (ST_Y(_point) - (i % 2 <> 0)::INT * sqrt(3) * _length / 2)
+            / (sqrt(3) * _length)
+        )::INT
+    ]
+    FROM column_index
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+CREATE OR REPLACE FUNCTION set_stand_projections()
+RETURNS trigger AS $$
+DECLARE
+    cell INT[];
+BEGIN
+    NEW.geometry_5070 := ST_Transform(NEW.geometry, 5070);
+    NEW.geometry_3857 := ST_Transform(NEW.geometry, 3857);
+    -- same definition of acres as rscripts/forsys.R
+    NEW.area_acres := ST_Area(NEW.geometry::geography, TRUE) / 4047;
+    cell := hex_cell(ST_Centroid(NEW.geometry_5070), stand_hex_length(NEW.size));
+    NEW.hex_i := cell[1];
+    NEW.hex_j := cell[2];
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS stand_projections ON stands_stand;
+CREATE TRIGGER stand_projections
+BEFORE INSERT OR UPDATE OF geometry, size ON stands_stand
+FOR EACH ROW EXECUTE FUNCTION set_stand_projections();
@@ -0,0 +1,15 @@
+CREATE OR REPLACE FUNCTION set_stand_projections()
+RETURNS trigger AS $$
+BEGIN
+    NEW.geometry_5070 := ST_Transform(NEW.geometry, 5070);
+    NEW.geometry_3857 := ST_Transform(NEW.geometry, 3857);
+    -- same definition of acres as rscripts/forsys.R
+    NEW.area_acres := ST_Area(NEW.geometry::geography, TRUE) / 4047;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS stand_projections ON stands_stand;
+CREATE TRIGGER stand_projections
+BEFORE INSERT OR UPDATE OF geometry ON stands_stand
+FOR EACH ROW EXECUTE FUNCTION set_stand_projections();
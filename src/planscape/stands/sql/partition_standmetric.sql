@@ -0,0 +1,137 @@
+-- stands_standmetric is partitioned by condition, and the partition of a
+-- condition by stand size, so a query on one condition and size only reads
+-- stands_standmetric_<condition id>_<size>. Metrics of conditions without
+-- partitions go to stands_standmetric_default.
+--
+-- The metrics are not copied here: they stay in
+-- stands_standmetric_unpartitioned until `manage.py partition_stand_metrics`
+-- (run by `make deploy-backend` after migrating) moves them, a condition per
+-- transaction, and drops that table. forsys reads them from that table
+-- meanwhile.
+ALTER TABLE stands_standmetric RENAME TO stands_standmetric_unpartitioned;
+ALTER INDEX stands_standmetric_pkey RENAME TO stands_standmetric_unpartitioned_pkey;
+ALTER TABLE stands_standmetric_unpartitioned
+    RENAME CONSTRAINT unique_stand_metric TO unique_stand_metric_unpartitioned;
+DO $$ BEGIN
+    EXECUTE format(
+        'ALTER SEQUENCE %s RENAME TO stands_standmetric_unpartitioned_id_seq',
+        pg_get_serial_sequence('stands_standmetric_unpartitioned', 'id')
+    );
+END $$;
+
+CREATE TABLE stands_standmetric (
+    id           BIGINT NOT NULL,
+    created_at   TIMESTAMP WITH TIME ZONE,
+    stand_id     BIGINT NOT NULL
+        REFERENCES stands_stand (id) DEFERRABLE INITIALLY DEFERRED,
+    condition_id BIGINT NOT NULL
+        REFERENCES conditions_condition (id) DEFERRABLE INITIALLY DEFERRED,
+    size         VARCHAR(16) NOT NULL,
+    min          DOUBLE PRECISION,
+    avg          DOUBLE PRECISION,
+    max          DOUBLE PRECISION,
+    sum          DOUBLE PRECISION,
+    count        INTEGER,
+    majority     DOUBLE PRECISION,
+    minority     DOUBLE PRECISION,
+    histogram    JSONB,
+    PRIMARY KEY (id, condition_id, size),
+    CONSTRAINT unique_stand_metric UNIQUE (stand_id, condition_id, size)
+) PARTITION BY LIST (condition_id);
+
+CREATE TABLE stands_standmetric_default
+    PARTITION OF stands_standmetric DEFAULT;
+
+-- Creates the partitions of a condition if they do not exist, and returns
+-- the name of the partition of a size.
+CREATE OR REPLACE FUNCTION stand_metric_partition(_condition_id BIGINT, _size VARCHAR)
+RETURNS TEXT AS $$
+DECLARE
+    condition_table TEXT := format('stands_standmetric_%s', _condition_id);
+    size_value TEXT;
+BEGIN
+    IF to_regclass(condition_table) IS NULL THEN
+        PERFORM pg_advisory_xact_lock(hashtext(condition_table));
+    END IF;
+    IF to_regclass(condition_table) IS NULL THEN
+        -- tables with pending deferred foreign key checks can not be altered.
+        SET CONSTRAINTS ALL IMMEDIATE;
+        -- a partition can not be created while the default partition holds
+        -- some of its rows, so they are set aside meanwhile.
+        CREATE TEMPORARY TABLE stand_metric_partition_moved
+            (LIKE stands_standmetric);
+        WITH moved AS (
+            DELETE FROM stands_standmetric_default
+            WHERE condition_id = _condition_id
+            RETURNING *
+        )
+        INSERT INTO stand_metric_partition_moved SELECT * FROM moved;
+
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF stands_standmetric '
+            'FOR VALUES IN (%s) PARTITION BY LIST (size)',
+            condition_table,
+            _condition_id
+        );
+        FOREACH size_value IN ARRAY ARRAY['SMALL', 'MEDIUM', 'LARGE'] LOOP
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF %I FOR VALUES IN (%L)',
+                condition_table || '_' || lower(size_value),
+                condition_table,
+                size_value
+            );
+        END LOOP;
+
+        INSERT INTO stands_standmetric SELECT * FROM stand_metric_partition_moved;
+        DROP TABLE stand_metric_partition_moved;
+    END IF;
+    RETURN condition_table || '_' || lower(_size);
+END
+$$ LANGUAGE plpgsql;
+
+-- Replaces the partition of a condition and size by _table, a table
+-- created LIKE stands_standmetric and holding its new metrics.
+CREATE OR REPLACE FUNCTION replace_stand_metric_partition(
+    _condition_id BIGINT,
+    _size VARCHAR,
+    _table TEXT
+) RETURNS VOID AS $$
+DECLARE
+    partition TEXT := stand_metric_partition(_condition_id, _size);
+    condition_table TEXT := format('stands_standmetric_%s', _condition_id);
+    check_name TEXT := _table || '_check';
+BEGIN
+    SET CONSTRAINTS ALL IMMEDIATE;
+    -- proves the partition constraint, so ATTACH does not scan the table.
+    EXECUTE format(
+        'ALTER TABLE %I ADD CONSTRAINT %I CHECK ('
+        'condition_id IS NOT NULL AND condition_id = %s AND '
+        'size IS NOT NULL AND size = %L)',
+        _table,
+        check_name,
+        _condition_id,
+        _size
+    );
+    EXECUTE format('ALTER TABLE %I DETACH PARTITION %I', condition_table, partition);
+    EXECUTE format('DROP TABLE %I', partition);
+    EXECUTE format('ALTER TABLE %I RENAME TO %I', _table, partition);
+    EXECUTE format(
+        'ALTER TABLE %I ATTACH PARTITION %I FOR VALUES IN (%L)',
+        condition_table,
+        partition,
+        _size
+    );
+    EXECUTE format('ALTER TABLE %I DROP CONSTRAINT %I', partition, check_name);
+END
+$$ LANGUAGE plpgsql;
+
+-- identity columns are not supported by partitioned tables
+CREATE SEQUENCE stands_standmetric_id_seq OWNED BY stands_standmetric.id;
+SELECT setval(
+    'stands_standmetric_id_seq',
+    -- after the ids of the metrics to move, which keep their ids.
+    COALESCE((SELECT max(id) FROM stands_standmetric_unpartitioned), 0) + 1,
+    FALSE
+);
+ALTER TABLE stands_standmetric
+    ALTER COLUMN id SET DEFAULT nextval('stands_standmetric_id_seq');
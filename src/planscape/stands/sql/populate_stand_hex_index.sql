@@ -0,0 +1,12 @@
+UPDATE stands_stand ss
+SET
+    hex_i = cell.ij[1],
+    hex_j = cell.ij[2]
+FROM (
+    SELECT
+        id,
+        hex_cell(ST_Centroid(geometry_5070), stand_hex_length(size)) AS ij
+    FROM stands_stand
+    WHERE hex_i IS NULL OR hex_j IS NULL
+) cell
+WHERE ss.id = cell.id;
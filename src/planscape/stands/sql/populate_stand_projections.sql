@@ -0,0 +1,9 @@
+UPDATE stands_stand
+SET
+    geometry_5070 = ST_Transform(geometry, 5070),
+    geometry_3857 = ST_Transform(geometry, 3857),
+    area_acres = ST_Area(geometry::geography, TRUE) / 4047
+WHERE
+    geometry_5070 IS NULL OR
+    geometry_3857 IS NULL OR
+    area_acres IS NULL;
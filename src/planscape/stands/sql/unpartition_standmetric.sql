@@ -0,0 +1,79 @@
+-- Reverts partition_standmetric.sql: moves every metric, including those
+-- not moved by `manage.py partition_stand_metrics` yet, back to an
+-- unpartitioned stands_standmetric, unique by stand and condition.
+ALTER TABLE stands_standmetric RENAME TO stands_standmetric_partitioned;
+
+CREATE TABLE IF NOT EXISTS stands_standmetric_unpartitioned (
+    id           BIGINT GENERATED BY DEFAULT AS IDENTITY,
+    created_at   TIMESTAMP WITH TIME ZONE,
+    stand_id     BIGINT NOT NULL
+        REFERENCES stands_stand (id) DEFERRABLE INITIALLY DEFERRED,
+    condition_id BIGINT NOT NULL
+        REFERENCES conditions_condition (id) DEFERRABLE INITIALLY DEFERRED,
+    min          DOUBLE PRECISION,
+    avg          DOUBLE PRECISION,
+    max          DOUBLE PRECISION,
+    sum          DOUBLE PRECISION,
+    count        INTEGER,
+    majority     DOUBLE PRECISION,
+    minority     DOUBLE PRECISION,
+    histogram    JSONB,
+    CONSTRAINT stands_standmetric_unpartitioned_pkey PRIMARY KEY (id),
+    CONSTRAINT unique_stand_metric_unpartitioned UNIQUE (stand_id, condition_id)
+);
+CREATE INDEX IF NOT EXISTS stands_standmetric_unpartitioned_condition_id
+    ON stands_standmetric_unpartitioned (condition_id);
+
+-- metrics in the partitions were computed after those left to move.
+DELETE FROM stands_standmetric_unpartitioned su
+USING stands_standmetric_partitioned sp
+WHERE su.stand_id = sp.stand_id AND su.condition_id = sp.condition_id;
+
+INSERT INTO stands_standmetric_unpartitioned (
+    id,
+    created_at,
+    stand_id,
+    condition_id,
+    min,
+    avg,
+    max,
+    sum,
+    count,
+    majority,
+    minority,
+    histogram
+)
+SELECT
+    id,
+    created_at,
+    stand_id,
+    condition_id,
+    min,
+    avg,
+    max,
+    sum,
+    count,
+    majority,
+    minority,
+    histogram
+FROM stands_standmetric_partitioned;
+
+DROP TABLE stands_standmetric_partitioned;
+DROP FUNCTION IF EXISTS replace_stand_metric_partition(BIGINT, VARCHAR, TEXT);
+DROP FUNCTION IF EXISTS stand_metric_partition(BIGINT, VARCHAR);
+
+ALTER TABLE stands_standmetric_unpartitioned RENAME TO stands_standmetric;
+ALTER INDEX stands_standmetric_unpartitioned_pkey RENAME TO stands_standmetric_pkey;
+ALTER TABLE stands_standmetric
+    RENAME CONSTRAINT unique_stand_metric_unpartitioned TO unique_stand_metric;
+DO $$ BEGIN
+    EXECUTE format(
+        'ALTER SEQUENCE %s RENAME TO stands_standmetric_id_seq',
+        pg_get_serial_sequence('stands_standmetric', 'id')
+    );
+END $$;
+SELECT setval(
+    pg_get_serial_sequence('stands_standmetric', 'id'),
+    COALESCE((SELECT max(id) FROM stands_standmetric), 0) + 1,
+    FALSE
+);
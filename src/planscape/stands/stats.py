@@ -1,13 +1,35 @@
 import sys
 
+from rasterio.io import DatasetReader
 from rasterstats.io import parse_feature
 import numpy as np
 from shapely.geometry import shape
+from shapely.geometry.base import BaseGeometry
 from rasterstats.main import Raster
 from rasterstats.utils import (
-    key_assoc_val,
     rasterize_geom,
 )
+from stands.raster_cache import MemmapRaster
+from utils.timing import NULL_TIMER
+
+
+class OpenRaster(Raster):
+    """A rasterstats `Raster` reading from a dataset that is already open.
+
+    The dataset is owned by the caller and is left open on exit, so it can
+    be reused across many stands.
+    """
+
+    def __init__(self, src: DatasetReader, nodata=None, band=1):
+        self.array = None
+        self.src = src
+        self.affine = src.transform
+        self.shape = (src.height, src.width)
+        self.band = band
+        self.nodata = float(nodata) if nodata is not None else src.nodata
+
+    def __exit__(self, *args):
+        pass
 
 
 def get_zonal_stats(
@@ -18,71 +40,116 @@ def get_zonal_stats(
     affine=None,
     all_touched=False,
     boundless=True,
+    timer=NULL_TIMER,
+    histogram=False,
     **kwargs,
 ):
     """Custom zonal statistics function. Strips out everything we don't
     need from the original one.
+
+    `stand_geometry` may be a shapely geometry or anything `parse_feature`
+    understands (WKT, WKB, GeoJSON). `raster` may be a path, an open
+    rasterio dataset, which is not closed, or a `MemmapRaster` from
+    `stands.raster_cache`. `timer` (see `utils.timing`) records the time
+    spent in the read, rasterize and reduce phases. With `histogram`, the
+    result includes the pixel count of each value of integer rasters, as
+    `histogram` (None for floating point rasters).
     """
 
-    with Raster(raster, affine, nodata, band) as rast:
-        feat = parse_feature(stand_geometry)
+    if isinstance(raster, DatasetReader):
+        rast = OpenRaster(raster, nodata, band)
+    elif isinstance(raster, MemmapRaster):
+        rast = Raster(
+            raster.array,
+            raster.transform,
+            nodata if nodata is not None else raster.nodata,
+        )
+    else:
+        rast = Raster(raster, affine, nodata, band)
 
-        geom = shape(feat["geometry"])
+    with rast:
+        if isinstance(stand_geometry, BaseGeometry):
+            geom = stand_geometry
+        else:
+            geom = shape(parse_feature(stand_geometry)["geometry"])
         geom_bounds = tuple(geom.bounds)
-        fsrc = rast.read(bounds=geom_bounds, boundless=boundless)
+        with timer.phase("read"):
+            fsrc = rast.read(bounds=geom_bounds, boundless=boundless)
 
-        rv_array = rasterize_geom(geom, like=fsrc, all_touched=all_touched)
+        with timer.phase("rasterize"):
+            rv_array = rasterize_geom(geom, like=fsrc, all_touched=all_touched)
 
-        # nodata mask
-        isnodata = fsrc.array == fsrc.nodata
+        with timer.phase("reduce"):
+            return _reduce(fsrc, rv_array, histogram)
 
-        # add nan mask (if necessary)
-        has_nan = np.issubdtype(fsrc.array.dtype, np.floating) and np.isnan(
-            fsrc.array.min()
-        )
-        if has_nan:
-            isnodata = isnodata | np.isnan(fsrc.array)
 
-        # Mask the source data array
-        # mask everything that is not a valid value or not within our geom
-        masked = np.ma.MaskedArray(fsrc.array, mask=(isnodata | ~rv_array))
+def _value_counts(values):
+    """Returns the distinct values and their counts, sorted by value.
+    Integer values spanning a small range are counted with a bincount
+    instead of a sort.
+    """
+    if np.issubdtype(values.dtype, np.integer):
+        min_value = int(values.min())
+        if int(values.max()) - min_value > max(values.size, 1 << 16):
+            return np.unique(values, return_counts=True)
+        counts = np.bincount((values.astype("int64") - min_value).ravel())
+        keys = np.flatnonzero(counts)
+        return (keys + min_value).astype(values.dtype), counts[keys]
+    return np.unique(values, return_counts=True)
 
-        if sys.maxsize > 2**32 and issubclass(masked.dtype.type, np.integer):
-            accum_dtype = "int64"
-        else:
-            accum_dtype = None  #
-
-        if masked.compressed().size == 0:
-            # nothing here, fill with None and move on
-            return {
-                "min": None,
-                "max": None,
-                "mean": None,
-                "count": 0,
-                "sum": None,
-                "majority": None,
-                "minority": None,
-            }
-
-        keys, counts = np.unique(masked.compressed(), return_counts=True)
-        try:
-            pixel_count = dict(
-                zip([k.item() for k in keys], [c.item() for c in counts])
-            )
-        except AttributeError:
-            pixel_count = dict(
-                zip(
-                    [np.asscalar(k) for k in keys],
-                    [np.asscalar(c) for c in counts],
-                )
-            )
-
-        return {
-            "min": float(masked.min()),
-            "max": float(masked.max()),
-            "mean": float(masked.mean(dtype=accum_dtype)),
-            "count": int(masked.count()),
-            "sum": float(masked.sum(dtype=accum_dtype)),
-            "majority": float(key_assoc_val(pixel_count, max)),
-            "minority": float(key_assoc_val(pixel_count, min)),
+
+def _reduce(fsrc, rv_array, histogram=False):
+    # nodata mask
+    isnodata = fsrc.array == fsrc.nodata
+
+    # add nan mask (if necessary)
+    has_nan = np.issubdtype(fsrc.array.dtype, np.floating) and np.isnan(
+        fsrc.array.min()
+    )
+    if has_nan:
+        isnodata = isnodata | np.isnan(fsrc.array)
+
+    # Mask the source data array
+    # mask everything that is not a valid value or not within our geom
+    masked = np.ma.MaskedArray(fsrc.array, mask=(isnodata | ~rv_array))
+
+    if sys.maxsize > 2**32 and issubclass(masked.dtype.type, np.integer):
+        accum_dtype = "int64"
+    else:
+        accum_dtype = None  #
+
+    compressed = masked.compressed()
+    if compressed.size == 0:
+        # nothing here, fill with None and move on
+        stats = {
+            "min": None,
+            "max": None,
+            "mean": None,
+            "count": 0,
+            "sum": None,
+            "majority": None,
+            "minority": None,
         }
+        if histogram:
+            stats["histogram"] = None
+        return stats
+
+    keys, counts = _value_counts(compressed)
+
+    stats = {
+        "min": float(masked.min()),
+        "max": float(masked.max()),
+        "mean": float(masked.mean(dtype=accum_dtype)),
+        "count": int(masked.count()),
+        "sum": float(masked.sum(dtype=accum_dtype)),
+        # the first of the sorted values with the largest (smallest) count
+        "majority": float(keys[np.argmax(counts)]),
+        "minority": float(keys[np.argmin(counts)]),
+    }
+    if histogram:
+        stats["histogram"] = (
+            dict(zip(keys.tolist(), counts.tolist()))
+            if np.issubdtype(compressed.dtype, np.integer)
+            else None
+        )
+    return stats
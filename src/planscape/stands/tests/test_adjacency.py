@@ -0,0 +1,95 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from stands.adjacency import build_adjacency, load_adjacency, save_adjacency
+from stands.hexgrid import hexagons
+
+LENGTH = 124.0806483
+
+
+class AdjacencyTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = Path(tempfile.mkdtemp())
+        i, j = (a.ravel() for a in np.meshgrid(range(-5, 6), range(-4, 7)))
+        # leave holes in the grid, and shuffle the ids
+        keep = np.random.default_rng(0).random(i.size) > 0.2
+        self.i, self.j = i[keep], j[keep]
+        self.ids = np.random.default_rng(1).permutation(self.i.size) * 3 + 100
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_neighbours_are_touching_hexagons(self):
+        adjacency = save_adjacency(
+            self.folder, "SMALL", *build_adjacency(self.ids, self.i, self.j)
+        )
+        graph = load_adjacency(self.folder, "SMALL")
+        self.assertTrue(str(adjacency).endswith("small"))
+        self.assertIsInstance(graph.ids, np.memmap)
+        self.assertEqual(len(graph), self.ids.size)
+
+        polygons = dict(zip(self.ids.tolist(), hexagons(self.i, self.j, LENGTH)))
+        for stand_id, polygon in polygons.items():
+            expected = {
+                other
+                for other, other_polygon in polygons.items()
+                if other != stand_id and polygon.distance(other_polygon) < 1e-6
+            }
+            self.assertEqual(set(graph.neighbours(stand_id).tolist()), expected)
+
+    def test_expand(self):
+        graph = load_adjacency(
+            save_adjacency(
+                self.folder, "SMALL", *build_adjacency(self.ids, self.i, self.j)
+            ).parent,
+            "SMALL",
+        )
+        start = int(self.ids[0])
+        one_step = set(graph.expand([start]).tolist())
+        self.assertEqual(one_step, {start} | set(graph.neighbours(start).tolist()))
+
+        two_steps = set(graph.expand([start], steps=2).tolist())
+        expected = set(one_step)
+        for stand_id in one_step:
+            expected |= set(graph.neighbours(stand_id).tolist())
+        self.assertEqual(two_steps, expected)
+
+        everything = graph.expand(self.ids.tolist(), steps=3)
+        self.assertEqual(sorted(everything.tolist()), sorted(self.ids.tolist()))
+
+    def test_missing_stands(self):
+        ids, indptr, indices = build_adjacency(self.ids, self.i, self.j)
+        save_adjacency(self.folder, "SMALL", ids, indptr, indices)
+        graph = load_adjacency(self.folder, "SMALL")
+        with self.assertRaises(KeyError):
+            graph.neighbours(1)
+        with self.assertRaises(FileNotFoundError):
+            load_adjacency(self.folder, "LARGE")
+
+    def test_saving_replaces_the_graph_at_once(self):
+        ids, indptr, indices = build_adjacency(self.ids, self.i, self.j)
+        path = save_adjacency(self.folder, "SMALL", ids, indptr, indices)
+        first = path.resolve()
+        graph = load_adjacency(self.folder, "SMALL")
+
+        for _ in range(2):
+            save_adjacency(
+                self.folder,
+                "SMALL",
+                *build_adjacency(self.ids[:3], self.i[:3], self.j[:3]),
+            )
+
+        self.assertTrue(path.is_symlink())
+        self.assertEqual(len(load_adjacency(self.folder, "SMALL")), 3)
+        # the first save was removed, but the graph mapped from it is intact.
+        self.assertFalse(first.exists())
+        self.assertEqual(len(graph), self.ids.size)
+        self.assertEqual(len(list(self.folder.glob("small.*"))), 2)
+
+    def test_empty(self):
+        ids, indptr, indices = build_adjacency([], [], [])
+        self.assertEqual((ids.size, indptr.tolist(), indices.size), (0, [0], 0))
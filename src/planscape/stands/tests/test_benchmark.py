@@ -0,0 +1,64 @@
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import rasterio
+
+from stands.benchmark import run_benchmarks, write_synthetic_raster
+
+
+class BenchmarkTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_synthetic_rasters(self):
+        for kind, dtype in [("float", "float32"), ("categorical", "uint8")]:
+            path = write_synthetic_raster(self.folder / f"{kind}.tif", kind, 40, 30, 30)
+            with rasterio.open(path) as src:
+                array = src.read(1)
+                self.assertEqual(array.dtype, dtype)
+                self.assertEqual(array.shape, (30, 40))
+                if kind == "float":
+                    self.assertTrue(np.isnan(src.nodata))
+                    self.assertTrue(np.isnan(array).any())
+                else:
+                    self.assertTrue((array == src.nodata).any())
+                    self.assertTrue(array[array != src.nodata].max() <= 9)
+
+    def test_run_benchmarks(self):
+        messages = []
+        results = run_benchmarks(
+            self.folder,
+            {"SMALL": 124, "LARGE": 400},
+            width=60,
+            height=50,
+            write=messages.append,
+        )
+        json.dumps(results)
+
+        self.assertEqual(len(results["results"]), 2 * 2 * 3)
+        self.assertEqual(len(messages), 2 * 2 * 3)
+        by_case = {}
+        for result in results["results"]:
+            self.assertGreater(result["stands_per_second"], 0)
+            self.assertGreater(result["peak_rss_bytes"], 0)
+            self.assertEqual(
+                set(result["phases"].keys()), {"read", "rasterize", "reduce"}
+            )
+            self.assertGreater(result["phases"]["reduce"], 0)
+            by_case[(result["size"], result["raster"], result["engine"])] = result
+
+        # both engines see the same stands with data
+        for size in ["SMALL", "LARGE"]:
+            for kind in ["float", "categorical"]:
+                for engine in ["memmap", "label"]:
+                    self.assertEqual(
+                        by_case[(size, kind, "stand")]["stands_with_data"],
+                        by_case[(size, kind, engine)]["stands_with_data"],
+                    )
@@ -0,0 +1,61 @@
+from django.test import TestCase
+
+from conditions.models import BaseCondition, Condition
+from stands.management.commands.calculate_metrics import get_chunks, skip_chunks
+from stands.models import StandMetricCheckpoint, StandSizeChoices
+
+
+class StandMetricCheckpointTest(TestCase):
+    def setUp(self):
+        base = BaseCondition.objects.create(
+            condition_name="foo", condition_level=3, region_name="sierra-nevada"
+        )
+        self.condition = Condition.objects.create(
+            condition_dataset=base, raster_name="foo.tif"
+        )
+
+    def test_done_chunks(self):
+        checkpoints = StandMetricCheckpoint.objects
+        checkpoints.mark_done(self.condition.pk, StandSizeChoices.LARGE, 500, [0, 3])
+        checkpoints.mark_done(self.condition.pk, StandSizeChoices.LARGE, 500, [3, 4])
+        checkpoints.mark_done(self.condition.pk, StandSizeChoices.SMALL, 500, [1])
+        checkpoints.mark_done(self.condition.pk, StandSizeChoices.LARGE, 100, [2])
+
+        self.assertEqual(
+            checkpoints.done_chunks(self.condition.pk, StandSizeChoices.LARGE, 500),
+            {0, 3, 4},
+        )
+        self.assertFalse(
+            checkpoints.is_complete(self.condition.pk, StandSizeChoices.LARGE)
+        )
+
+    def test_complete_and_clear(self):
+        checkpoints = StandMetricCheckpoint.objects
+        checkpoints.mark_done(self.condition.pk, StandSizeChoices.LARGE, 500, [0])
+        checkpoints.mark_complete(self.condition.pk, StandSizeChoices.LARGE)
+
+        self.assertTrue(
+            checkpoints.is_complete(self.condition.pk, StandSizeChoices.LARGE)
+        )
+        self.assertEqual(
+            checkpoints.done_chunks(self.condition.pk, StandSizeChoices.LARGE, 500),
+            {0},
+        )
+
+        checkpoints.clear([self.condition.pk])
+        self.assertFalse(
+            checkpoints.is_complete(self.condition.pk, StandSizeChoices.LARGE)
+        )
+        self.assertEqual(checkpoints.count(), 0)
+
+
+class SkipChunksTest(TestCase):
+    def test_skips_done_chunks(self):
+        stands = [(i, b"") for i in range(7)]
+        skipped = []
+        chunks = list(skip_chunks(get_chunks(stands, 3), {1}, skipped.append))
+        self.assertEqual(
+            [(index, [i for i, _ in chunk]) for index, chunk in chunks],
+            [(0, [0, 1, 2]), (2, [6])],
+        )
+        self.assertEqual(skipped, [3])
@@ -0,0 +1,81 @@
+import numpy as np
+from django.conf import settings
+from django.contrib.gis.gdal import GDALRaster
+from django.contrib.gis.geos import Polygon
+from django.db import connection
+from django.test import TestCase
+
+from conditions.models import BaseCondition, Condition, ConditionRaster
+from stands.loader import StandMetricLoader
+from stands.models import Stand, StandMetric, StandSizeChoices
+
+
+class GenerateStandMetricsTest(TestCase):
+    def setUp(self):
+        base = BaseCondition.objects.create(
+            condition_name="foo", condition_level=3, region_name="sierra-nevada"
+        )
+        self.condition = Condition.objects.create(
+            condition_dataset=base, raster_name="foo.tif"
+        )
+        ConditionRaster.objects.create(
+            name="foo.tif",
+            condition=self.condition,
+            raster=GDALRaster(
+                {
+                    "srid": settings.CRS_FOR_RASTERS,
+                    "width": 10,
+                    "height": 10,
+                    "scale": [100, -100],
+                    "skew": [0, 0],
+                    "origin": [0, 100000],
+                    "bands": [
+                        {
+                            "data": np.full((10, 10), 5.0, dtype=np.float32),
+                            "nodata_value": np.nan,
+                        }
+                    ],
+                }
+            ),
+        )
+        geometry = Polygon(
+            ((100, 99100), (100, 99900), (900, 99900), (900, 99100), (100, 99100)),
+            srid=settings.CRS_FOR_RASTERS,
+        )
+        self.stand = Stand.objects.create(
+            size=StandSizeChoices.LARGE,
+            geometry=geometry.transform(4269, clone=True),
+            area_m2=1,
+        )
+
+    def generate(self, clean=False):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT generate_stand_metrics(%s, %s, %s)",
+                [self.condition.pk, clean, StandSizeChoices.LARGE],
+            )
+            return cursor.fetchone()[0]
+
+    def test_rerun_keeps_majority_and_minority(self):
+        loader = StandMetricLoader()
+        loader.write(
+            self.stand.pk,
+            self.condition.pk,
+            {
+                "min": 1.0,
+                "max": 1.0,
+                "mean": 1.0,
+                "sum": 1.0,
+                "count": 1,
+                "majority": 7.0,
+                "minority": 3.0,
+            },
+        )
+        loader.commit(self.condition.pk)
+
+        self.assertEqual(self.generate(), 1)
+
+        metric = StandMetric.objects.get(stand=self.stand, condition=self.condition)
+        self.assertEqual(metric.avg, 5.0)
+        self.assertEqual(metric.majority, 7.0)
+        self.assertEqual(metric.minority, 3.0)
@@ -0,0 +1,81 @@
+import csv
+import io
+import unittest
+
+import numpy as np
+import shapely
+from shapely.geometry import Point, box
+
+from stands.generator import Tile, get_tile_stands, get_tiles, write_stands
+from stands.hexgrid import bbox_cells, hexagons
+
+LENGTH = 124.0806483
+
+EXTENT = (-2065000.0, 1925000.0, -2060000.0, 1929000.0)
+
+
+class GeneratorTest(unittest.TestCase):
+    def get_cells(self, tiles, extent=EXTENT, clip=None):
+        cells = []
+        for tile in tiles:
+            i, j, _ = get_tile_stands(tile, extent, LENGTH, clip)
+            cells.extend(zip(i.tolist(), j.tolist()))
+        return cells
+
+    def test_tiles_hold_each_cell_once(self):
+        tiles = get_tiles(EXTENT, LENGTH, 8)
+        cells = self.get_cells(tiles)
+        self.assertEqual(len(cells), len(set(cells)))
+
+        i, j = bbox_cells(EXTENT, LENGTH)
+        intersecting = shapely.intersects(hexagons(i, j, LENGTH), box(*EXTENT))
+        self.assertEqual(
+            set(cells), set(zip(i[intersecting].tolist(), j[intersecting].tolist()))
+        )
+
+    def test_tiles_are_aligned(self):
+        tiles = get_tiles(EXTENT, LENGTH, 8)
+        shifted = get_tiles(
+            (EXTENT[0] + 500, EXTENT[1] + 500, EXTENT[2], EXTENT[3]), LENGTH, 8
+        )
+        self.assertTrue(set(shifted) <= set(tiles))
+        for tile in tiles:
+            self.assertEqual((tile.i0 % 8, tile.j0 % 8), (0, 0))
+
+    def test_tile_bounds(self):
+        tile = Tile(-16, 8, -8, 16)
+        i, j = (a.ravel() for a in np.meshgrid(range(-16, -8), range(8, 16)))
+        union = shapely.union_all(hexagons(i, j, LENGTH))
+        np.testing.assert_allclose(union.bounds, tile.bounds(LENGTH))
+
+    def test_clip(self):
+        clip = Point(-2062500, 1927000).buffer(1000)
+        tiles = get_tiles(EXTENT, LENGTH, 8, clip)
+        self.assertLess(len(tiles), len(get_tiles(EXTENT, LENGTH, 8)))
+
+        cells = self.get_cells(tiles, clip=clip)
+        i, j = np.array(cells).T
+        self.assertTrue(shapely.intersects(hexagons(i, j, LENGTH), clip).all())
+        self.assertEqual(
+            set(cells),
+            set(self.get_cells(get_tiles(EXTENT, LENGTH, 8), clip=clip)),
+        )
+
+    def test_empty_tile(self):
+        i, j, polygons = get_tile_stands(Tile(0, 0, 8, 8), EXTENT, LENGTH)
+        self.assertEqual((i.size, j.size, polygons.size), (0, 0, 0))
+
+    def test_write_stands(self):
+        i, j, polygons = get_tile_stands(
+            get_tiles(EXTENT, LENGTH, 8)[5], EXTENT, LENGTH
+        )
+        buffer = io.StringIO()
+        write_stands(buffer, i, j, polygons, LENGTH)
+        buffer.seek(0)
+        rows = list(csv.reader(buffer))
+
+        self.assertEqual(len(rows), i.size)
+        hex_i, hex_j, wkb, area = rows[0]
+        self.assertEqual((int(hex_i), int(hex_j)), (i[0], j[0]))
+        self.assertTrue(shapely.from_wkb(wkb).equals(polygons[0]))
+        self.assertAlmostEqual(float(area), polygons[0].area, places=1)
@@ -0,0 +1,81 @@
+import unittest
+
+import numpy as np
+import shapely
+from shapely.geometry import Point, box
+
+from stands.hexgrid import (
+    SQRT3,
+    bbox_cells,
+    cell_centers,
+    hexagon,
+    hexagons,
+    point_cells,
+    polygon_cells,
+)
+
+LENGTH = 124.0806483
+
+
+class HexGridTest(unittest.TestCase):
+    def test_cell_layout(self):
+        # ST_HexagonGrid: odd columns are shifted up by half a height
+        x, y = cell_centers([0, 1, -1, 2], [0, 0, 0, -1], LENGTH)
+        np.testing.assert_allclose(x, [0, 1.5 * LENGTH, -1.5 * LENGTH, 3 * LENGTH])
+        np.testing.assert_allclose(
+            y, [0, SQRT3 * LENGTH / 2, SQRT3 * LENGTH / 2, -SQRT3 * LENGTH]
+        )
+
+    def test_hexagon(self):
+        polygon = hexagon(3, -2, LENGTH)
+        self.assertTrue(polygon.is_valid)
+        self.assertAlmostEqual(polygon.area, 3 * SQRT3 / 2 * LENGTH**2)
+        self.assertEqual(len(polygon.exterior.coords), 7)
+        self.assertAlmostEqual(polygon.bounds[2] - polygon.bounds[0], 2 * LENGTH)
+        x, y = cell_centers(3, -2, LENGTH)
+        self.assertTrue(polygon.centroid.equals_exact(Point(x, y), 1e-6))
+
+    def test_neighbours_tile_the_plane(self):
+        i, j = (a.ravel() for a in np.meshgrid(range(-3, 4), range(-3, 4)))
+        cells = hexagons(i, j, LENGTH)
+        union = shapely.union_all(cells)
+        self.assertAlmostEqual(union.area, shapely.area(cells).sum(), places=0)
+        self.assertEqual(shapely.get_num_interior_rings(union), 0)
+
+    def test_point_cells(self):
+        rng = np.random.default_rng(0)
+        x = rng.uniform(-5000, 5000, 2000)
+        y = rng.uniform(-5000, 5000, 2000)
+        i, j = point_cells(x, y, LENGTH)
+        contained = shapely.intersects_xy(hexagons(i, j, LENGTH), x, y)
+        self.assertTrue(contained.all())
+
+        centers = cell_centers(i, j, LENGTH)
+        np.testing.assert_array_equal(point_cells(*centers, LENGTH), (i, j))
+
+    def test_bbox_cells(self):
+        bounds = (-1234.5, 250.0, 987.0, 2000.0)
+        i, j = bbox_cells(bounds, LENGTH)
+        actual = set(zip(i.tolist(), j.tolist()))
+
+        ai, aj = (a.ravel() for a in np.meshgrid(range(-20, 20), range(-20, 30)))
+        intersecting = shapely.intersects(hexagons(ai, aj, LENGTH), box(*bounds))
+        expected = set(zip(ai[intersecting].tolist(), aj[intersecting].tolist()))
+        self.assertTrue(expected <= actual)
+        self.assertLess(len(actual), 1.2 * len(expected))
+
+    def test_polygon_cells(self):
+        geometry = Point(100, -300).buffer(1500).difference(Point(0, 0).buffer(400))
+        (ii, ij), (bi, bj) = polygon_cells(geometry, LENGTH)
+        interior = hexagons(ii, ij, LENGTH)
+
+        self.assertTrue(shapely.contains(geometry, interior).all())
+        self.assertFalse(set(zip(ii, ij)) & set(zip(bi, bj)))
+
+        ai, aj = (a.ravel() for a in np.meshgrid(range(-20, 20), range(-20, 20)))
+        intersecting = shapely.intersects(hexagons(ai, aj, LENGTH), geometry)
+        expected = set(zip(ai[intersecting].tolist(), aj[intersecting].tolist()))
+        found = set(zip(ii.tolist(), ij.tolist())) | set(zip(bi.tolist(), bj.tolist()))
+        self.assertTrue(expected <= found)
+        # the exact test is only needed on a ring of cells
+        self.assertGreater(len(ii), len(bi))
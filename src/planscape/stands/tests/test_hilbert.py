@@ -0,0 +1,28 @@
+import unittest
+
+import numpy as np
+
+from stands.hilbert import HILBERT_EXTENT, hilbert_index, hilbert_keys
+
+
+class HilbertIndexTest(unittest.TestCase):
+    def test_index_is_a_bijection(self):
+        order = 4
+        x, y = np.meshgrid(np.arange(16), np.arange(16))
+        d = hilbert_index(x.ravel(), y.ravel(), order)
+        self.assertEqual(sorted(d.tolist()), list(range(256)))
+
+    def test_consecutive_cells_are_adjacent(self):
+        order = 5
+        x, y = np.meshgrid(np.arange(32), np.arange(32))
+        x, y = x.ravel(), y.ravel()
+        order_by_d = np.argsort(hilbert_index(x, y, order))
+        steps = np.abs(np.diff(x[order_by_d])) + np.abs(np.diff(y[order_by_d]))
+        self.assertTrue(np.all(steps == 1))
+
+    def test_keys_clamp_points_outside_extent(self):
+        minx, miny, maxx, maxy = HILBERT_EXTENT
+        keys = hilbert_keys([minx - 1000, maxx + 1000], [miny - 1000, miny - 1000])
+        self.assertEqual(
+            keys.tolist(), hilbert_keys([minx, maxx], [miny, miny]).tolist()
+        )
@@ -0,0 +1,189 @@
+from django.contrib.gis.geos import Polygon
+from django.db import connection
+from django.test import TestCase
+
+from conditions.models import BaseCondition, Condition
+from stands.loader import (
+    UNPARTITIONED_TABLE,
+    StandMetricLoader,
+    drop_unpartitioned_metrics,
+    get_unpartitioned_condition_ids,
+    move_unpartitioned_metrics,
+)
+from stands.models import Stand, StandMetric, StandSizeChoices
+
+
+def stats(value, count=1):
+    return {
+        "min": value,
+        "max": value,
+        "mean": value,
+        "sum": value * count,
+        "count": count,
+        "majority": value,
+        "minority": value,
+    }
+
+
+class StandMetricLoaderTest(TestCase):
+    def setUp(self):
+        base = BaseCondition.objects.create(
+            condition_name="foo", condition_level=3, region_name="sierra-nevada"
+        )
+        self.condition = Condition.objects.create(
+            condition_dataset=base, raster_name="foo.tif"
+        )
+        self.stands = [
+            Stand.objects.create(
+                size=StandSizeChoices.LARGE,
+                geometry=Polygon(
+                    ((i, 0), (i, 1), (i + 1, 1), (i + 1, 0), (i, 0)), srid=4269
+                ),
+                area_m2=1,
+            )
+            for i in range(5)
+        ]
+
+    def test_commit_loads_all_batches(self):
+        loader = StandMetricLoader(batch_size=2)
+        for i, stand in enumerate(self.stands):
+            loader.write(stand.pk, self.condition.pk, stats(float(i)))
+
+        self.assertEqual(StandMetric.objects.count(), 0)
+        upserted = loader.commit(self.condition.pk)
+
+        self.assertEqual(upserted, 5)
+        self.assertEqual(StandMetric.objects.count(), 5)
+        metric = StandMetric.objects.get(stand=self.stands[3])
+        self.assertEqual(metric.avg, 3.0)
+        self.assertEqual(metric.count, 1)
+
+    def test_commit_upserts_existing_metrics(self):
+        StandMetric.objects.create(
+            stand=self.stands[0],
+            condition=self.condition,
+            size=StandSizeChoices.LARGE,
+            avg=10,
+            count=10,
+        )
+        loader = StandMetricLoader()
+        loader.write(self.stands[0].pk, self.condition.pk, stats(1.5, count=3))
+        loader.write(self.stands[1].pk, self.condition.pk, stats(2.5))
+        loader.commit(self.condition.pk)
+
+        self.assertEqual(StandMetric.objects.count(), 2)
+        metric = StandMetric.objects.get(stand=self.stands[0])
+        self.assertEqual(metric.avg, 1.5)
+        self.assertEqual(metric.sum, 4.5)
+        self.assertEqual(metric.count, 3)
+
+    def test_commit_without_metrics_returns_zero(self):
+        self.assertEqual(StandMetricLoader().commit(self.condition.pk), 0)
+
+    def test_commit_loads_histograms(self):
+        loader = StandMetricLoader()
+        loader.write(
+            self.stands[0].pk,
+            self.condition.pk,
+            {**stats(1.0, count=3), "histogram": {1: 2, 4: 1}},
+        )
+        loader.write(self.stands[1].pk, self.condition.pk, stats(2.0))
+        loader.commit(self.condition.pk)
+
+        self.assertEqual(
+            StandMetric.objects.get(stand=self.stands[0]).histogram, {"1": 2, "4": 1}
+        )
+        self.assertIsNone(StandMetric.objects.get(stand=self.stands[1]).histogram)
+
+    def get_partitions(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT DISTINCT tableoid::regclass::text FROM stands_standmetric"
+            )
+            return {row[0] for row in cursor.fetchall()}
+
+    def test_metrics_are_loaded_in_their_partition(self):
+        StandMetric.objects.create(
+            stand=self.stands[0],
+            condition=self.condition,
+            size=StandSizeChoices.LARGE,
+            avg=10,
+        )
+        self.assertEqual(self.get_partitions(), {"stands_standmetric_default"})
+
+        loader = StandMetricLoader()
+        loader.write(self.stands[1].pk, self.condition.pk, stats(2.5))
+        loader.commit(self.condition.pk)
+
+        self.assertEqual(
+            self.get_partitions(), {f"stands_standmetric_{self.condition.pk}_large"}
+        )
+        self.assertEqual(StandMetric.objects.count(), 2)
+        self.assertEqual(StandMetric.objects.get(stand=self.stands[1]).size, "LARGE")
+
+    def test_commit_replaces_partitions(self):
+        loader = StandMetricLoader()
+        for stand in self.stands[:3]:
+            loader.write(stand.pk, self.condition.pk, stats(1.0))
+        loader.commit(self.condition.pk)
+
+        loader.write(self.stands[3].pk, self.condition.pk, stats(2.0))
+        loader.write(self.stands[4].pk, self.condition.pk, stats(3.0))
+        upserted = loader.commit(
+            self.condition.pk, replace_sizes=[StandSizeChoices.LARGE]
+        )
+
+        self.assertEqual(upserted, 2)
+        self.assertEqual(
+            sorted(StandMetric.objects.values_list("stand_id", "avg")),
+            [(self.stands[3].pk, 2.0), (self.stands[4].pk, 3.0)],
+        )
+        self.assertEqual(
+            self.get_partitions(), {f"stands_standmetric_{self.condition.pk}_large"}
+        )
+
+        # a new metric gets an id that is not taken
+        StandMetric.objects.create(
+            stand=self.stands[0],
+            condition=self.condition,
+            size=StandSizeChoices.LARGE,
+            avg=10,
+        )
+        self.assertEqual(StandMetric.objects.count(), 3)
+
+    def test_replacing_without_metrics_empties_partitions(self):
+        loader = StandMetricLoader()
+        loader.write(self.stands[0].pk, self.condition.pk, stats(1.0))
+        loader.commit(self.condition.pk)
+
+        loader.commit(self.condition.pk, replace_sizes=[StandSizeChoices.LARGE])
+        self.assertEqual(StandMetric.objects.count(), 0)
+
+    def test_unpartitioned_metrics_are_moved(self):
+        StandMetric.objects.create(
+            stand=self.stands[0],
+            condition=self.condition,
+            size=StandSizeChoices.LARGE,
+            avg=10,
+        )
+        with connection.cursor() as cursor:
+            for stand, avg in [(self.stands[0], 1.0), (self.stands[1], 2.0)]:
+                cursor.execute(
+                    f"INSERT INTO {UNPARTITIONED_TABLE} "
+                    "(id, stand_id, condition_id, avg) VALUES (%s, %s, %s, %s)",
+                    [-stand.pk, stand.pk, self.condition.pk, avg],
+                )
+
+        self.assertEqual(get_unpartitioned_condition_ids(), [self.condition.pk])
+        self.assertEqual(move_unpartitioned_metrics(self.condition.pk), 1)
+
+        self.assertEqual(get_unpartitioned_condition_ids(), [])
+        self.assertEqual(
+            sorted(StandMetric.objects.values_list("stand_id", "size", "avg")),
+            [
+                (self.stands[0].pk, StandSizeChoices.LARGE, 10.0),
+                (self.stands[1].pk, StandSizeChoices.LARGE, 2.0),
+            ],
+        )
+        self.assertTrue(drop_unpartitioned_metrics())
+        self.assertEqual(get_unpartitioned_condition_ids(), [])
@@ -0,0 +1,120 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import rasterio
+from rasterio.transform import from_origin
+from rasterio.windows import Window
+from shapely.geometry import MultiPoint, box
+
+from stands.benchmark import hex_grid
+from stands.manifest import (
+    compute_manifest,
+    get_changed_windows,
+    get_manifest_path,
+    load_manifest,
+    save_manifest,
+)
+from stands.zonal import (
+    build_label_raster,
+    get_label_raster_path,
+    get_window_stand_ids,
+)
+
+
+class ManifestTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = Path(tempfile.mkdtemp())
+        self.height, self.width = 70, 50
+        self.array = (
+            np.random.default_rng(0).random((self.height, self.width)).astype("float32")
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def write_raster(self, array, transform=None):
+        path = self.folder / "raster.tif"
+        with rasterio.open(
+            path,
+            "w",
+            driver="GTiff",
+            height=self.height,
+            width=self.width,
+            count=1,
+            dtype=array.dtype,
+            crs="EPSG:3857",
+            transform=transform or from_origin(-13000000, 4500000, 30, 30),
+            nodata=np.nan,
+            tiled=True,
+            blockxsize=16,
+            blockysize=16,
+        ) as dst:
+            dst.write(array, 1)
+            return path, dst.profile
+
+    def test_unchanged_raster_has_no_changed_windows(self):
+        path, _ = self.write_raster(self.array)
+        manifest = compute_manifest(path)
+        self.assertEqual(len(manifest["blocks"]), 5 * 4)
+        self.assertEqual(get_changed_windows(manifest, compute_manifest(path)), [])
+
+    def test_changed_pixels_map_to_their_blocks(self):
+        path, _ = self.write_raster(self.array)
+        old = compute_manifest(path)
+
+        self.array[20, 5] = 2
+        self.array[69, 49] = np.nan
+        self.write_raster(self.array)
+        windows = get_changed_windows(old, compute_manifest(path))
+
+        self.assertEqual(
+            sorted(windows, key=lambda w: w.row_off),
+            [Window(0, 16, 16, 16), Window(48, 64, 2, 6)],
+        )
+
+    def test_different_grid_requires_full_recompute(self):
+        path, _ = self.write_raster(self.array)
+        old = compute_manifest(path)
+        self.write_raster(self.array, transform=from_origin(-13000000, 4500000, 60, 60))
+        self.assertIsNone(get_changed_windows(old, compute_manifest(path)))
+        self.assertIsNone(get_changed_windows(None, old))
+
+    def test_save_and_load(self):
+        path, _ = self.write_raster(self.array)
+        manifest = compute_manifest(path)
+        manifest_path = get_manifest_path(self.folder / "manifests", 7, "SMALL")
+        self.assertIsNone(load_manifest(manifest_path))
+        save_manifest(manifest_path, manifest)
+        self.assertEqual(load_manifest(manifest_path), manifest)
+
+    def test_window_stand_ids(self):
+        _, profile = self.write_raster(self.array)
+        stands = hex_grid(
+            (-13000000, 4500000 - 70 * 30, -13000000 + 50 * 30, 4500000), 124
+        )
+
+        def fetch_stands(bounds):
+            extent = box(*bounds)
+            return [(i, g.wkb) for i, g in stands if g.intersects(extent)]
+
+        label_path = build_label_raster(
+            get_label_raster_path(self.folder, "SMALL", profile), profile, fetch_stands
+        )
+        window = Window(16, 16, 16, 16)
+        with rasterio.open(label_path) as src:
+            centers = MultiPoint(
+                [src.xy(row, col) for row in range(16, 32) for col in range(16, 32)]
+            )
+
+        # the stands with a pixel center in the window; centers lying on the
+        # border of two stands may go to either of them.
+        actual = set(get_window_stand_ids(label_path, [window]).tolist())
+        self.assertTrue(actual)
+        self.assertTrue(actual <= {i for i, g in stands if g.intersects(centers)})
+        self.assertTrue(
+            {i for i, g in stands if g.relate_pattern(centers, "T********")} <= actual
+        )
+        self.assertEqual(get_window_stand_ids(label_path, []).size, 0)
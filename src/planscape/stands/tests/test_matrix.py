@@ -0,0 +1,222 @@
+import json
+import tempfile
+
+from django.contrib.gis.geos import Polygon
+from django.test import TestCase, override_settings
+
+from conditions.models import BaseCondition, Condition
+from stands.loader import StandMetricLoader
+from stands.matrix import (
+    MATRIX_STATISTICS,
+    build_matrix,
+    get_forsys_condition_names,
+    get_matrix_column,
+    get_matrix_columns,
+    get_matrix_table,
+    parse_matrix_column,
+    read_matrix,
+    refresh_matrix,
+)
+from stands.models import Stand, StandSizeChoices
+
+
+def stats(value):
+    return {
+        "min": value,
+        "max": value,
+        "mean": value,
+        "sum": value,
+        "count": 1,
+        "majority": value,
+        "minority": value,
+    }
+
+
+class MatrixNamesTest(TestCase):
+    def test_table_name(self):
+        self.assertEqual(
+            get_matrix_table("sierra-nevada", StandSizeChoices.LARGE),
+            "stand_metric_matrix_sierra_nevada_large",
+        )
+
+    def test_column_round_trip(self):
+        column = get_matrix_column(12, "avg")
+        self.assertEqual(column, "c12_avg")
+        self.assertEqual(parse_matrix_column(column), (12, "avg"))
+        self.assertIsNone(parse_matrix_column("stand_id"))
+
+    def test_unknown_statistic_raises(self):
+        with self.assertRaises(ValueError):
+            get_matrix_column(12, "median")
+
+
+class ForsysConditionsTest(TestCase):
+    def test_names_of_treatment_goals_and_restrictions(self):
+        goals = {
+            "regions": [
+                {
+                    "region_name": "sierra-nevada",
+                    "treatment_goals": [
+                        {
+                            "category_name": "Fire Dynamics",
+                            "questions": [
+                                {
+                                    "scenario_priorities": ["foo"],
+                                    "scenario_output_fields_paths": {
+                                        "metrics": ["foo", "bar"]
+                                    },
+                                }
+                            ],
+                        }
+                    ],
+                },
+                {
+                    "region_name": "southern-california",
+                    "treatment_goals": [
+                        {
+                            "category_name": "Fire Dynamics",
+                            "questions": [{"scenario_priorities": ["baz"]}],
+                        }
+                    ],
+                },
+            ]
+        }
+        with tempfile.NamedTemporaryFile("w", suffix=".json") as f:
+            json.dump(goals, f)
+            f.flush()
+            with override_settings(DEFAULT_TREATMENTS_FILE=f.name):
+                names = get_forsys_condition_names("sierra-nevada")
+
+        self.assertEqual(names, ["bar", "distance_to_roads", "foo", "slope"])
+
+
+class StandMetricMatrixTest(TestCase):
+    def setUp(self):
+        self.conditions = []
+        for name in ["foo", "bar"]:
+            base = BaseCondition.objects.create(
+                condition_name=name, condition_level=3, region_name="sierra-nevada"
+            )
+            self.conditions.append(
+                Condition.objects.create(
+                    condition_dataset=base, raster_name=f"{name}.tif"
+                )
+            )
+        self.stands = [
+            Stand.objects.create(
+                size=StandSizeChoices.LARGE,
+                geometry=Polygon(
+                    ((i, 0), (i, 1), (i + 1, 1), (i + 1, 0), (i, 0)), srid=4269
+                ),
+                area_m2=1,
+            )
+            for i in range(3)
+        ]
+        self.load(self.conditions[0], [1.0, 2.0, 3.0])
+        self.load(self.conditions[1], [10.0, 20.0])
+
+    def load(self, condition, values):
+        loader = StandMetricLoader()
+        for stand, value in zip(self.stands, values):
+            loader.write(stand.pk, condition.pk, stats(value))
+        loader.commit(condition.pk, replace_sizes=[StandSizeChoices.LARGE])
+
+    def read(self, statistic="avg"):
+        return read_matrix(
+            "sierra-nevada",
+            StandSizeChoices.LARGE,
+            [stand.pk for stand in self.stands],
+            [(condition.pk, statistic) for condition in self.conditions],
+        )
+
+    def test_build_pivots_metrics(self):
+        stands = build_matrix(
+            "sierra-nevada",
+            StandSizeChoices.LARGE,
+            [c.pk for c in self.conditions],
+            ["avg", "count"],
+        )
+
+        self.assertEqual(stands, 3)
+        foo, bar = [get_matrix_column(c.pk, "avg") for c in self.conditions]
+        matrix = self.read()
+        self.assertEqual(matrix[self.stands[1].pk], {foo: 2.0, bar: 20.0})
+        self.assertEqual(matrix[self.stands[2].pk], {foo: 3.0, bar: None})
+        count = get_matrix_column(self.conditions[0].pk, "count")
+        self.assertEqual(self.read("count")[self.stands[0].pk][count], 1)
+
+    def test_build_defaults_to_the_statistics_forsys_reads(self):
+        base = BaseCondition.objects.create(
+            condition_name="slope", condition_level=3, region_name="sierra-nevada"
+        )
+        slope = Condition.objects.create(condition_dataset=base, raster_name="s.tif")
+        self.load(slope, [5.0, 6.0, 7.0])
+
+        build_matrix(
+            "sierra-nevada",
+            StandSizeChoices.LARGE,
+            [self.conditions[0].pk, slope.pk],
+        )
+
+        table = get_matrix_table("sierra-nevada", StandSizeChoices.LARGE)
+        self.assertEqual(
+            get_matrix_columns(table),
+            [
+                get_matrix_column(self.conditions[0].pk, "avg"),
+                get_matrix_column(slope.pk, "max"),
+            ],
+        )
+
+    def test_build_replaces_the_previous_matrix(self):
+        build_matrix("sierra-nevada", StandSizeChoices.LARGE, [self.conditions[0].pk])
+        build_matrix(
+            "sierra-nevada", StandSizeChoices.LARGE, [self.conditions[1].pk], ["avg"]
+        )
+
+        table = get_matrix_table("sierra-nevada", StandSizeChoices.LARGE)
+        self.assertEqual(
+            get_matrix_columns(table), [get_matrix_column(self.conditions[1].pk, "avg")]
+        )
+
+    def test_build_rejects_too_many_columns(self):
+        with self.assertRaises(ValueError):
+            build_matrix(
+                "sierra-nevada",
+                StandSizeChoices.LARGE,
+                range(1, 200),
+                MATRIX_STATISTICS,
+            )
+
+    def test_refresh_without_matrix_does_nothing(self):
+        self.assertIsNone(refresh_matrix(self.conditions[0].pk, StandSizeChoices.LARGE))
+
+    def test_refresh_updates_changed_stands(self):
+        build_matrix(
+            "sierra-nevada",
+            StandSizeChoices.LARGE,
+            [c.pk for c in self.conditions],
+            ["avg"],
+        )
+        self.load(self.conditions[1], [10.0, 25.0, 30.0])
+
+        updated = refresh_matrix(self.conditions[1].pk, StandSizeChoices.LARGE)
+
+        self.assertEqual(updated, 2)
+        bar = get_matrix_column(self.conditions[1].pk, "avg")
+        matrix = self.read()
+        self.assertEqual(
+            [matrix[stand.pk][bar] for stand in self.stands], [10.0, 25.0, 30.0]
+        )
+
+    def test_refresh_does_not_add_columns(self):
+        build_matrix(
+            "sierra-nevada", StandSizeChoices.LARGE, [self.conditions[0].pk], ["avg"]
+        )
+
+        updated = refresh_matrix(self.conditions[1].pk, StandSizeChoices.LARGE)
+
+        self.assertIsNone(updated)
+        table = get_matrix_table("sierra-nevada", StandSizeChoices.LARGE)
+        self.assertEqual(
+            get_matrix_columns(table), [get_matrix_column(self.conditions[0].pk, "avg")]
+        )
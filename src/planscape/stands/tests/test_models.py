@@ -0,0 +1,88 @@
+from django.contrib.gis.geos import GEOSGeometry, Polygon
+from django.test import TestCase
+
+from stands.hexgrid import HEX_GRID_SRID, hexagon
+from stands.models import (
+    Stand,
+    StandSizeChoices,
+    geometry_field_for,
+    length_from_size,
+)
+
+
+class StandProjectionsTest(TestCase):
+    def create_stand(self, x=-120):
+        return Stand.objects.create(
+            size=StandSizeChoices.LARGE,
+            geometry=Polygon(
+                ((x, 38), (x, 38.01), (x + 0.01, 38.01), (x + 0.01, 38), (x, 38)),
+                srid=4269,
+            ),
+            area_m2=1,
+        )
+
+    def test_projections_are_set_on_insert(self):
+        stand = self.create_stand()
+        stand.refresh_from_db()
+
+        self.assertEqual(stand.geometry_5070.srid, 5070)
+        self.assertEqual(stand.geometry_3857.srid, 3857)
+        expected = stand.geometry.transform(5070, clone=True)
+        self.assertAlmostEqual(stand.geometry_5070.area, expected.area, delta=1)
+        # 0.01 x 0.01 degrees at 38N is about 97.5 ha
+        self.assertAlmostEqual(stand.area_acres, 240.9, delta=1)
+
+    def test_projections_follow_geometry_updates(self):
+        stand = self.create_stand()
+        stand.geometry = self.create_stand(x=-119).geometry
+        stand.save()
+        stand.refresh_from_db()
+
+        expected = stand.geometry.transform(3857, clone=True)
+        self.assertAlmostEqual(
+            stand.geometry_3857.centroid.x, expected.centroid.x, delta=0.01
+        )
+
+    def test_geometry_field_for(self):
+        self.assertEqual(geometry_field_for(5070), "geometry_5070")
+        self.assertEqual(geometry_field_for(3857), "geometry_3857")
+        self.assertEqual(geometry_field_for(4326), "geometry")
+
+
+class StandHexIndexTest(TestCase):
+    def setUp(self):
+        self.length = length_from_size(StandSizeChoices.SMALL)
+        # cells around (-120, 38), in EPSG:5070
+        self.stands = {}
+        for i in range(-11100, -11090):
+            for j in range(8950, 8960):
+                geometry = GEOSGeometry(hexagon(i, j, self.length).wkb)
+                geometry.srid = HEX_GRID_SRID
+                geometry.transform(4269)
+                self.stands[(i, j)] = Stand.objects.create(
+                    size=StandSizeChoices.SMALL, geometry=geometry, area_m2=1
+                )
+
+    def test_hex_index_is_set_on_insert(self):
+        for (i, j), stand in self.stands.items():
+            stand.refresh_from_db()
+            self.assertEqual((stand.hex_i, stand.hex_j), (i, j))
+
+    def test_overlapping(self):
+        target = GEOSGeometry(
+            hexagon(-11095, 8955, self.length).buffer(2.5 * self.length).wkb
+        )
+        target.srid = HEX_GRID_SRID
+        target.transform(4269)
+
+        expected = Stand.objects.filter(
+            geometry__intersects=target, size=StandSizeChoices.SMALL
+        )
+        actual = Stand.objects.overlapping(target, StandSizeChoices.SMALL)
+        self.assertEqual(
+            set(actual.values_list("id", flat=True)),
+            set(expected.values_list("id", flat=True)),
+        )
+        self.assertFalse(
+            Stand.objects.overlapping(target, StandSizeChoices.LARGE).exists()
+        )
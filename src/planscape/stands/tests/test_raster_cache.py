@@ -0,0 +1,86 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import rasterio
+from rasterio.transform import from_origin
+
+from stands.benchmark import hex_grid
+from stands.raster_cache import get_cached_raster, open_cached_raster
+from stands.stats import get_zonal_stats
+
+
+class RasterCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = Path(tempfile.mkdtemp())
+        self.cache_dir = self.folder / "cache"
+        self.path = self.folder / "raster.tif"
+        self.transform = from_origin(-13000000, 4500000, 30, 30)
+        self.array = (
+            np.random.default_rng(0).random((40, 30), dtype="float32").astype("float32")
+        )
+        self.array[:5, :5] = np.nan
+        self.write_raster(self.array)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def write_raster(self, array):
+        with rasterio.open(
+            self.path,
+            "w",
+            driver="GTiff",
+            height=array.shape[0],
+            width=array.shape[1],
+            count=1,
+            dtype=array.dtype,
+            crs="EPSG:3857",
+            transform=self.transform,
+            nodata=np.nan,
+            compress="deflate",
+        ) as dst:
+            dst.write(array, 1)
+
+    def test_cached_copy_matches_raster(self):
+        cached = open_cached_raster(get_cached_raster(self.path, self.cache_dir))
+        self.assertIsInstance(cached.array, np.memmap)
+        self.assertFalse(cached.array.flags.writeable)
+        np.testing.assert_array_equal(cached.array, self.array)
+        self.assertEqual(cached.transform, self.transform)
+        self.assertEqual(cached.crs.to_epsg(), 3857)
+        self.assertTrue(np.isnan(cached.nodata))
+
+    def test_zonal_stats_match_dataset(self):
+        cached = open_cached_raster(get_cached_raster(self.path, self.cache_dir))
+        # stands partially outside of the raster exercise boundless reads
+        stands = hex_grid(
+            (-13000000, 4500000 - 40 * 30, -13000000 + 30 * 30, 4500000), 124
+        )
+        with rasterio.open(self.path) as src:
+            for _, geometry in stands:
+                self.assertEqual(
+                    get_zonal_stats(geometry, cached, histogram=True),
+                    get_zonal_stats(geometry, src, histogram=True),
+                )
+
+    def test_touched_source_is_not_rebuilt(self):
+        array_path = get_cached_raster(self.path, self.cache_dir)
+        built_at = array_path.stat().st_mtime_ns
+        stat = self.path.stat()
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        self.assertEqual(get_cached_raster(self.path, self.cache_dir), array_path)
+        self.assertEqual(array_path.stat().st_mtime_ns, built_at)
+
+    def test_changed_source_is_rebuilt(self):
+        array_path = get_cached_raster(self.path, self.cache_dir)
+        self.array[10, 10] = 42
+        self.write_raster(self.array)
+        stat = self.path.stat()
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        self.assertEqual(get_cached_raster(self.path, self.cache_dir), array_path)
+        self.assertEqual(open_cached_raster(array_path).array[10, 10], 42)
@@ -0,0 +1,83 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import rasterio
+from rasterio.transform import from_origin
+from shapely.geometry import box
+
+from stands.stats import get_zonal_stats
+
+
+class GetZonalStatsTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = Path(tempfile.mkdtemp())
+        self.path = self.folder / "raster.tif"
+        array = np.arange(100, dtype="float32").reshape(10, 10)
+        array[0, 0] = np.nan
+        with rasterio.open(
+            self.path,
+            "w",
+            driver="GTiff",
+            height=10,
+            width=10,
+            count=1,
+            dtype="float32",
+            crs="EPSG:3857",
+            transform=from_origin(0, 100, 10, 10),
+            nodata=np.nan,
+        ) as dst:
+            dst.write(array, 1)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_stats_from_path(self):
+        stats = get_zonal_stats(box(0, 80, 20, 100).wkt, str(self.path))
+        self.assertEqual(stats["count"], 3)
+        self.assertEqual(stats["min"], 1)
+        self.assertEqual(stats["max"], 11)
+        self.assertEqual(stats["sum"], 22)
+
+    def test_open_dataset_matches_path_and_stays_open(self):
+        geometry = box(5, 5, 55, 75)
+        expected = get_zonal_stats(geometry.wkb, str(self.path))
+        with rasterio.open(self.path) as src:
+            self.assertEqual(get_zonal_stats(geometry, src), expected)
+            self.assertEqual(get_zonal_stats(geometry, src), expected)
+            self.assertFalse(src.closed)
+
+    def test_no_valid_pixels_returns_empty_stats(self):
+        stats = get_zonal_stats(box(500, 500, 600, 600), str(self.path))
+        self.assertEqual(stats["count"], 0)
+        self.assertIsNone(stats["mean"])
+
+    def test_histogram_of_integer_raster(self):
+        path = self.folder / "classes.tif"
+        array = np.array([[1, 1, 3], [3, 7, 0], [3, 1, 0]], dtype="int16")
+        with rasterio.open(
+            path,
+            "w",
+            driver="GTiff",
+            height=3,
+            width=3,
+            count=1,
+            dtype="int16",
+            crs="EPSG:3857",
+            transform=from_origin(0, 30, 10, 10),
+            nodata=0,
+        ) as dst:
+            dst.write(array, 1)
+
+        stats = get_zonal_stats(box(0, 0, 30, 30), str(path), histogram=True)
+        self.assertEqual(stats["histogram"], {1: 3, 3: 3, 7: 1})
+        # ties go to the smallest value
+        self.assertEqual(stats["majority"], 1)
+        self.assertEqual(stats["minority"], 7)
+        self.assertNotIn("histogram", get_zonal_stats(box(0, 0, 30, 30), str(path)))
+
+    def test_no_histogram_for_float_raster(self):
+        stats = get_zonal_stats(box(0, 0, 100, 100), str(self.path), histogram=True)
+        self.assertIsNone(stats["histogram"])
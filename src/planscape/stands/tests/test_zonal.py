@@ -0,0 +1,256 @@
+import shutil
+import tempfile
+import unittest
+from collections import Counter
+from contextlib import nullcontext
+from pathlib import Path
+
+import numpy as np
+import rasterio
+from rasterio.transform import from_origin
+from rasterio.windows import Window
+from shapely.geometry import box
+
+from stands.benchmark import hex_grid
+from stands.stats import get_zonal_stats
+from stands.zonal import (
+    _count_runs,
+    _sort_runs,
+    build_label_raster,
+    get_label_raster_path,
+    get_label_zonal_stats,
+    get_multi_label_zonal_stats,
+    get_window_stand_ids,
+    load_label_first_row,
+    load_label_index,
+)
+
+
+class ReadCounter:
+    """Timer counting the phases entered."""
+
+    def __init__(self):
+        self.counts = Counter()
+
+    def phase(self, name):
+        self.counts[name] += 1
+        return nullcontext()
+
+
+class LabelZonalStatsTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = Path(tempfile.mkdtemp())
+        self.transform = from_origin(-13000000, 4500000, 30, 30)
+        self.height, self.width = 61, 47
+        self.stands = hex_grid(
+            (-13000000, 4500000 - 61 * 30, -13000000 + 47 * 30, 4500000), 124
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def write_raster(self, name, array, nodata):
+        path = self.folder / name
+        with rasterio.open(
+            path,
+            "w",
+            driver="GTiff",
+            height=self.height,
+            width=self.width,
+            count=1,
+            dtype=array.dtype,
+            crs="EPSG:3857",
+            transform=self.transform,
+            nodata=nodata,
+        ) as dst:
+            dst.write(array, 1)
+            return path, dst.profile
+
+    def fetch_stands(self, bounds):
+        extent = box(*bounds)
+        return [
+            (stand_id, geometry.wkb)
+            for stand_id, geometry in self.stands
+            if geometry.intersects(extent)
+        ]
+
+    def assert_matches_stand_engine(
+        self, raster_path, profile, exact=True, histograms=False
+    ):
+        label_path = get_label_raster_path(self.folder, "SMALL", profile)
+        build_label_raster(label_path, profile, self.fetch_stands, strip_height=7)
+        actual = dict(
+            get_label_zonal_stats(
+                label_path, raster_path, strip_height=5, histograms=histograms
+            )
+        )
+
+        expected = {}
+        for stand_id, geometry in self.stands:
+            stats = get_zonal_stats(
+                geometry.wkt, str(raster_path), histogram=histograms
+            )
+            if stats["count"] > 0:
+                expected[stand_id] = stats
+
+        self.assertEqual(actual.keys(), expected.keys())
+        keys = ["min", "max", "count", "majority", "minority"]
+        if histograms:
+            keys.append("histogram")
+        for stand_id, stats in expected.items():
+            for key in keys:
+                self.assertEqual(actual[stand_id][key], stats[key], key)
+            for key in ["sum", "mean"]:
+                if exact:
+                    self.assertEqual(actual[stand_id][key], stats[key], key)
+                else:
+                    self.assertAlmostEqual(
+                        actual[stand_id][key], stats[key], delta=1e-4 * abs(stats[key])
+                    )
+
+    def test_float_raster_with_nan_nodata(self):
+        rng = np.random.default_rng(0)
+        array = rng.random((self.height, self.width), dtype="float32")
+        array[rng.random(array.shape) < 0.2] = np.nan
+        array[:, :5] = np.nan
+        path, profile = self.write_raster("float.tif", array, np.nan)
+        self.assert_matches_stand_engine(path, profile, exact=False)
+
+    def test_integer_raster(self):
+        rng = np.random.default_rng(1)
+        array = rng.integers(0, 6, (self.height, self.width)).astype("int16")
+        array[10:20, 10:20] = -9999
+        path, profile = self.write_raster("classes.tif", array, -9999)
+        self.assert_matches_stand_engine(path, profile)
+
+    def test_histograms(self):
+        rng = np.random.default_rng(3)
+        array = rng.integers(0, 5, (self.height, self.width)).astype("uint8")
+        array[rng.random(array.shape) < 0.1] = 255
+        path, profile = self.write_raster("classes.tif", array, 255)
+        self.assert_matches_stand_engine(path, profile, histograms=True)
+
+        floats = rng.random((self.height, self.width), dtype="float32")
+        path, profile = self.write_raster("float.tif", floats, np.nan)
+        label_path = get_label_raster_path(self.folder, "SMALL", profile)
+        for _, stats in get_label_zonal_stats(label_path, path, histograms=True):
+            self.assertIsNone(stats["histogram"])
+
+    def test_count_runs_matches_sort_runs(self):
+        rng = np.random.default_rng(4)
+        labels = rng.integers(1, 50, 1000).astype("uint32")
+        values = rng.integers(-3, 7, 1000).astype("int16")
+        weights = rng.integers(1, 5, 1000)
+        for counts in [None, weights]:
+            expected = _sort_runs(labels, values, counts)
+            actual = _count_runs(labels, values, counts)
+            for a, e in zip(actual, expected):
+                self.assertEqual(a.dtype, e.dtype)
+                np.testing.assert_array_equal(a, e)
+
+        values = np.array([0, 2**30], dtype="int32")
+        self.assertIsNone(_count_runs(np.array([1, 2], dtype="uint32"), values))
+
+    def test_label_index_maps_labels_to_stands(self):
+        array = np.ones((self.height, self.width), dtype="float32")
+        _, profile = self.write_raster("ones.tif", array, np.nan)
+        label_path = get_label_raster_path(self.folder, "SMALL", profile)
+        build_label_raster(label_path, profile, self.fetch_stands)
+
+        stand_ids, last_row = load_label_index(label_path)
+        first_row = load_label_first_row(label_path)
+        with rasterio.open(label_path) as src:
+            labels = src.read(1)
+        self.assertEqual(stand_ids[0], 0)
+        for label in np.unique(labels[labels > 0]):
+            self.assertIn(stand_ids[label], [s for s, _ in self.stands])
+            rows = np.flatnonzero((labels == label).any(1))
+            self.assertEqual(first_row[label], rows[0])
+            self.assertEqual(last_row[label], rows[-1])
+
+    def test_multi_matches_single_pass_per_pair(self):
+        rng = np.random.default_rng(2)
+        floats = rng.random((self.height, self.width), dtype="float32")
+        classes = rng.integers(0, 4, (self.height, self.width)).astype("uint8")
+        float_path, profile = self.write_raster("float.tif", floats, np.nan)
+        class_path, _ = self.write_raster("classes.tif", classes, 255)
+
+        label_paths = {}
+        for size, length in [("SMALL", 124), ("LARGE", 300)]:
+            self.stands = hex_grid(
+                (-13000000, 4500000 - 61 * 30, -13000000 + 47 * 30, 4500000), length
+            )
+            label_paths[size] = build_label_raster(
+                get_label_raster_path(self.folder, size, profile),
+                profile,
+                self.fetch_stands,
+            )
+        rasters = {1: float_path, 2: class_path}
+
+        actual = {}
+        for size, condition_id, stand_id, stats in get_multi_label_zonal_stats(
+            label_paths, rasters, strip_height=9
+        ):
+            actual[(size, condition_id, stand_id)] = stats
+
+        expected = {}
+        for size, label_path in label_paths.items():
+            for condition_id, raster_path in rasters.items():
+                for stand_id, stats in get_label_zonal_stats(label_path, raster_path):
+                    expected[(size, condition_id, stand_id)] = stats
+        self.assertEqual(actual, expected)
+
+    def test_multi_reads_only_the_strips_of_the_stands_needed(self):
+        rng = np.random.default_rng(4)
+        floats = rng.random((self.height, self.width), dtype="float32")
+        float_path, profile = self.write_raster("float.tif", floats, np.nan)
+        label_path = build_label_raster(
+            get_label_raster_path(self.folder, "SMALL", profile),
+            profile,
+            self.fetch_stands,
+        )
+        needed = set(
+            get_window_stand_ids(label_path, [Window(0, 40, self.width, 3)]).tolist()
+        )
+        label_paths, rasters = {"SMALL": label_path}, {1: float_path}
+
+        full_timer, timer = ReadCounter(), ReadCounter()
+        full = {
+            stand_id: stats
+            for _, _, stand_id, stats in get_multi_label_zonal_stats(
+                label_paths, rasters, strip_height=5, timer=full_timer
+            )
+        }
+        actual = {
+            stand_id: stats
+            for _, _, stand_id, stats in get_multi_label_zonal_stats(
+                label_paths,
+                rasters,
+                strip_height=5,
+                timer=timer,
+                stands={("SMALL", 1): needed},
+            )
+        }
+
+        self.assertTrue(needed)
+        self.assertEqual(actual, {s: full[s] for s in needed if s in full})
+        self.assertLess(timer.counts["read"], full_timer.counts["read"] / 2)
+        self.assertEqual(
+            list(
+                get_multi_label_zonal_stats(
+                    label_paths, rasters, timer=timer, stands={("SMALL", 1): set()}
+                )
+            ),
+            [],
+        )
+
+    def test_misaligned_raster_raises(self):
+        array = np.ones((self.height, self.width), dtype="float32")
+        _, profile = self.write_raster("ones.tif", array, np.nan)
+        label_path = get_label_raster_path(self.folder, "SMALL", profile)
+        build_label_raster(label_path, profile, self.fetch_stands)
+
+        self.transform = from_origin(-13000000, 4500000, 60, 60)
+        other, _ = self.write_raster("other.tif", array, np.nan)
+        with self.assertRaises(ValueError):
+            list(get_label_zonal_stats(label_path, other))
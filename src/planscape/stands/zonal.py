@@ -0,0 +1,524 @@
+"""Label-raster zonal statistics.
+
+`stands.stats.get_zonal_stats` computes the statistics of one stand at a
+time: it opens the raster, reads a window and rasterizes the stand for
+every call. This module computes the same statistics for every stand at
+once:
+
+1. The stands of one size are burned once into a *label raster* aligned
+   with the condition grid. Each pixel holds the label of the stand that
+   contains the pixel center (the same rule used by `rasterize_geom`), or
+   0 when no stand does. A sidecar `.npz` file maps labels to `Stand.id`.
+2. Every condition sharing that grid is reduced strip by strip. The valid
+   pixels of a strip are grouped by (label, value) in a single vectorized
+   pass (one bincount for integer rasters, a sort otherwise), and stands
+   are emitted as soon as the strip containing their last row has been
+   read.
+
+When only some stands are needed, e.g. those overlapping the changed parts
+of a raster, only the strips between their first and last rows are read.
+
+Results match `get_zonal_stats`, except that sums and means of floating
+point rasters are accumulated in float64 instead of the raster dtype.
+"""
+
+import hashlib
+import os
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+import rasterio
+from rasterio.features import rasterize
+from rasterio.windows import Window
+from rasterio.windows import bounds as window_bounds
+from rasterio.windows import transform as window_transform
+from shapely import wkb
+
+from utils.timing import NULL_TIMER
+
+LABEL_DTYPE = "uint32"
+
+# Label used for pixels that do not belong to any stand.
+LABEL_NODATA = 0
+
+DEFAULT_STRIP_HEIGHT = 256
+
+# `rasterstats` uses this value when the raster does not declare a NoData.
+DEFAULT_NODATA = -999
+
+# Largest number of (label, value) pairs of an integer raster counted with
+# a bincount; wider ranges of labels and values are sorted instead.
+MAX_HISTOGRAM_BINS = 1 << 22
+
+Bounds = Tuple[float, float, float, float]
+StandFetcher = Callable[[Bounds], Iterable[Tuple[int, bytes]]]
+Runs = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def get_grid_key(profile) -> str:
+    """Returns a short identifier of the grid (CRS, transform and shape)
+    described by a raster profile.
+    """
+    grid = "|".join(
+        [
+            profile["crs"].to_wkt(),
+            ",".join(str(v) for v in tuple(profile["transform"])[:6]),
+            f"{profile['width']}x{profile['height']}",
+        ]
+    )
+    return hashlib.sha1(grid.encode("utf-8")).hexdigest()[:16]
+
+
+def get_label_raster_path(folder, stand_size: str, profile) -> Path:
+    return Path(folder) / f"{stand_size.lower()}_{get_grid_key(profile)}.tif"
+
+
+def get_label_index_path(label_path) -> Path:
+    return Path(label_path).with_suffix(".npz")
+
+
+def iter_strips(height: int, width: int, strip_height: int) -> Iterator[Window]:
+    """Yields full-width windows of `strip_height` rows, top to bottom."""
+    for row in range(0, height, strip_height):
+        yield Window(0, row, width, min(strip_height, height - row))
+
+
+def build_label_raster(
+    label_path,
+    profile,
+    fetch_stands: StandFetcher,
+    strip_height: int = DEFAULT_STRIP_HEIGHT,
+) -> Path:
+    """Rasterizes stands into a label raster aligned to `profile`.
+
+    Args:
+      label_path: Where the label raster is written. The label index is
+        written next to it (see `get_label_index_path`).
+      profile: Profile of the condition raster defining the grid.
+      fetch_stands: Called with the bounds of each strip, in the raster CRS,
+        and returns (stand_id, wkb) pairs of the stands intersecting it. The
+        geometries must be in the raster CRS.
+      strip_height: Number of rows rasterized at once.
+
+    Returns:
+      The path of the label raster.
+    """
+    label_path = Path(label_path)
+    label_path.parent.mkdir(parents=True, exist_ok=True)
+    transform = profile["transform"]
+    height, width = profile["height"], profile["width"]
+    label_profile = {
+        "driver": "GTiff",
+        "dtype": LABEL_DTYPE,
+        "count": 1,
+        "nodata": LABEL_NODATA,
+        "crs": profile["crs"],
+        "transform": transform,
+        "height": height,
+        "width": width,
+        "tiled": True,
+        "blockxsize": 256,
+        "blockysize": 256,
+        "compress": "deflate",
+    }
+
+    labels: dict[int, int] = {}
+    first_row = np.full(1, -1, dtype="int64")
+    last_row = np.full(1, -1, dtype="int64")
+    # write to a temporary file first, so an interrupted build is never reused
+    tmp_path = label_path.with_suffix(".tmp.tif")
+    with rasterio.open(tmp_path, "w", **label_profile) as dst:
+        for window in iter_strips(height, width, strip_height):
+            shapes = []
+            for stand_id, geometry in fetch_stands(window_bounds(window, transform)):
+                label = labels.setdefault(stand_id, len(labels) + 1)
+                shapes.append((wkb.loads(bytes(geometry)), label))
+
+            if not shapes:
+                continue
+
+            strip = rasterize(
+                shapes,
+                out_shape=(window.height, window.width),
+                transform=window_transform(window, transform),
+                fill=LABEL_NODATA,
+                dtype=LABEL_DTYPE,
+            )
+            if last_row.size <= len(labels):
+                padding = np.full(len(labels) + 1 - last_row.size, -1)
+                first_row = np.concatenate([first_row, padding])
+                last_row = np.concatenate([last_row, padding])
+            for offset in range(window.height):
+                row_labels = np.unique(strip[offset])
+                first_row[row_labels[first_row[row_labels] < 0]] = (
+                    window.row_off + offset
+                )
+                last_row[row_labels] = window.row_off + offset
+            dst.write(strip, 1, window=window)
+
+    stand_ids = np.zeros(len(labels) + 1, dtype="int64")
+    stand_ids[list(labels.values())] = list(labels.keys())
+    first_row[LABEL_NODATA] = -1
+    last_row[LABEL_NODATA] = -1
+    with open(get_label_index_path(label_path), "wb") as f:
+        np.savez(f, stand_ids=stand_ids, first_row=first_row, last_row=last_row)
+    os.replace(tmp_path, label_path)
+    return label_path
+
+
+def load_label_index(label_path) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the label to `Stand.id` mapping and the last row of each label."""
+    with np.load(get_label_index_path(label_path)) as index:
+        return index["stand_ids"], index["last_row"]
+
+
+def load_label_first_row(label_path) -> np.ndarray:
+    """Returns the first row of each label, or 0 for every label of indexes
+    built before first rows were recorded.
+    """
+    with np.load(get_label_index_path(label_path)) as index:
+        if "first_row" in index:
+            return index["first_row"]
+        return np.zeros_like(index["last_row"])
+
+
+def _get_rows(height: int, first_row: np.ndarray, last_row: np.ndarray) -> np.ndarray:
+    """Returns whether each row is between the first and last row of any of
+    the labels.
+    """
+    bounds = np.zeros(height + 1, dtype="int64")
+    np.add.at(bounds, first_row, 1)
+    np.add.at(bounds, last_row + 1, -1)
+    return np.cumsum(bounds[:height]) > 0
+
+
+def get_window_stand_ids(label_path, windows: Iterable[Window]) -> np.ndarray:
+    """Returns the ids of the stands with pixels inside any of `windows`."""
+    stand_ids, _ = load_label_index(label_path)
+    labels = set()
+    with rasterio.open(label_path, "r") as src:
+        for window in windows:
+            labels.update(np.unique(src.read(1, window=window)).tolist())
+    labels.discard(LABEL_NODATA)
+    return stand_ids[sorted(labels)]
+
+
+def _group_runs(
+    labels: np.ndarray, values: np.ndarray, counts: Optional[np.ndarray] = None
+) -> Runs:
+    """Groups pixels into (label, value, count) runs, sorted by label and
+    then by value. `counts` is the weight of each input, defaulting to 1.
+    """
+    if labels.size and np.issubdtype(values.dtype, np.integer):
+        runs = _count_runs(labels, values, counts)
+        if runs is not None:
+            return runs
+    return _sort_runs(labels, values, counts)
+
+
+def _count_runs(
+    labels: np.ndarray, values: np.ndarray, counts: Optional[np.ndarray] = None
+) -> Optional[Runs]:
+    """Groups the pixels of an integer raster with a single bincount over
+    (label, value) pairs, instead of sorting them.
+
+    Returns None if the labels and values span more than
+    `MAX_HISTOGRAM_BINS` pairs.
+    """
+    first_label, last_label = int(labels.min()), int(labels.max())
+    min_value, max_value = int(values.min()), int(values.max())
+    classes = max_value - min_value + 1
+    bins = (last_label - first_label + 1) * classes
+    if bins > MAX_HISTOGRAM_BINS:
+        return None
+
+    pairs = (labels.astype("int64") - first_label) * classes + (
+        values.astype("int64") - min_value
+    )
+    histogram = np.bincount(pairs, weights=counts, minlength=bins)
+    if counts is not None:
+        histogram = histogram.astype("int64")
+    pairs = np.flatnonzero(histogram)
+    return (
+        (pairs // classes + first_label).astype(labels.dtype),
+        (pairs % classes + min_value).astype(values.dtype),
+        histogram[pairs],
+    )
+
+
+def _sort_runs(
+    labels: np.ndarray, values: np.ndarray, counts: Optional[np.ndarray] = None
+) -> Runs:
+    order = np.lexsort((values, labels))
+    labels = labels[order]
+    values = values[order]
+    is_start = np.empty(labels.size, dtype=bool)
+    is_start[:1] = True
+    is_start[1:] = (labels[1:] != labels[:-1]) | (values[1:] != values[:-1])
+    starts = np.flatnonzero(is_start)
+    if counts is None:
+        run_counts = np.diff(np.append(starts, labels.size))
+    else:
+        run_counts = np.add.reduceat(counts[order], starts) if starts.size else counts
+    return labels[starts], values[starts], run_counts
+
+
+def _first_of_group(mask: np.ndarray, group: np.ndarray) -> np.ndarray:
+    """Returns, for each group, the index of its first element where mask is set."""
+    index = np.flatnonzero(mask)
+    group = group[index]
+    is_first = np.empty(index.size, dtype=bool)
+    is_first[:1] = True
+    is_first[1:] = group[1:] != group[:-1]
+    return index[is_first]
+
+
+def _summarize_runs(
+    runs: Runs, accum_dtype, histograms: bool = False
+) -> Iterator[Tuple[int, dict]]:
+    """Yields (label, stats) for the runs of complete stands. With
+    `histograms`, stats of integer rasters include the pixel count of each
+    value.
+    """
+    labels, values, counts = runs
+    if labels.size == 0:
+        return
+    starts = np.flatnonzero(np.append(True, labels[1:] != labels[:-1]))
+    ends = np.append(starts[1:], labels.size)
+    group = np.repeat(np.arange(starts.size), ends - starts)
+
+    pixel_count = np.add.reduceat(counts, starts)
+    total = np.add.reduceat(values.astype(accum_dtype) * counts, starts)
+    mean = total / pixel_count
+    # ties are broken by the smallest value, like `key_assoc_val` on the
+    # sorted histogram of `get_zonal_stats`
+    majority = values[
+        _first_of_group(counts == np.maximum.reduceat(counts, starts)[group], group)
+    ]
+    minority = values[
+        _first_of_group(counts == np.minimum.reduceat(counts, starts)[group], group)
+    ]
+
+    is_categorical = np.issubdtype(values.dtype, np.integer)
+    for i, label in enumerate(labels[starts].tolist()):
+        stats = {
+            "min": float(values[starts[i]]),
+            "max": float(values[ends[i] - 1]),
+            "mean": float(mean[i]),
+            "count": int(pixel_count[i]),
+            "sum": float(total[i]),
+            "majority": float(majority[i]),
+            "minority": float(minority[i]),
+        }
+        if histograms:
+            stats["histogram"] = (
+                dict(
+                    zip(
+                        values[starts[i] : ends[i]].tolist(),
+                        counts[starts[i] : ends[i]].tolist(),
+                    )
+                )
+                if is_categorical
+                else None
+            )
+        yield label, stats
+
+
+def _split_runs(runs: Runs, mask: np.ndarray) -> Tuple[Runs, Runs]:
+    labels, values, counts = runs
+    return (
+        (labels[mask], values[mask], counts[mask]),
+        (labels[~mask], values[~mask], counts[~mask]),
+    )
+
+
+class _LabelReducer:
+    """Reduces the pixels of one condition raster grouped by the labels of
+    one label raster, keeping the runs of stands that are not complete yet.
+    """
+
+    def __init__(
+        self,
+        stand_ids: np.ndarray,
+        last_row: np.ndarray,
+        dtype,
+        histograms: bool = False,
+    ):
+        self.stand_ids = stand_ids
+        self.histograms = histograms
+        self.last_row = last_row
+        self.accum_dtype = (
+            "float64" if np.issubdtype(np.dtype(dtype), np.floating) else "int64"
+        )
+        self.pending: Optional[Runs] = None
+
+    def reduce(
+        self, labels: np.ndarray, values: np.ndarray, row_stop: int
+    ) -> Iterator[Tuple[int, dict]]:
+        """Adds valid pixels and yields the stands whose last row is above
+        `row_stop`.
+        """
+        runs = _group_runs(labels, values)
+        if self.pending is not None:
+            runs = _group_runs(
+                *[np.concatenate(pair) for pair in zip(self.pending, runs)]
+            )
+
+        complete, self.pending = _split_runs(runs, self.last_row[runs[0]] < row_stop)
+        for label, stats in _summarize_runs(
+            complete, self.accum_dtype, self.histograms
+        ):
+            yield int(self.stand_ids[label]), stats
+
+
+def _is_valid(values: np.ndarray, nodata) -> np.ndarray:
+    if nodata is None:
+        nodata = DEFAULT_NODATA
+    valid = values != nodata
+    if np.issubdtype(values.dtype, np.floating):
+        valid &= ~np.isnan(values)
+    return valid
+
+
+def get_multi_label_zonal_stats(
+    label_paths: dict,
+    rasters: dict,
+    band: int = 1,
+    strip_height: int = DEFAULT_STRIP_HEIGHT,
+    timer=NULL_TIMER,
+    histograms: bool = False,
+    stands: Optional[dict] = None,
+) -> Iterator[Tuple[Any, Any, int, dict]]:
+    """Computes the zonal statistics of every stand, for several label
+    rasters and condition rasters sharing one grid, in a single traversal.
+
+    Each raster is read once, strip by strip, and every strip of a condition
+    is reduced against the matching strip of every label raster. Strips
+    without rows of the stands needed by any pair of rasters are not read.
+
+    Args:
+      label_paths: Label rasters keyed by an arbitrary key, e.g. stand size.
+      rasters: Paths of condition rasters keyed by an arbitrary key, e.g.
+        condition id.
+      band: Band of the condition rasters to summarize.
+      strip_height: Number of rows read at once.
+      timer: Records the time spent in the read and reduce phases (see
+        `utils.timing`).
+      histograms: Adds the pixel count of each value of integer rasters to
+        the stats, as `histogram` (None for floating point rasters).
+      stands: Ids of the stands to compute, keyed by (label key, raster key).
+        Pairs that are missing or map to None are computed for every stand.
+
+    Yields:
+      (label key, raster key, stand_id, stats) for every stand needed with at
+      least one valid pixel. `stats` has the same keys as the result of
+      `get_zonal_stats`.
+
+    Raises:
+      ValueError if the rasters are not all aligned.
+    """
+    with ExitStack() as stack:
+        label_srcs = {
+            key: stack.enter_context(rasterio.open(path))
+            for key, path in label_paths.items()
+        }
+        srcs = {
+            key: stack.enter_context(rasterio.open(path))
+            for key, path in rasters.items()
+        }
+        first = next(iter([*label_srcs.values(), *srcs.values()]))
+        for src in [*label_srcs.values(), *srcs.values()]:
+            if src.shape != first.shape or src.transform != first.transform:
+                raise ValueError(f"{src.name} is not aligned to {first.name}.")
+
+        reducers = {}
+        # whether each label, and each row, is needed by a pair of rasters;
+        # None when every stand is.
+        scopes: dict[Tuple[Any, Any], Optional[np.ndarray]] = {}
+        rows: dict[Tuple[Any, Any], Optional[np.ndarray]] = {}
+        for label_key, path in label_paths.items():
+            stand_ids, last_row = load_label_index(path)
+            first_row = load_label_first_row(path)
+            for key, src in srcs.items():
+                pair = (label_key, key)
+                reducers[pair] = _LabelReducer(
+                    stand_ids, last_row, src.dtypes[band - 1], histograms
+                )
+                needed = (stands or {}).get(pair)
+                if needed is None:
+                    scopes[pair] = rows[pair] = None
+                    continue
+                scope = np.isin(stand_ids, list(needed))
+                scope[LABEL_NODATA] = False
+                scopes[pair] = scope
+                rows[pair] = _get_rows(first.height, first_row[scope], last_row[scope])
+
+        for window in iter_strips(first.height, first.width, strip_height):
+            row_stop = window.row_off + window.height
+            pairs = {
+                pair
+                for pair, pair_rows in rows.items()
+                if pair_rows is None or pair_rows[window.row_off : row_stop].any()
+            }
+            if not pairs:
+                continue
+            with timer.phase("read"):
+                labels = {
+                    label_key: src.read(1, window=window).ravel()
+                    for label_key, src in label_srcs.items()
+                    if any(pair[0] == label_key for pair in pairs)
+                }
+            for key, src in srcs.items():
+                if not any(pair[1] == key for pair in pairs):
+                    continue
+                with timer.phase("read"):
+                    values = src.read(band, window=window).ravel()
+                with timer.phase("reduce"):
+                    is_valid = _is_valid(values, src.nodata)
+                for label_key, strip_labels in labels.items():
+                    if (label_key, key) not in pairs:
+                        continue
+                    with timer.phase("reduce"):
+                        valid = is_valid & (strip_labels != LABEL_NODATA)
+                        scope = scopes[(label_key, key)]
+                        if scope is not None:
+                            valid &= scope[strip_labels]
+                        reducer = reducers[(label_key, key)]
+                        results = list(
+                            reducer.reduce(strip_labels[valid], values[valid], row_stop)
+                        )
+                    for stand_id, stats in results:
+                        yield label_key, key, stand_id, stats
+
+
+def get_label_zonal_stats(
+    label_path,
+    raster,
+    band: int = 1,
+    strip_height: int = DEFAULT_STRIP_HEIGHT,
+    timer=NULL_TIMER,
+    histograms: bool = False,
+) -> Iterator[Tuple[int, dict]]:
+    """Computes the zonal statistics of every stand in a label raster.
+
+    Args:
+      label_path: Label raster built by `build_label_raster` for the grid of
+        `raster`.
+      raster: Path of the condition raster.
+      band: Band of the condition raster to summarize.
+      strip_height: Number of rows read at once.
+      timer: Records the time spent in the read and reduce phases.
+      histograms: Adds the pixel count of each value of integer rasters.
+
+    Yields:
+      (stand_id, stats) for every stand with at least one valid pixel.
+
+    Raises:
+      ValueError if the label raster is not aligned with the raster.
+    """
+    for _, _, stand_id, stats in get_multi_label_zonal_stats(
+        {None: label_path}, {None: raster}, band, strip_height, timer, histograms
+    ):
+        yield stand_id, stats
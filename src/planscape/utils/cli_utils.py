@@ -12,16 +12,16 @@ def raster2pgpsql(
     name_column="name",
     raster_column="raster",
 ):
+    # without a name column, the column keeps its default value.
+    name_options = ["-F", "-n", name_column] if name_column else []
     return [
         "raster2pgsql",
         "-s",
         str(srid),
         "-a",
-        "-F",
+        *name_options,
         "-f",
         raster_column,
-        "-n",
-        name_column,
         "-t",
         tile_size,
         str(raster_path),
@@ -0,0 +1,41 @@
+import queue
+
+
+def imap_bounded(pool, func, iterable, max_pending):
+    """
+    Works like `Pool.imap_unordered`, with back-pressure.
+
+    Items are taken from `iterable` in the calling thread
+    (which matters for database cursors, as Django connections
+    are per thread), and at most `max_pending` items are
+    submitted to the pool without their results having been
+    consumed. Results are yielded as soon as they are ready.
+
+    An exception raised by `func` is raised by this generator.
+    """
+    done = queue.SimpleQueue()
+
+    def next_result():
+        succeeded, value = done.get()
+        if not succeeded:
+            raise value
+        return value
+
+    pending = 0
+    for item in iterable:
+        if pending >= max_pending:
+            result = next_result()
+            pending -= 1
+            yield result
+        pool.apply_async(
+            func,
+            (item,),
+            callback=lambda result: done.put((True, result)),
+            error_callback=lambda error: done.put((False, error)),
+        )
+        pending += 1
+
+    while pending > 0:
+        result = next_result()
+        pending -= 1
+        yield result
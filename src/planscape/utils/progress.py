@@ -0,0 +1,52 @@
+import time
+from datetime import timedelta
+
+import humanize
+
+
+class ProgressReporter:
+    """
+    Reports the progress of a long running task,
+    with its throughput and estimated time left.
+
+    Reports are written at most once every
+    `interval` seconds, and when the task is done.
+    """
+
+    def __init__(self, total, write, unit="items", interval=10.0, clock=time.monotonic):
+        self.total = total
+        self.write = write
+        self.unit = unit
+        self.interval = interval
+        self.clock = clock
+        self.done = 0
+        self.start = clock()
+        self.last_report = self.start
+
+    @property
+    def rate(self):
+        elapsed = self.clock() - self.start
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self):
+        rate = self.rate
+        if not self.total or rate <= 0:
+            return None
+        return timedelta(seconds=max(self.total - self.done, 0) / rate)
+
+    def update(self, count=1):
+        self.done += count
+        now = self.clock()
+        if now - self.last_report >= self.interval or self.done >= self.total:
+            self.last_report = now
+            self.write(self.message())
+
+    def message(self):
+        eta = self.eta
+        percent = 100 * self.done / self.total if self.total else 100.0
+        return (
+            f"[OK] {self.done}/{self.total} {self.unit} ({percent:.1f}%), "
+            f"{self.rate:.1f} {self.unit}/s, "
+            f"ETA {humanize.naturaldelta(eta) if eta is not None else 'unknown'}"
+        )
@@ -0,0 +1,38 @@
+import multiprocessing
+
+from django.test import SimpleTestCase
+from utils.pool_utils import imap_bounded
+
+
+def square(value):
+    return value * value
+
+
+def fail(value):
+    raise ValueError(value)
+
+
+class TestImapBounded(SimpleTestCase):
+    def test_yields_all_results(self):
+        with multiprocessing.Pool(2) as pool:
+            results = list(imap_bounded(pool, square, range(20), max_pending=3))
+        self.assertEqual(sorted(results), [v * v for v in range(20)])
+
+    def test_limits_pending_items(self):
+        taken = []
+
+        def items():
+            for value in range(10):
+                taken.append(value)
+                yield value
+
+        with multiprocessing.Pool(2) as pool:
+            for consumed, _ in enumerate(
+                imap_bounded(pool, square, items(), max_pending=2), start=1
+            ):
+                self.assertLessEqual(len(taken) - consumed, 2)
+
+    def test_raises_worker_errors(self):
+        with multiprocessing.Pool(1) as pool:
+            with self.assertRaises(ValueError):
+                list(imap_bounded(pool, fail, range(3), max_pending=2))
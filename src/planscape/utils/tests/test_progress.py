@@ -0,0 +1,52 @@
+from django.test import SimpleTestCase
+from utils.progress import ProgressReporter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestProgressReporter(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.messages = []
+        self.progress = ProgressReporter(
+            total=100,
+            write=self.messages.append,
+            unit="stands",
+            interval=10,
+            clock=self.clock,
+        )
+
+    def test_reports_rate_and_eta(self):
+        self.clock.now = 10
+        self.progress.update(25)
+        self.assertEqual(self.progress.rate, 2.5)
+        self.assertEqual(self.progress.eta.total_seconds(), 30)
+        self.assertEqual(len(self.messages), 1)
+        self.assertIn("25/100 stands (25.0%)", self.messages[0])
+        self.assertIn("2.5 stands/s", self.messages[0])
+
+    def test_reports_at_most_once_per_interval(self):
+        self.clock.now = 1
+        self.progress.update(10)
+        self.clock.now = 5
+        self.progress.update(10)
+        self.assertEqual(self.messages, [])
+        self.clock.now = 10
+        self.progress.update(10)
+        self.assertEqual(len(self.messages), 1)
+
+    def test_reports_when_done(self):
+        self.clock.now = 1
+        self.progress.update(100)
+        self.assertEqual(len(self.messages), 1)
+        self.assertIn("100/100", self.messages[0])
+
+    def test_eta_unknown_without_progress(self):
+        self.assertIsNone(self.progress.eta)
+        self.assertIn("ETA unknown", self.progress.message())
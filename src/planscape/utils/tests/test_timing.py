@@ -0,0 +1,35 @@
+from django.test import SimpleTestCase
+from utils.timing import NULL_TIMER, PhaseTimer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestPhaseTimer(SimpleTestCase):
+    def test_accumulates_phases(self):
+        clock = FakeClock()
+        timer = PhaseTimer(clock=clock)
+        for _ in range(2):
+            with timer.phase("read"):
+                clock.now += 1.5
+            with timer.phase("reduce"):
+                clock.now += 0.5
+        self.assertEqual(dict(timer.totals), {"read": 3.0, "reduce": 1.0})
+
+    def test_records_failed_phases(self):
+        clock = FakeClock()
+        timer = PhaseTimer(clock=clock)
+        with self.assertRaises(ValueError):
+            with timer.phase("read"):
+                clock.now += 2
+                raise ValueError()
+        self.assertEqual(timer.totals["read"], 2)
+
+    def test_null_timer(self):
+        with NULL_TIMER.phase("read"):
+            pass
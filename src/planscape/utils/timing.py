@@ -0,0 +1,38 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+
+class PhaseTimer:
+    """
+    Accumulates the time spent in named phases
+    of a task, e.g. reading and reducing.
+
+    Usage:
+        timer = PhaseTimer()
+        with timer.phase("read"):
+            ...
+        timer.totals  # {"read": seconds}
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.totals = defaultdict(float)
+
+    @contextmanager
+    def phase(self, name):
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.totals[name] += self.clock() - start
+
+
+class NullTimer:
+    """A timer that records nothing."""
+
+    def phase(self, name):
+        return nullcontext()
+
+
+NULL_TIMER = NullTimer()